@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Aleva audio pipeline.
+Usage: python scripts/benchmark.py <benchmark> [options]
+
+Benchmarks:
+  frames    Per-frame wake word cost with 1024-sample blocks vs. 1280-sample frames
+  alloc     Heap allocations per block on the int16 capture path (fails if any are kept)
+  imports   Import time of aleva.main_window via -X importtime (fails over budget)
+  pipeline  Replay WAV files and synthetic audio through the engine's consumers
+  onnx      Wake word cold start and per-frame latency per ONNX Runtime setting
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src'))
+
+SAMPLE_RATE = 16000
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def summarize(timings, audio_seconds):
+    """Summarize a list of per-call timings in seconds"""
+    total = sum(timings)
+    return {
+        'calls': len(timings),
+        'mean_ms': total / len(timings) * 1000 if timings else 0.0,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'total_s': total,
+        'real_time_factor': total / audio_seconds if audio_seconds else 0.0,
+    }
+
+
+def synthetic_audio(seconds, seed=0):
+    """Deterministic low-level noise as int16 samples"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    samples = rng.normal(0, 0.05, int(seconds * SAMPLE_RATE))
+    return (np.clip(samples, -1, 1) * 32767).astype(np.int16)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, None where it is not available"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def load_wake_word_model(model, onnx_config=None, cache_dir=None):
+    """Create an OpenWakeWord model the same way the application does"""
+    from openwakeword.model import Model as WakeWordModel
+
+    from aleva.inference import tuned_sessions
+
+    with tuned_sessions(onnx_config or {}, cache_dir):
+        return WakeWordModel(wakeword_models=[model], inference_framework='onnx', vad_threshold=0.2)
+
+
+def bench_frames(args):
+    """Compare wake word cost for the old 1024-sample blocks and 1280-sample frames"""
+    from aleva.audio import FrameAccumulator
+    from aleva.config import WAKE_WORD_FRAME_SIZE
+
+    audio = synthetic_audio(args.seconds)
+    results = {}
+
+    # Before: every capture block goes straight to predict()
+    model = load_wake_word_model(args.model)
+    timings = []
+    for start in range(0, len(audio) - 1024 + 1, 1024):
+        block = audio[start:start + 1024]
+        t0 = time.perf_counter()
+        model.predict(block)
+        timings.append(time.perf_counter() - t0)
+    results['blocks_1024'] = summarize(timings, args.seconds)
+
+    # After: capture blocks are re-chunked into whole 80 ms frames
+    model = load_wake_word_model(args.model)
+    accumulator = FrameAccumulator(WAKE_WORD_FRAME_SIZE)
+    timings = []
+
+    def score(frame):
+        t0 = time.perf_counter()
+        model.predict(frame)
+        timings.append(time.perf_counter() - t0)
+
+    for start in range(0, len(audio) - 1024 + 1, 1024):
+        accumulator.push(audio[start:start + 1024], score)
+    results['frames_1280'] = summarize(timings, args.seconds)
+
+    return results
+
+
+def bench_alloc(args):
+    """Trace heap allocations while blocks flow from the callback to the consumers
+
+    The int16 path is run the way the engine runs it: the raw callback copies
+    each block into the ring, the wake word frames go through the voice
+    activity gate, and the speech frames reach Vosk through the cffi view that
+    vosk_waveform() built once. Over the second half of the run nothing may be
+    left allocated in aleva's code that was not before, and the traced peak has
+    to stay below the size of one block, so no sample buffer is ever copied.
+    The peak that remains is transient interpreter objects (ints, views) that
+    are freed again every block.
+    The float32 path with the old per-block conversion is measured for comparison.
+    """
+    import numpy as np
+
+    import aleva
+    from aleva.audio import AudioRingBuffer, CaptureStats, VoiceActivityGate, float_to_int16, make_capture_callback
+    from aleva.config import WAKE_WORD_FRAME_SIZE
+    from aleva.engine import vosk_waveform
+    from aleva.metrics import Histogram
+
+    block_size = 1280
+    blocks = int(args.seconds * SAMPLE_RATE / block_size)
+    audio = synthetic_audio(args.seconds)
+    aleva_files = tracemalloc.Filter(True, os.path.join(os.path.dirname(aleva.__file__), '*'))
+
+    def run(raw):
+        dtype = np.int16 if raw else np.float32
+        ring = AudioRingBuffer(SAMPLE_RATE * 2, dtype=dtype)
+        # Time the callback like the engine does
+        stats = CaptureStats(callback_seconds=Histogram('callback_seconds', 'Capture callback duration'))
+        callback = make_capture_callback(ring, stats, raw=raw)
+        wake_reader = ring.add_reader('wake-word')
+        speech_reader = ring.add_reader('speech')
+        wake_frame = np.zeros(WAKE_WORD_FRAME_SIZE, dtype=dtype)
+        wake_int16 = wake_frame if raw else np.zeros(WAKE_WORD_FRAME_SIZE, dtype=np.int16)
+        speech_frame = np.zeros(4000, dtype=dtype)
+        speech_int16 = speech_frame if raw else np.zeros(4000, dtype=np.int16)
+        gate = VoiceActivityGate(WAKE_WORD_FRAME_SIZE, history_frames=4)
+        waveform = vosk_waveform(speech_int16)
+        fed = 0
+        payload = audio[: block_size * blocks].reshape(blocks, block_size)
+        if raw:
+            inputs = [memoryview(block.tobytes()) for block in payload]
+        else:
+            inputs = [(block / 32767).astype(np.float32).reshape(-1, 1) for block in payload]
+
+        def replay(frame):
+            pass
+
+        def step(block):
+            nonlocal fed
+            callback(block, block_size, None, None)
+            while wake_reader.read_into(wake_frame):
+                if not raw:
+                    float_to_int16(wake_frame, wake_int16)
+                gate.admit(wake_int16, replay)
+            while speech_reader.read_into(speech_frame):
+                if raw:
+                    # AcceptWaveform reads the frame through the view, nothing is copied
+                    fed += len(waveform)
+                else:
+                    # What the float path costs when Vosk needs bytes
+                    fed += len(float_to_int16(speech_frame, speech_int16).tobytes())
+
+        # Warm up so lazily created objects are not counted, and until every
+        # counter is past the small ints CPython caches
+        for index in range(300):
+            step(inputs[index % len(inputs)])
+
+        # Trace two halves: the second one must not retain anything the first did not
+        middle = len(inputs) // 2
+        tracemalloc.start()
+        for index in range(middle):
+            step(inputs[index])
+        before = tracemalloc.take_snapshot().filter_traces([aleva_files])
+        # The snapshot itself is not part of the pipeline
+        tracemalloc.reset_peak()
+        halfway, _ = tracemalloc.get_traced_memory()
+        for index in range(middle, len(inputs)):
+            step(inputs[index])
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces([aleva_files])
+        tracemalloc.stop()
+        retained = [diff for diff in after.compare_to(before, 'lineno') if diff.count_diff > 0]
+        return {
+            'blocks': len(inputs),
+            'block_bytes': block_size * np.dtype(dtype).itemsize,
+            'retained_growth_bytes': current - halfway,
+            'retained_allocations': sum(diff.count_diff for diff in retained),
+            'retained_at': [str(diff.traceback) for diff in retained[:10]],
+            'peak_bytes': peak - halfway,
+            'fed_bytes': fed,
+        }
+
+    results = {'int16': run(raw=True), 'float32': run(raw=False)}
+    int16 = results['int16']
+    results['passed'] = int16['retained_allocations'] == 0 and int16['peak_bytes'] < int16['block_bytes']
+    return results
+
+
+# Native libraries that must only be loaded once the audio pipeline starts
+DEFERRED_IMPORTS = ('numpy', 'sounddevice', 'onnxruntime', 'vosk', 'openwakeword')
+
+
+def bench_imports(args):
+    """Import a module in a fresh interpreter and check it against the budget"""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(project_root / 'src'), env.get('PYTHONPATH')]))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {args.module}'],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f'Importing {args.module} failed:\n{result.stderr}')
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        fields = [field.strip() for field in line[len('import time:'):].split('|')]
+        if not fields[1].isdigit():
+            continue
+        cumulative[fields[2].strip()] = int(fields[1])
+
+    total_ms = cumulative.get(args.module, 0) / 1000
+    top_level = {name: us / 1000 for name, us in cumulative.items() if '.' not in name}
+    slowest = dict(sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:10])
+    loaded_heavy = [name for name in DEFERRED_IMPORTS if name in cumulative]
+
+    return {
+        'module': args.module,
+        'import_ms': total_ms,
+        'budget_ms': args.budget_ms,
+        'slowest_top_level_ms': slowest,
+        'deferred_imports_loaded': loaded_heavy,
+        'passed': total_ms <= args.budget_ms and not loaded_heavy,
+    }
+
+
+def replay_sources(args):
+    """Audio to replay as (name, int16 samples): WAV fixtures first, then synthetic audio"""
+    import numpy as np
+
+    from aleva.batch import read_wav_blocks
+
+    sources = []
+    for path in args.wav:
+        sources.append((Path(path).name, np.concatenate(list(read_wav_blocks(Path(path), 4000)))))
+    if 'noise' in args.synthetic:
+        sources.append(('noise', synthetic_audio(args.seconds)))
+    if 'silence' in args.synthetic:
+        sources.append(('silence', np.zeros(int(args.seconds * SAMPLE_RATE), dtype=np.int16)))
+    return sources
+
+
+def replay(engine, audio, realtime):
+    """Feed audio to the engine's capture callback and time every consumer call
+
+    Blocks go through the same callback, ring buffer and consumer threads as
+    microphone input. Without ``realtime`` blocks are pushed as fast as the
+    consumers keep up, so the wall time gives the real-time factor. Wake word
+    latency is measured from the moment the block holding the triggering frame
+    was pushed until the event fires.
+    """
+    import numpy as np
+
+    block_size = engine.chunk_size
+    blocks = len(audio) // block_size
+    payload = audio[: blocks * block_size].reshape(blocks, block_size)
+    if engine.capture_dtype == 'int16':
+        inputs = [memoryview(block.tobytes()) for block in payload]
+    else:
+        inputs = [(block / 32767).astype(np.float32).reshape(-1, 1) for block in payload]
+    push_times = [0.0] * blocks
+    detections = []
+    transcripts = []
+
+    def on_event(event, payload):
+        if event == 'wake_word':
+            consumed = engine.consumers[0].reader.read_count
+            block = min(max(consumed - 1, 0) // block_size, blocks - 1)
+            detections.append({
+                'wake_word': payload['wake_word'],
+                'score': payload['score'],
+                'audio_time_s': consumed / SAMPLE_RATE,
+                'latency_ms': (time.perf_counter() - push_times[block]) * 1000,
+            })
+        elif event == 'transcript':
+            transcripts.append(payload['text'])
+
+    engine.on_event = on_event
+    engine.oww_model.reset()
+    engine.vosk_recognizer.Reset()
+    callback = engine.start_pipeline()
+
+    # Wrap the processors in place so the consumers still call them the same way
+    timings = {}
+    for consumer in engine.consumers:
+        calls = timings.setdefault(consumer.reader.name, [])
+
+        def timed(frame, process=consumer.process, calls=calls):
+            t0 = time.perf_counter()
+            process(frame)
+            calls.append(time.perf_counter() - t0)
+
+        consumer.process = timed
+
+    def active(consumer):
+        return consumer.gate is None or consumer.gate.is_open
+
+    started = time.perf_counter()
+    for index, block in enumerate(inputs):
+        if realtime:
+            delay = started + index * block_size / SAMPLE_RATE - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        else:
+            # Back off before a consumer falls a full ring behind
+            while any(active(c) and c.reader.depth > engine.streams[0].ring.capacity // 2 for c in engine.consumers):
+                time.sleep(0.001)
+        push_times[index] = time.perf_counter()
+        callback(block, block_size, None, None)
+
+    # Wait until every consumer has taken all the whole frames it can
+    while any(active(c) and c.reader.depth >= len(c.frame) for c in engine.consumers):
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - started
+
+    overruns = sum(c.reader.overruns for c in engine.consumers)
+    errors = sum(c.errors for c in engine.consumers)
+    engine.stop_pipeline()
+
+    audio_seconds = blocks * block_size / SAMPLE_RATE
+    latencies = [d['latency_ms'] for d in detections]
+    return {
+        'audio_s': audio_seconds,
+        'wall_s': elapsed,
+        'real_time_factor': elapsed / audio_seconds if audio_seconds else 0.0,
+        'wake_word': summarize(timings.get('wake-word', []), audio_seconds),
+        'speech': summarize(timings.get('speech', []), audio_seconds),
+        'detections': detections,
+        'detection_latency_ms': {
+            'p50': percentile(latencies, 50),
+            'p99': percentile(latencies, 99),
+        },
+        'transcripts': transcripts,
+        'reader_overruns': overruns,
+        'consumer_errors': errors,
+    }
+
+
+def bench_pipeline(args):
+    """Replay fixtures through the exact consumer path the live engine uses"""
+    import numpy as np
+
+    from aleva.config import default_config_dir
+    from aleva.engine import AudioEngine
+
+    models_dir = Path(args.models_dir) if args.models_dir else default_config_dir() / 'models'
+    engine = AudioEngine()
+    engine.configure({'capture_dtype': args.capture_dtype, 'gated_recognition': args.gated})
+
+    # Keep engine logs off stdout so the JSON stays parseable
+    with redirect_stdout(sys.stderr):
+        engine.load_models(models_dir)
+        if engine.oww_model is None or engine.vosk_model is None:
+            raise SystemExit(f'Wake word and speech models are required in {models_dir}')
+
+        results = {
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'machine': platform.machine(),
+                'numpy': np.__version__,
+                'capture_dtype': engine.capture_dtype,
+                'chunk_size': engine.chunk_size,
+                'gated_recognition': engine.gated_recognition,
+                'realtime': args.realtime,
+            },
+            'sources': {},
+        }
+        for name, audio in replay_sources(args):
+            results['sources'][name] = replay(engine, audio, args.realtime)
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    results['passed'] = all(not source['consumer_errors'] for source in results['sources'].values())
+    return results
+
+
+def bench_onnx(args):
+    """Compare wake word cold start and per-frame latency across ONNX Runtime settings
+
+    Each setting loads the model --repeats times in this process, after
+    onnxruntime and openwakeword have been imported. With the optimized model
+    cache the first load optimizes and writes the cache, the later ones read
+    it; without it every load optimizes again. The frames are scored by the
+    last model loaded, its first predict() is reported on its own.
+    """
+    import tempfile
+
+    import onnxruntime
+    from openwakeword.model import Model  # noqa: F401 - import time is not part of a cold start
+
+    from aleva.config import WAKE_WORD_FRAME_SIZE
+
+    audio = synthetic_audio(args.seconds)
+    starts = range(0, len(audio) - WAKE_WORD_FRAME_SIZE + 1, WAKE_WORD_FRAME_SIZE)
+    frames = [audio[start:start + WAKE_WORD_FRAME_SIZE] for start in starts]
+
+    results = {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'onnxruntime': onnxruntime.__version__,
+        },
+        'settings': {},
+    }
+    with tempfile.TemporaryDirectory() as cache_root, redirect_stdout(sys.stderr):
+        for threads in args.threads:
+            for level in args.levels:
+                for cached in (False, True) if level != 'disabled' else (False,):
+                    name = f'threads_{threads}_{level}' + ('_cached' if cached else '')
+                    onnx_config = {'intra_op_threads': threads, 'inter_op_threads': 1, 'graph_optimization': level}
+                    cache_dir = Path(cache_root) / name if cached else None
+
+                    loads = []
+                    for _ in range(args.repeats):
+                        t0 = time.perf_counter()
+                        model = load_wake_word_model(args.model, onnx_config, cache_dir)
+                        loads.append(time.perf_counter() - t0)
+
+                    t0 = time.perf_counter()
+                    model.predict(frames[0])
+                    first_frame = time.perf_counter() - t0
+
+                    timings = []
+                    for frame in frames[1:]:
+                        t0 = time.perf_counter()
+                        model.predict(frame)
+                        timings.append(time.perf_counter() - t0)
+
+                    results['settings'][name] = {
+                        'first_load_ms': loads[0] * 1000,
+                        'cold_start_ms': percentile(loads[1:] or loads, 50) * 1000,
+                        'first_frame_ms': first_frame * 1000,
+                        'frames': summarize(timings, args.seconds),
+                    }
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+BENCHMARKS = {
+    'alloc': bench_alloc,
+    'imports': bench_imports,
+    'frames': bench_frames,
+    'onnx': bench_onnx,
+    'pipeline': bench_pipeline,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Aleva pipeline benchmarks')
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--seconds', type=float, default=60.0, help='Seconds of audio to process')
+    parser.add_argument('--model', default='alexa', help='Wake word model name or .onnx path')
+    parser.add_argument('--module', default='aleva.main_window', help='Module to import (imports)')
+    parser.add_argument('--budget-ms', type=float, default=400.0, help='Import time budget (imports)')
+    parser.add_argument('--wav', nargs='*', default=[], help='WAV fixtures to replay (pipeline)')
+    parser.add_argument(
+        '--synthetic', nargs='*', choices=['noise', 'silence'], default=['noise', 'silence'],
+        help='Synthetic sources to replay after the fixtures (pipeline)',
+    )
+    parser.add_argument('--models-dir', help='Directory with the wake word and Vosk models (pipeline)')
+    parser.add_argument('--capture-dtype', choices=['float32', 'int16'], default='int16', help='Capture format (pipeline)')
+    parser.add_argument('--gated', action='store_true', help='Only run Vosk after a wake word (pipeline)')
+    parser.add_argument('--realtime', action='store_true', help='Pace blocks at the sample rate (pipeline)')
+    parser.add_argument(
+        '--threads', nargs='*', type=int, default=[1, 2, 0],
+        help='Intra-op thread counts to compare, 0 is one per core (onnx)',
+    )
+    parser.add_argument(
+        '--levels', nargs='*', choices=['disabled', 'basic', 'extended', 'all'],
+        default=['disabled', 'basic', 'extended', 'all'], help='Graph optimization levels to compare (onnx)',
+    )
+    parser.add_argument('--repeats', type=int, default=3, help='Model loads per setting (onnx)')
+    parser.add_argument('--json', dest='json_path', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    results = BENCHMARKS[args.benchmark](args)
+    output = json.dumps({'benchmark': args.benchmark, 'results': results}, indent=2)
+    if args.json_path:
+        Path(args.json_path).write_text(output, encoding='utf-8')
+    print(output)
+    return 0 if results.get('passed', True) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
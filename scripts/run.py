@@ -5,12 +5,14 @@ Usage: python run.py
 """
 
 import sys
+import time
 from pathlib import Path
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root / 'src'))
 
-from aleva.main_window import main
-
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    import_started = time.perf_counter()
+    from aleva.main_window import main
+
+    main(time.perf_counter() - import_started) 
\ No newline at end of file
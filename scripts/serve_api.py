@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the API that receives Aleva events.
+Usage: python scripts/serve_api.py [--port 8080] [--delay SECONDS] [--fail-rate FRACTION] [--close]
+
+Prints every event it receives. --delay slows down each response and
+--fail-rate answers a fraction of requests with 503, which is how batching,
+backpressure and retries are exercised. --close drops the connection after
+every response instead of keeping it alive.
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class EventHandler(BaseHTTPRequestHandler):
+    """Accepts POSTed event batches and prints them"""
+
+    protocol_version = 'HTTP/1.1'
+    delay = 0.0
+    fail_rate = 0.0
+    close = False
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.delay:
+            time.sleep(self.delay)
+
+        if random.random() < self.fail_rate:
+            self.reply(503)
+            return
+
+        try:
+            events = json.loads(body)['events']
+        except (ValueError, KeyError) as e:
+            print(f'Bad request: {e}', file=sys.stderr)
+            self.reply(400)
+            return
+
+        for event in events:
+            print(json.dumps(event, ensure_ascii=False), flush=True)
+        self.reply(204)
+
+    def reply(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        if self.close:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        # Keep stdout for the events
+        print(f'{self.address_string()} {format % args}', file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Receive and print Aleva events')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds to wait before each response')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    parser.add_argument('--close', action='store_true', help='Close the connection after every response')
+    args = parser.parse_args()
+
+    EventHandler.delay = args.delay
+    EventHandler.fail_rate = args.fail_rate
+    EventHandler.close = args.close
+    server = ThreadingHTTPServer((args.host, args.port), EventHandler)
+    print(f'Listening on http://{args.host}:{server.server_port}/', file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
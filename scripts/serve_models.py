@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the model download server.
+Usage: python scripts/serve_models.py DIRECTORY [--port 8000] [--rate BYTES] [--drop-after BYTES] [--no-ranges]
+
+Serves the files in DIRECTORY with HTTP Range support, so downloads can be
+exercised without network access. --rate throttles every response and
+--drop-after closes the connection part way through a response, which is how
+resume and cancellation are tested.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Static file handler that honours single byte ranges"""
+
+    rate = 0
+    drop_after = 0
+    ranges = True
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            self.remaining = sys.maxsize
+            return super().send_head()
+
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404, 'File not found')
+            return None
+
+        size = os.fstat(f.fileno()).st_size
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+        if not self.ranges or not match:
+            self.send_response(200)
+            self.send_header('Content-Length', str(size))
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.end_headers()
+            self.remaining = size
+            return f
+
+        start = int(match.group(1) or 0)
+        end = min(int(match.group(2)) if match.group(2) else size - 1, size - 1)
+        if start >= size or start > end:
+            f.close()
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.end_headers()
+            return None
+
+        f.seek(start)
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.end_headers()
+        self.remaining = end - start + 1
+        return f
+
+    def copyfile(self, source, outputfile):
+        sent = 0
+        while self.remaining > 0:
+            chunk = source.read(min(64 * 1024, self.remaining))
+            if not chunk:
+                break
+            if self.drop_after and sent + len(chunk) > self.drop_after:
+                # Simulate a dropped connection
+                outputfile.write(chunk[: self.drop_after - sent])
+                self.close_connection = True
+                return
+            outputfile.write(chunk)
+            sent += len(chunk)
+            self.remaining -= len(chunk)
+            if self.rate:
+                time.sleep(len(chunk) / self.rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve model files with HTTP Range support')
+    parser.add_argument('directory', help='Directory to serve')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--rate', type=int, default=0, help='Throttle each response to this many bytes per second')
+    parser.add_argument('--drop-after', type=int, default=0, help='Close each response after this many bytes')
+    parser.add_argument('--no-ranges', action='store_true', help='Ignore Range headers like a plain server')
+    args = parser.parse_args()
+
+    RangeRequestHandler.rate = args.rate
+    RangeRequestHandler.drop_after = args.drop_after
+    RangeRequestHandler.ranges = not args.no_ranges
+    handler = partial(RangeRequestHandler, directory=args.directory)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    print(f'Serving {args.directory} on http://{args.host}:{server.server_port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,66 @@
 """
 Main entry point for the Aleva application.
 Can be run with: python -m aleva
+Headless (no Qt): python -m aleva --headless
+Batch transcription: python -m aleva transcribe DIR
+Offline model install: python -m aleva import-model MODEL.zip
 """
 
-from .main_window import main
+import argparse
+import sys
+import time
+from pathlib import Path
+
+
+def main():
+    """Parse arguments and start the tray application, the headless engine or a batch job"""
+    parser = argparse.ArgumentParser(prog="aleva", description="Aleva - Audio Language Assistant")
+    parser.add_argument("--headless", action="store_true", help="Run the audio engine without a GUI")
+    parser.add_argument("--config", type=Path, help="Path to config.json (headless, transcribe and import-model)")
+    parser.add_argument("--device", type=int, nargs="+", help="Input device indexes (headless only)")
+    parser.add_argument(
+        "--format", choices=["json", "text"], default="json", help="Event output format (headless only)"
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+    transcribe = subparsers.add_parser("transcribe", help="Transcribe WAV files offline")
+    transcribe.add_argument("paths", nargs="+", type=Path, help="WAV files or directories to scan")
+    transcribe.add_argument("-o", "--output", type=Path, help="JSONL output file (default: stdout)")
+    transcribe.add_argument("-j", "--workers", type=int, help="Worker processes (default: CPU count)")
+    transcribe.add_argument("--vosk-model", type=Path, help="Vosk model directory to use")
+    transcribe.add_argument("--threshold", type=float, help="Wake word score threshold for all models")
+    import_model = subparsers.add_parser("import-model", help="Install a Vosk model from a zip file or directory")
+    import_model.add_argument("source", type=Path, help="Model zip archive or unpacked model directory")
+
+    args, qt_args = parser.parse_known_args()
+
+    if args.command == "transcribe":
+        if qt_args:
+            parser.error(f"unrecognized arguments: {' '.join(qt_args)}")
+        from .batch import run_batch
+
+        return run_batch(args.paths, args.output, args.config, args.vosk_model, args.workers, args.threshold)
+
+    if args.command == "import-model":
+        if qt_args:
+            parser.error(f"unrecognized arguments: {' '.join(qt_args)}")
+        from .install import run_import
+
+        return run_import(args.source, args.config)
+
+    if args.headless:
+        from .headless import run_headless
+
+        return run_headless(args.config, args.device, args.format)
+
+    # Leave Qt's own options (e.g. -platform) for QApplication
+    sys.argv = [sys.argv[0], *qt_args]
+    # Timed here so the import statements in main_window stay at the top of the module
+    started = time.perf_counter()
+    from .main_window import main as gui_main
+
+    return gui_main(time.perf_counter() - started)
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,624 @@
+"""
+Audio capture pipeline building blocks.
+
+The PortAudio callback only copies samples into an ``AudioRingBuffer``; the
+expensive work (wake word scoring, speech recognition) is done by
+``FrameConsumer``s that pull fixed-size frames from their own ``RingReader``,
+run by the worker threads of a ``FrameScheduler``. Each consumer picks its own
+frame size, independent of the capture block size, so OpenWakeWord always gets
+whole 80 ms frames and Vosk gets larger batches.
+"""
+
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+import numpy as np
+
+from .metrics import Histogram, ThreadCpuMeter
+
+
+@dataclass
+class CaptureStats:
+    """Counters updated by the capture callback"""
+
+    blocks: int = 0
+    samples: int = 0
+    input_overflows: int = 0
+    input_underflows: int = 0
+    status_errors: int = 0
+    # Optional latency histogram for the callback itself
+    callback_seconds: Optional[Histogram] = None
+    cpu: ThreadCpuMeter = field(default_factory=ThreadCpuMeter)
+
+    def record_status(self, status) -> None:
+        """Record the PortAudio status flags passed to the callback"""
+        if not status:
+            return
+        self.status_errors += 1
+        if getattr(status, "input_overflow", False):
+            self.input_overflows += 1
+        if getattr(status, "input_underflow", False):
+            self.input_underflows += 1
+
+    def record_duration(self, started: float) -> None:
+        """Record how long the callback took and sample its thread's CPU time"""
+        now = time.perf_counter()
+        if self.callback_seconds is not None:
+            self.callback_seconds.observe(now - started)
+        self.cpu.update(now)
+
+
+class AudioRingBuffer:
+    """Preallocated single-producer ring buffer shared by any number of readers
+
+    The producer (the PortAudio callback) copies samples in and advances a
+    monotonically increasing write counter. It never takes a lock and never
+    waits for a reader; a reader that falls more than ``capacity`` samples
+    behind loses its oldest samples and records an overrun instead.
+    """
+
+    def __init__(self, capacity: int, dtype=np.float32) -> None:
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=dtype)
+        # Byte view of the same memory for ``write_bytes``
+        self.bytes = memoryview(self.buffer).cast("B")
+        self.write_count = 0
+        self.readers: list["RingReader"] = []
+
+    def add_reader(self, name: str) -> "RingReader":
+        """Create a reader that starts at the current write position"""
+        reader = RingReader(self, name)
+        self.readers.append(reader)
+        return reader
+
+    def write(self, samples: np.ndarray) -> None:
+        """Copy samples into the ring, overwriting the oldest data"""
+        count = len(samples)
+        if count > self.capacity:
+            # Only the newest samples can be kept
+            self.write_count += count - self.capacity
+            samples = samples[count - self.capacity :]
+            count = self.capacity
+
+        start = self.write_count % self.capacity
+        first = min(count, self.capacity - start)
+        self.buffer[start : start + first] = samples[:first]
+        if first < count:
+            self.buffer[: count - first] = samples[first:]
+
+        # Publish only after the data is in place
+        self.write_count += count
+
+    def write_bytes(self, data) -> None:
+        """Copy a raw buffer of samples in the ring's dtype, see ``write``
+
+        Copies straight between byte views, so no array is created for ``data``.
+        """
+        data = memoryview(data).cast("B")
+        itemsize = self.buffer.itemsize
+        count = len(data) // itemsize
+        if count > self.capacity:
+            self.write_count += count - self.capacity
+            data = data[(count - self.capacity) * itemsize :]
+            count = self.capacity
+
+        start = self.write_count % self.capacity
+        first = min(count, self.capacity - start)
+        self.bytes[start * itemsize : (start + first) * itemsize] = data[: first * itemsize]
+        if first < count:
+            self.bytes[: (count - first) * itemsize] = data[first * itemsize : count * itemsize]
+
+        self.write_count += count
+
+
+class RingReader:
+    """Independent read cursor over an ``AudioRingBuffer``"""
+
+    def __init__(self, ring: AudioRingBuffer, name: str) -> None:
+        self.ring = ring
+        self.name = name
+        self.read_count = ring.write_count
+        self.overruns = 0
+        self.dropped_samples = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of samples written but not yet read"""
+        return self.ring.write_count - self.read_count
+
+    def skip_to_end(self) -> None:
+        """Discard everything that has not been read yet"""
+        self.read_count = self.ring.write_count
+
+    def rewind(self, samples: int) -> None:
+        """Move the cursor to ``samples`` before the newest written sample"""
+        samples = min(samples, self.ring.capacity, self.ring.write_count)
+        self.read_count = self.ring.write_count - samples
+
+    def read_into(self, out: np.ndarray) -> bool:
+        """Fill ``out`` with the next ``len(out)`` samples
+
+        Returns False without consuming anything when not enough samples are
+        buffered yet.
+        """
+        ring = self.ring
+        count = len(out)
+
+        while True:
+            available = ring.write_count - self.read_count
+            if available > ring.capacity:
+                self._drop(available - ring.capacity)
+                available = ring.capacity
+            if available < count:
+                return False
+
+            start = self.read_count % ring.capacity
+            first = min(count, ring.capacity - start)
+            out[:first] = ring.buffer[start : start + first]
+            if first < count:
+                out[first:] = ring.buffer[: count - first]
+
+            # The producer may have lapped us while we were copying
+            if ring.write_count - self.read_count <= ring.capacity:
+                self.read_count += count
+                return True
+
+    def _drop(self, samples: int) -> None:
+        """Skip samples that have already been overwritten"""
+        self.read_count += samples
+        self.overruns += 1
+        self.dropped_samples += samples
+
+
+class RecognitionGate:
+    """Keeps a consumer idle until a wake word opens it
+
+    While closed, the consumer's reader is kept at the write position, so no
+    frames are processed. Opening the gate rewinds the reader by the pre-roll
+    so the audio leading up to the detection is decoded too. The gate is
+    closed again by the consumer on an endpoint once the pre-roll has been
+    decoded, or once ``max_active_samples`` have been processed.
+    """
+
+    def __init__(self, pre_roll_samples: int, max_active_samples: int) -> None:
+        self.pre_roll_samples = pre_roll_samples
+        self.max_active_samples = max_active_samples
+        self.is_open = False
+        self.active_samples = 0
+        self.activations = 0
+        self.timeouts = 0
+        self._open_requested = False
+
+    def request_open(self) -> None:
+        """Ask the consumer to start processing (safe from any thread)"""
+        self._open_requested = True
+
+    def poll(self, reader: RingReader) -> bool:
+        """Return True if the consumer should process frames right now"""
+        if self._open_requested:
+            self._open_requested = False
+            if not self.is_open:
+                reader.rewind(self.pre_roll_samples)
+                self.is_open = True
+                self.active_samples = 0
+                self.activations += 1
+            return True
+
+        if self.is_open:
+            return True
+
+        reader.skip_to_end()
+        return False
+
+    def past_pre_roll(self, samples: int) -> bool:
+        """Whether the pre-roll has been decoded once ``samples`` more are
+
+        An endpoint inside the pre-roll is silence before the wake word; later
+        ones end the utterance, whether or not it had any words.
+        """
+        return self.active_samples + samples > self.pre_roll_samples
+
+    def advance(self, samples: int) -> bool:
+        """Account for processed samples; returns True once the gate timed out"""
+        self.active_samples += samples
+        if self.active_samples >= self.max_active_samples:
+            self.timeouts += 1
+            return True
+        return False
+
+    def close(self) -> None:
+        """Go back to idle"""
+        self.is_open = False
+        self.active_samples = 0
+
+
+class VoiceActivityGate:
+    """Skips wake word scoring while there is nothing but background noise
+
+    The level of each int16 frame is compared against a noise floor that
+    follows quiet frames quickly and louder ones slowly. A frame ``margin_db``
+    above the floor opens the gate, which stays open for ``hangover_frames``
+    after the last loud one. With ``vad`` (an OpenWakeWord Silero ``VAD``),
+    a loud frame only opens the gate if the VAD also hears speech in it.
+
+    The model's features depend on the audio before the current frame, so the
+    last ``history_frames`` skipped frames are kept and replayed through the
+    model when the gate opens. The first frame of speech is then scored with
+    the same features as without the gate.
+    """
+
+    def __init__(
+        self,
+        frame_size: int,
+        history_frames: int,
+        margin_db: float = 8.0,
+        hangover_frames: int = 12,
+        floor_rise_db: float = 0.08,
+        min_level_db: float = -70.0,
+        vad=None,
+        vad_threshold: float = 0.5,
+    ) -> None:
+        self.margin_db = margin_db
+        self.hangover_frames = hangover_frames
+        self.floor_rise_db = floor_rise_db
+        self.min_level_db = min_level_db
+        self.vad = vad
+        self.vad_threshold = vad_threshold
+
+        self.history = np.zeros((max(history_frames, 0), frame_size), dtype=np.int16)
+        self._scaled = np.zeros(frame_size, dtype=np.float32)
+        self._history_start = 0
+        self._history_count = 0
+
+        # Open at first, so speech right at the start is scored while the floor settles
+        self.noise_floor: Optional[float] = None
+        self.is_open = True
+        self.hangover = hangover_frames
+        self.scored = 0
+        self.skipped = 0
+        self.replayed = 0
+        self.activations = 0
+
+    @classmethod
+    def from_config(
+        cls, audio_config: dict, frame_size: int, sample_rate: int, history_frames: int
+    ) -> Optional["VoiceActivityGate"]:
+        """Gate set up from the ``audio`` section, None when it is turned off"""
+        mode = audio_config.get("wake_word_gate", "energy")
+        if mode not in ("energy", "silero"):
+            return None
+
+        vad = None
+        if mode == "silero":
+            try:
+                import openwakeword
+
+                vad = openwakeword.VAD()
+            except Exception as e:
+                print(f"Silero VAD not available, gating on energy only: {e}")
+
+        frame_seconds = frame_size / sample_rate
+        return cls(
+            frame_size,
+            history_frames,
+            margin_db=audio_config.get("wake_word_gate_margin_db", 8.0),
+            hangover_frames=round(audio_config.get("wake_word_gate_hangover", 1.0) / frame_seconds),
+            # The floor rises by at most 1 dB per second
+            floor_rise_db=frame_seconds,
+            vad=vad,
+        )
+
+    @property
+    def skipped_ratio(self) -> float:
+        """Share of frames that were not scored"""
+        total = self.scored + self.skipped
+        return self.skipped / total if total else 0.0
+
+    def level_db(self, frame: np.ndarray) -> float:
+        """Frame level in dB relative to full scale"""
+        scaled = self._scaled[: len(frame)]
+        # Converted in place: a mixed-type multiply would allocate casting buffers every frame
+        np.copyto(scaled, frame)
+        scaled *= 1 / 32768
+        return 10 * math.log10(float(np.dot(scaled, scaled)) / len(frame) + 1e-10)
+
+    def admit(self, frame: np.ndarray, replay: Callable[[np.ndarray], object]) -> bool:
+        """Return True if ``frame`` should be scored
+
+        When the gate opens, the kept history is passed to ``replay`` first.
+        Skipped frames are copied into the history.
+        """
+        level = self.level_db(frame)
+        if self.noise_floor is None:
+            self.noise_floor = level
+        elif level < self.noise_floor:
+            self.noise_floor += 0.3 * (level - self.noise_floor)
+        else:
+            self.noise_floor = min(level, self.noise_floor + self.floor_rise_db)
+
+        loud = level >= self.min_level_db and level >= self.noise_floor + self.margin_db
+        if loud and not self.is_open and self.vad is not None:
+            # Each check starts fresh, the VAD does not see the skipped frames
+            self.vad.reset_states()
+            loud = self.vad.predict(frame, frame_size=640) >= self.vad_threshold
+
+        if loud:
+            if not self.is_open:
+                self.is_open = True
+                self.activations += 1
+                self._replay(replay)
+            self.hangover = self.hangover_frames
+        elif self.is_open:
+            if self.hangover > 0:
+                self.hangover -= 1
+            else:
+                self.is_open = False
+
+        if not self.is_open:
+            self._remember(frame)
+            self.skipped += 1
+            return False
+        self.scored += 1
+        return True
+
+    def _remember(self, frame: np.ndarray) -> None:
+        """Copy a skipped frame into the history, overwriting the oldest"""
+        capacity = len(self.history)
+        if not capacity:
+            return
+        self.history[(self._history_start + self._history_count) % capacity] = frame
+        if self._history_count < capacity:
+            self._history_count += 1
+        else:
+            self._history_start = (self._history_start + 1) % capacity
+
+    def _replay(self, replay: Callable[[np.ndarray], object]) -> None:
+        """Pass the kept history to ``replay``, oldest first, and empty it"""
+        capacity = len(self.history)
+        for i in range(self._history_count):
+            replay(self.history[(self._history_start + i) % capacity])
+        self.replayed += self._history_count
+        self._history_start = 0
+        self._history_count = 0
+
+    def reset(self) -> None:
+        """Forget the noise floor and history, e.g. before the next file"""
+        self.noise_floor = None
+        self.is_open = True
+        self.hangover = self.hangover_frames
+        self._history_start = 0
+        self._history_count = 0
+
+
+class FrameAccumulator:
+    """Re-chunks arbitrarily sized blocks into fixed-size frames
+
+    Push-style counterpart of ``RingReader.read_into`` for callers that already
+    have the audio in hand (files, benchmarks). Partial frames are kept in a
+    preallocated buffer between calls; whole frames that lie inside an input
+    block are handed out as views without copying.
+    """
+
+    def __init__(self, frame_size: int, dtype=np.int16) -> None:
+        self.frame_size = frame_size
+        self.frame = np.zeros(frame_size, dtype=dtype)
+        self.filled = 0
+
+    def push(self, samples: np.ndarray, emit: Callable[[np.ndarray], None]) -> int:
+        """Feed samples and call ``emit`` for every completed frame
+
+        Returns the number of frames emitted.
+        """
+        frame_size = self.frame_size
+        count = len(samples)
+        offset = 0
+        frames = 0
+
+        # Top up a partially filled frame first
+        if self.filled:
+            take = min(frame_size - self.filled, count)
+            self.frame[self.filled : self.filled + take] = samples[:take]
+            self.filled += take
+            offset = take
+            if self.filled < frame_size:
+                return 0
+            emit(self.frame)
+            self.filled = 0
+            frames += 1
+
+        # Whole frames straight from the input
+        while count - offset >= frame_size:
+            emit(samples[offset : offset + frame_size])
+            offset += frame_size
+            frames += 1
+
+        # Keep the remainder for the next call
+        remainder = count - offset
+        if remainder:
+            self.frame[:remainder] = samples[offset:]
+            self.filled = remainder
+
+        return frames
+
+    def reset(self) -> None:
+        """Drop any partially filled frame"""
+        self.filled = 0
+
+
+class UtteranceBuffer:
+    """Preallocated int16 buffer collecting the audio of one utterance
+
+    Frames beyond ``capacity`` samples are not kept; ``truncated`` records
+    that the utterance was longer than what was saved.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.samples = np.zeros(capacity, dtype=np.int16)
+        self.length = 0
+        self.truncated = False
+
+    def append(self, frame: np.ndarray) -> None:
+        """Copy a frame in, as far as it fits"""
+        take = min(len(frame), len(self.samples) - self.length)
+        if take < len(frame):
+            self.truncated = True
+        if take > 0:
+            self.samples[self.length : self.length + take] = frame[:take]
+            self.length += take
+
+    def take(self) -> np.ndarray:
+        """Copy of the collected samples"""
+        return self.samples[: self.length].copy()
+
+    def clear(self) -> None:
+        """Start a new utterance"""
+        self.length = 0
+        self.truncated = False
+
+
+class FrameConsumer:
+    """Pulls fixed-size frames from a ring reader and hands them to ``process``
+
+    Every read fills the caller-provided ``frame`` array in place and passes it
+    to ``process``, which must not keep a reference to it. ``step()`` is called
+    by a ``FrameScheduler`` worker, never by two threads at once.
+    """
+
+    def __init__(
+        self,
+        reader: RingReader,
+        frame: np.ndarray,
+        process: Callable[[np.ndarray], None],
+        name: Optional[str] = None,
+        gate: Optional[RecognitionGate] = None,
+    ) -> None:
+        self.name = name or f"aleva-{reader.name}"
+        self.reader = reader
+        self.frame = frame
+        self.process = process
+        self.gate = gate
+        self.frames_processed = 0
+        self.errors = 0
+        # CPU time of the workers while they were stepping this consumer
+        self.cpu = ThreadCpuMeter()
+
+    def step(self) -> bool:
+        """Process the next frame; returns False if none was ready"""
+        if self.gate is not None and not self.gate.poll(self.reader):
+            return False
+
+        if not self.reader.read_into(self.frame):
+            return False
+
+        try:
+            self.process(self.frame)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error in {self.name}: {e}")
+        self.frames_processed += 1
+        return True
+
+
+class FrameScheduler:
+    """Runs the consumers of every stream on a fixed pool of worker threads
+
+    With several microphones, a thread per consumer would start more threads
+    than there are cores. Instead ``workers`` threads take turns over all
+    consumers: a consumer is stepped by one worker at a time, so each stream's
+    frames stay in order, and after every frame a worker moves on to the next
+    consumer, so a busy stream cannot starve the others. The inference itself
+    (ONNX Runtime, Vosk) releases the GIL, so the workers run in parallel.
+    """
+
+    def __init__(self, consumers: list[FrameConsumer], workers: int = 0, poll_interval: float = 0.01) -> None:
+        self.consumers = consumers
+        self.workers = max(1, min(workers or os.cpu_count() or 1, len(consumers)))
+        self.poll_interval = poll_interval
+        self.threads: list[threading.Thread] = []
+        self._busy = [False] * len(consumers)
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def start(self) -> None:
+        """Start the worker threads"""
+        for index in range(self.workers):
+            thread = threading.Thread(target=self.run, name=f"aleva-worker-{index}", daemon=True)
+            self.threads.append(thread)
+            thread.start()
+
+    def run(self) -> None:
+        """Worker loop: step the next consumer with a frame ready, or wait when none has one"""
+        consumers = self.consumers
+        cursor = 0
+        while not self._stop_event.is_set():
+            worked = False
+            for offset in range(len(consumers)):
+                index = (cursor + offset) % len(consumers)
+                with self._lock:
+                    if self._busy[index]:
+                        continue
+                    self._busy[index] = True
+
+                consumer = consumers[index]
+                started = time.thread_time()
+                try:
+                    worked = consumer.step()
+                finally:
+                    consumer.cpu.add(time.thread_time() - started)
+                    with self._lock:
+                        self._busy[index] = False
+                if worked:
+                    cursor = index + 1
+                    break
+
+            if not worked:
+                self._stop_event.wait(self.poll_interval)
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        """Ask the workers to exit and wait for them"""
+        self._stop_event.set()
+        for thread in self.threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=timeout)
+
+
+def make_capture_callback(ring: AudioRingBuffer, stats: CaptureStats, raw: bool = False):
+    """Build a PortAudio callback that only records stats and fills the ring
+
+    With ``raw`` the callback expects the byte buffer of a mono int16
+    ``RawInputStream`` and copies it into an int16 ring without any conversion.
+    Otherwise it takes channel 0 of an ``InputStream`` block.
+    """
+    if raw:
+
+        def raw_callback(indata, frames, time_info, status) -> None:
+            started = time.perf_counter()
+            stats.record_status(status)
+            stats.blocks += 1
+            stats.samples += frames
+            ring.write_bytes(indata)
+            stats.record_duration(started)
+
+        return raw_callback
+
+    def callback(indata, frames, time_info, status) -> None:
+        started = time.perf_counter()
+        stats.record_status(status)
+        stats.blocks += 1
+        stats.samples += frames
+        ring.write(indata[:, 0])
+        stats.record_duration(started)
+
+    return callback
+
+
+def float_to_int16(samples: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Convert float samples in [-1, 1] to int16 into a preallocated array"""
+    np.multiply(samples, 32767, out=out, casting="unsafe")
+    return out
@@ -0,0 +1,276 @@
+"""
+Offline batch transcription of recorded audio files.
+
+Runs the same wake word + Vosk pipeline as the live engine over WAV files,
+as fast as the CPU allows. Files are spread across a process pool; each worker
+loads the models once and writes one JSON record per file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Optional
+
+from .config import WAKE_WORD_FRAME_SIZE, ConfigStore, default_config_dir, migrate_legacy_config_dir
+from .engine import (
+    VOSK_MODEL_NAME,
+    WAKE_WORD_FILE,
+    WAKE_WORD_THRESHOLD,
+    load_vosk_model,
+    load_wake_word_model,
+    wake_word_history_frames,
+)
+from .registry import ModelRegistry
+from .wakeword import WakeWordDetector
+
+SAMPLE_RATE = 16000
+
+# Models owned by the current worker process, set up by init_worker
+_worker_models: dict = {}
+
+
+def find_audio_files(paths: list[Path]) -> list[Path]:
+    """Expand directories into the WAV files they contain, sorted by path"""
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(p for p in path.rglob("*") if p.suffix.lower() == ".wav" and p.is_file())
+        elif path.is_file():
+            files.append(path)
+        else:
+            print(f"Skipping missing path: {path}", file=sys.stderr)
+    return sorted(files)
+
+
+class LinearResampler:
+    """Linear interpolation to ``SAMPLE_RATE``, block by block as if over the whole file
+
+    The position of the next output sample and the last input sample are
+    carried over to the next block, so block boundaries leave no seams and
+    the output has the same length however the input was split. Linear
+    interpolation is good enough for recognition and scoring.
+    """
+
+    def __init__(self, source_rate: int) -> None:
+        self.step = source_rate / SAMPLE_RATE
+        # Of the next output sample, in input samples from the last one of the previous block
+        self.position = 0.0
+        self.last = None
+
+    def process(self, samples):
+        """Resample the next float block"""
+        import numpy as np
+
+        if self.last is not None:
+            samples = np.concatenate(([self.last], samples))
+        end = len(samples) - 1
+        if end < 0 or self.position > end:
+            count = 0
+        else:
+            count = int((end - self.position) // self.step) + 1
+        positions = self.position + self.step * np.arange(count)
+        resampled = np.interp(positions, np.arange(len(samples)), samples)
+        if end >= 0:
+            self.position += count * self.step - end
+            self.last = samples[-1]
+        return resampled
+
+
+def read_wav_blocks(path: Path, block_size: int):
+    """Yield mono 16 kHz int16 blocks from a PCM WAV file"""
+    import numpy as np
+
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Only 16-bit PCM WAV files are supported (got {wav.getsampwidth() * 8}-bit)")
+
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        resampler = LinearResampler(rate) if rate != SAMPLE_RATE else None
+        # Read enough source frames to produce roughly one output block
+        source_block = max(1, int(block_size * rate / SAMPLE_RATE))
+
+        while True:
+            data = wav.readframes(source_block)
+            if not data:
+                break
+
+            samples = np.frombuffer(data, dtype=np.int16)
+            if channels > 1:
+                # Downmixed, so a microphone on either channel is heard
+                samples = samples.reshape(-1, channels).mean(axis=1)
+            if resampler is not None:
+                samples = resampler.process(samples)
+            if samples.dtype != np.int16:
+                samples = np.rint(samples).astype(np.int16)
+            if len(samples):
+                yield samples
+
+
+def init_worker(models_dir: str, vosk_model_dir: str, audio_config: dict, onnx_config: dict) -> None:
+    """Load the models once per worker process"""
+    from .audio import VoiceActivityGate
+
+    # stdout may carry the JSONL results, keep log messages off it
+    sys.stdout = sys.stderr
+    _worker_models["oww"] = load_wake_word_model(Path(models_dir) / WAKE_WORD_FILE, onnx_config)
+    _worker_models["vosk"] = load_vosk_model(Path(vosk_model_dir))
+    _worker_models["detector"] = WakeWordDetector.from_config(audio_config, WAKE_WORD_FRAME_SIZE / SAMPLE_RATE)
+    _worker_models["gate"] = VoiceActivityGate.from_config(
+        audio_config, WAKE_WORD_FRAME_SIZE, SAMPLE_RATE, wake_word_history_frames(_worker_models["oww"])
+    )
+
+
+def transcribe_file(path: str) -> dict:
+    """Run one file through wake word scoring and speech recognition"""
+    import numpy as np
+    from vosk import KaldiRecognizer
+
+    from .audio import FrameAccumulator
+
+    oww_model = _worker_models.get("oww")
+    vosk_model = _worker_models.get("vosk")
+    detector = _worker_models.get("detector") or WakeWordDetector(WAKE_WORD_THRESHOLD)
+    detector.reset()
+    gate = _worker_models.get("gate")
+    if gate is not None:
+        gate.reset()
+
+    started = time.perf_counter()
+    record: dict = {"file": path, "wake_words": [], "max_scores": {}, "transcripts": []}
+    if vosk_model is None:
+        record["error"] = "Speech model not available"
+        return record
+
+    recognizer = KaldiRecognizer(vosk_model, SAMPLE_RATE)
+    recognizer.SetWords(True)
+    if oww_model is not None:
+        oww_model.reset()
+
+    accumulator = FrameAccumulator(WAKE_WORD_FRAME_SIZE, dtype=np.int16)
+
+    def score(frame: np.ndarray) -> None:
+        # Background noise is skipped like in live listening
+        if gate is not None and not gate.admit(frame, oww_model.predict):
+            detector.skip()
+            return
+
+        prediction = oww_model.predict(frame)
+        for wake_word, value in prediction.items():
+            record["max_scores"][wake_word] = max(float(value), record["max_scores"].get(wake_word, 0.0))
+
+        # The same decision stage as live listening, one entry per spoken wake word
+        detection = detector.process(prediction)
+        if detection is not None:
+            wake_word, value = detection
+            record["wake_words"].append({"wake_word": wake_word, "score": value, "time": round(detector.seconds, 2)})
+
+    def add_transcript(result: str) -> None:
+        result_dict = json.loads(result)
+        text = result_dict.get("text", "").strip()
+        if not text:
+            return
+        words = result_dict.get("result", [])
+        transcript = {"text": text}
+        if words:
+            transcript["start"] = words[0]["start"]
+            transcript["end"] = words[-1]["end"]
+        record["transcripts"].append(transcript)
+
+    samples = 0
+    try:
+        for block in read_wav_blocks(Path(path), 4000):
+            samples += len(block)
+            if oww_model is not None:
+                accumulator.push(block, score)
+            if recognizer.AcceptWaveform(block.tobytes()):
+                add_transcript(recognizer.Result())
+
+        add_transcript(recognizer.FinalResult())
+
+    except Exception as e:
+        record["error"] = str(e)
+
+    elapsed = time.perf_counter() - started
+    duration = samples / SAMPLE_RATE
+    record["duration"] = round(duration, 3)
+    record["processing_time"] = round(elapsed, 3)
+    record["real_time_factor"] = round(elapsed / duration, 4) if duration else None
+    return record
+
+
+def run_batch(
+    paths: list[Path],
+    output: Optional[Path] = None,
+    config_file: Optional[Path] = None,
+    vosk_model_dir: Optional[Path] = None,
+    workers: Optional[int] = None,
+    threshold: Optional[float] = None,
+) -> int:
+    """Transcribe files across a process pool and write JSONL results"""
+    with redirect_stdout(sys.stderr):
+        config_dir = config_file.parent if config_file else migrate_legacy_config_dir(default_config_dir())
+        config = ConfigStore(config_file or config_dir / "config.json").load()
+    models_dir = config_dir / "models"
+    if vosk_model_dir is None:
+        vosk_model_path = config.get("models", {}).get("vosk_model_path")
+        registry = ModelRegistry(models_dir)
+        registry.scan([vosk_model_path])
+        selected = registry.select(vosk_model_path, config.get("ui", {}).get("language"))
+        vosk_model_dir = selected.path if selected else models_dir / VOSK_MODEL_NAME
+    audio_config = dict(config.get("audio", {}))
+    if threshold is not None:
+        # An explicit threshold applies to every model
+        audio_config["wake_word_threshold"] = threshold
+        audio_config["wake_word_thresholds"] = {}
+
+    files = find_audio_files(paths)
+    if not files:
+        print("No WAV files found", file=sys.stderr)
+        return 1
+    if not vosk_model_dir.is_dir():
+        print(f"Speech model not found: {vosk_model_dir}", file=sys.stderr)
+        return 1
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(files)))
+    print(f"Transcribing {len(files)} files with {workers} workers", file=sys.stderr)
+
+    started = time.perf_counter()
+    total_audio = 0.0
+    failures = 0
+    out = open(output, "w", encoding="utf-8") if output else sys.stdout
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(str(models_dir), str(vosk_model_dir), audio_config, config.get("onnx", {})),
+        ) as executor:
+            futures = {executor.submit(transcribe_file, str(path)): path for path in files}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    # E.g. a worker that died on a corrupt file; the other files are still transcribed
+                    record = {"file": str(futures[future]), "error": str(e) or type(e).__name__}
+                total_audio += record.get("duration", 0.0)
+                failures += "error" in record
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    speed = total_audio / elapsed if elapsed else 0.0
+    print(
+        f"Processed {total_audio:.1f} s of audio in {elapsed:.1f} s ({speed:.1f}x real time), {failures} failed",
+        file=sys.stderr,
+    )
+    return 1 if failures else 0
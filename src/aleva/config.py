@@ -0,0 +1,311 @@
+"""
+Application configuration defaults, loading and saving.
+
+Kept free of Qt and of the audio/model libraries so that it is cheap to import
+from anywhere, including the headless entry point.
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+# Application name, also set on the QApplication so both front ends share a config directory
+APP_NAME = "aleva"
+
+# Data directories of versions that left the application name to Qt, which named them after the script run
+LEGACY_DIR_NAMES = ("run.py", "__main__.py")
+
+# OpenWakeWord's feature pipeline steps in 80 ms at 16 kHz
+WAKE_WORD_FRAME_SIZE = 1280
+
+# Sample formats the capture stream can deliver
+CAPTURE_DTYPES = ("float32", "int16")
+
+# Seconds between attempts to write a config that could not be saved, at most
+MAX_RETRY_DELAY = 60.0
+
+
+def get_default_config() -> dict:
+    """Get default configuration"""
+    return {
+        "version": "0.1.0",
+        "ui": {"language": "en", "window_geometry": {"x": 200, "y": 200, "width": 400, "height": 300}},
+        "audio": {
+            "sample_rate": 16000,
+            "chunk_size": 1280,
+            "wake_word_frame_size": WAKE_WORD_FRAME_SIZE,
+            "vosk_frame_size": 4000,
+            "ring_buffer_seconds": 2.0,
+            "capture_dtype": "float32",
+            "gated_recognition": False,
+            "pre_roll_ms": 500,
+            "utterance_timeout": 10.0,
+            # Show the hypothesis while speaking, polled at most this often
+            "partial_results": True,
+            "partial_interval_ms": 100,
+            # Decode speech in a separate process that is restarted if it crashes (applies after a restart)
+            "decoder_process": False,
+            "selected_microphone": None,
+            # Seconds between checks for sound cards being plugged in or removed (Linux only, elsewhere
+            # the devices are re-read on a device change message or when the microphone list is opened)
+            "device_poll_interval": 2.0,
+            # More microphones listened to at the same time, labelled like selected_microphone
+            "additional_microphones": [],
+            # Threads running the wake word and speech models of all microphones, 0 for one per core
+            "inference_workers": 0,
+            # Seconds within which the same wake word or transcript from another microphone is dropped
+            "duplicate_window": 2.0,
+            "wake_word_threshold": 0.5,
+            # Per-model overrides keyed like the scores, e.g. {"alexa_v0.1": 0.6}
+            "wake_word_thresholds": {},
+            # Frames averaged, frames in a row above the threshold, and seconds ignored after a detection
+            "wake_word_smoothing": 2,
+            "wake_word_patience": 2,
+            "wake_word_refractory": 2.0,
+            # Skip wake word scoring in silence: "energy", "silero" (energy, then Silero VAD) or "off"
+            "wake_word_gate": "energy",
+            # dB above the noise floor that counts as sound, and seconds scored after the last loud frame
+            "wake_word_gate_margin_db": 8.0,
+            "wake_word_gate_hangover": 1.0,
+        },
+        "api": {
+            "url": None,
+            # Seconds to wait for a response before retrying
+            "timeout": 5.0,
+            # Events sent in one request at most, and kept waiting before the oldest are dropped
+            "max_batch": 32,
+            "max_queue": 1000,
+            # Retries with exponential backoff before a batch is given up on
+            "max_retries": 5,
+        },
+        "models": {
+            # Name of a model in the models directory, or a path to one elsewhere
+            "vosk_model_path": None,
+            # Loaded models are kept for quick switching up to this estimated size
+            "memory_cap_mb": 6144,
+            # Most recently used models, the next one after the current is preloaded
+            "recent": [],
+            # Parallel byte-range connections used for model downloads
+            "download_segments": 4,
+            # Download archives that have no pinned SHA-256 without verifying them, instead of asking each time
+            "allow_unverified_downloads": False,
+        },
+        "onnx": {
+            # ONNX Runtime threads per wake word model session, 0 starts one per core
+            "intra_op_threads": 1,
+            "inter_op_threads": 1,
+            # "disabled", "basic", "extended" or "all"
+            "graph_optimization": "all",
+            # Keep optimized models in models/.onnx-cache so later starts skip graph optimization
+            "cache_optimized_models": True,
+        },
+        "system": {"minimize_to_tray": True, "show_tray_notifications": True},
+        "recording": {
+            # Keep the audio and text of every recognized utterance
+            "enabled": False,
+            # Defaults to "utterances" next to config.json
+            "directory": None,
+            # Oldest recordings are deleted beyond this size
+            "max_mb": 500,
+            # Longer utterances are cut, the metadata marks them as truncated
+            "max_utterance_seconds": 30.0,
+        },
+        # metrics_file ending in .prom/.txt is written as Prometheus text, anything else as JSON
+        "diagnostics": {"metrics_file": None, "metrics_interval": 10.0},
+    }
+
+
+def merge_configs(default: dict, loaded: dict) -> dict:
+    """Recursively merge loaded config with default config"""
+    result = default.copy()
+
+    for key, value in loaded.items():
+        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
+            result[key] = merge_configs(result[key], value)
+        else:
+            result[key] = value
+
+    return result
+
+
+def default_config_dir() -> Path:
+    """Per-user data directory, matching QStandardPaths.AppDataLocation"""
+    if sys.platform == "win32":
+        base = Path(os.environ.get("APPDATA") or Path.home() / "AppData" / "Roaming")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Application Support"
+    else:
+        base = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share")
+    return base / APP_NAME
+
+
+def migrate_legacy_config_dir(config_dir: Path) -> Path:
+    """Move config.json and the models of an earlier version into ``config_dir``, returning it
+
+    Earlier versions kept their data next to ``config_dir``, in a directory
+    named after the script that started them. Only done while ``config_dir``
+    has no config.json, and config.json is moved last, so an interrupted move
+    is finished on the next start. Entries are renamed rather than copied, so
+    gigabytes of models move instantly; models already in ``config_dir`` are
+    kept.
+    """
+    if (config_dir / "config.json").exists():
+        return config_dir
+    candidates = [config_dir.parent / name for name in LEGACY_DIR_NAMES]
+    candidates = [path for path in candidates if (path / "config.json").is_file()]
+    if not candidates:
+        return config_dir
+    # The one used last, should both scripts have been used
+    legacy_dir = max(candidates, key=lambda path: (path / "config.json").stat().st_mtime)
+
+    try:
+        models_dir = config_dir / "models"
+        models_dir.mkdir(parents=True, exist_ok=True)
+        legacy_models = legacy_dir / "models"
+        if legacy_models.is_dir():
+            for entry in legacy_models.iterdir():
+                if not (models_dir / entry.name).exists():
+                    os.replace(entry, models_dir / entry.name)
+        fsync_directory(models_dir)
+        os.replace(legacy_dir / "config.json", config_dir / "config.json")
+        fsync_directory(config_dir)
+    except OSError as e:
+        print(f"Error moving data from {legacy_dir} to {config_dir}: {e}")
+        return config_dir
+
+    print(f"Moved configuration and models from {legacy_dir} to {config_dir}")
+    return config_dir
+
+
+def fsync_directory(path: Path) -> None:
+    """Flush a directory's entries to disk, so renames into it survive a power loss
+
+    Only POSIX can open directories for this; elsewhere the rename is left to the file system.
+    """
+    if os.name != "posix":
+        return
+    directory = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def serialize_config(config: dict) -> str:
+    """config.json contents for ``config``"""
+    return json.dumps(config, indent=4, ensure_ascii=False)
+
+
+class ConfigStore:
+    """config.json, saved in the background
+
+    ``save()`` only takes a snapshot of the config; a burst of saves within
+    ``debounce`` seconds is written once, on a background thread. A snapshot
+    identical to what is already on disk (or about to be) is not written at
+    all. Each write goes to a temporary file that is flushed to disk and then
+    renamed over config.json, so a crash leaves either the old or the new
+    file, never a truncated one. ``flush()`` writes a pending save right away.
+    A write that fails stays pending and is tried again, waiting twice as long
+    after each failure up to ``MAX_RETRY_DELAY``.
+    """
+
+    def __init__(self, path: Path, debounce: float = 0.5) -> None:
+        self.path = Path(path)
+        self.debounce = debounce
+        self.writes = 0
+        self.skipped = 0
+
+        # Contents on disk, or about to be once the pending save is written
+        self._saved: Optional[str] = None
+        self._pending: Optional[str] = None
+        self._timer: Optional[threading.Timer] = None
+        self._retry_delay = debounce
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def load(self) -> dict:
+        """Load the file merged over the defaults, falling back to the defaults"""
+        config = get_default_config()
+        try:
+            config = merge_configs(config, json.loads(self.path.read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            print(f"Config file not found, using defaults: {self.path}")
+            return config
+        except Exception as e:
+            # The next save replaces the unreadable file
+            print(f"Error loading config: {e}")
+            return config
+
+        # The defaults merged in are not worth a write of their own
+        self._saved = serialize_config(config)
+        return config
+
+    def save(self, config: dict) -> None:
+        """Schedule a write of ``config`` unless nothing changed; never blocks on the disk"""
+        text = serialize_config(config)
+        with self._lock:
+            if text == (self._pending if self._pending is not None else self._saved):
+                self.skipped += 1
+                return
+            self._pending = text
+            if self._timer is None:
+                # Not restarted by later saves, so a steady stream of changes still gets written
+                self._schedule(self.debounce)
+
+    def flush(self) -> None:
+        """Write the pending save now, e.g. before quitting"""
+        with self._write_lock:
+            with self._lock:
+                text, self._pending = self._pending, None
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if text is None:
+                    return
+                # Saves of the same contents during the write are skipped too
+                self._saved = text
+
+            try:
+                self.write(text)
+            except OSError as e:
+                print(f"Error saving config: {e}")
+                with self._lock:
+                    # Unknown what is on disk now, the next save writes
+                    self._saved = None
+                    # Written later unless a newer save took its place in the meantime
+                    if self._pending is None:
+                        self._pending = text
+                    if self._timer is None:
+                        self._retry_delay = min(self._retry_delay * 2, MAX_RETRY_DELAY)
+                        self._schedule(self._retry_delay)
+                return
+            self._retry_delay = self.debounce
+            self.writes += 1
+            print("Configuration saved successfully")
+
+    def _schedule(self, delay: float) -> None:
+        """Start the timer that writes the pending save; called with the lock held"""
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.name = "aleva-config"
+        self._timer.daemon = True
+        self._timer.start()
+
+    def write(self, text: str) -> None:
+        """Atomically replace the file with ``text``"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+        # The rename itself only survives a power loss once the directory is on disk
+        fsync_directory(self.path.parent)
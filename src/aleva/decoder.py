@@ -0,0 +1,406 @@
+"""
+Vosk decoding in a worker process.
+
+Kaldi decoding holds the GIL for parts of every frame, and the capture
+callback, the wake word model and the Qt event loop wait for it. With
+``audio.decoder_process`` set, a ``DecoderProcess`` loads the Vosk model in a
+child process instead and ``RemoteRecognizer`` stands in for
+``KaldiRecognizer`` in the engine. The PCM of each frame is copied into a
+``multiprocessing.shared_memory`` ring, and only a small message naming the
+ring slot goes over the pipe. The worker answers every request with the
+result, the partial result or just an acknowledgement.
+
+A decoder that crashes is started again. The utterance it was decoding is
+lost, and frames that arrive while the model reloads are dropped. Nothing
+here imports Vosk in the calling process.
+"""
+
+import json
+import math
+import os
+import signal
+import threading
+import time
+import weakref
+from collections import deque
+from itertools import count
+from multiprocessing import connection, get_context, shared_memory
+from pathlib import Path
+from typing import Optional
+
+# What KaldiRecognizer returns when nothing has been recognized
+EMPTY_RESULT = json.dumps({"text": ""})
+EMPTY_PARTIAL = json.dumps({"partial": ""})
+
+# Seconds a crashed decoder waits before starting again, so a model that crashes right away does not spin
+RESTART_DELAY = 1.0
+
+
+def run_decoder(model_dir: str, conn: connection.Connection) -> None:
+    """Worker process: load the model and serve recognizer requests until the pipe closes"""
+    # Ctrl+C is for the parent, which stops the decoder by closing the pipe
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        from vosk import KaldiRecognizer, Model, SetLogLevel
+        from vosk import _ffi as vosk_ffi
+
+        SetLogLevel(-1)
+        model = Model(model_dir)
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+    conn.send(("ready", os.getpid()))
+
+    # Channel id -> (recognizer, ring, partial results wanted)
+    channels = {}
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        command, channel, seq = message[:3]
+        reply_kind, payload = None, None
+        if command == "stop":
+            break
+        elif command == "open":
+            ring_name, sample_rate, partials = message[3:]
+            # Spawned children share the parent's resource tracker, the segment stays the parent's to unlink
+            ring = shared_memory.SharedMemory(ring_name)
+            channels[channel] = (KaldiRecognizer(model, sample_rate), ring, partials)
+        elif command == "close":
+            if channel in channels:
+                channels.pop(channel)[1].close()
+        elif channel in channels:
+            recognizer, ring, partials = channels[channel]
+            if command == "frame":
+                start, size = message[3:]
+                if recognizer.AcceptWaveform(vosk_ffi.from_buffer(ring.buf[start : start + size])):
+                    reply_kind, payload = "result", recognizer.Result()
+                elif partials:
+                    reply_kind, payload = "partial", recognizer.PartialResult()
+            elif command == "final":
+                reply_kind, payload = "final", recognizer.FinalResult()
+            elif command == "reset":
+                recognizer.Reset()
+
+        try:
+            conn.send((channel, seq, reply_kind, payload))
+        except (BrokenPipeError, OSError):
+            break
+
+
+def _stop_process(state: dict) -> None:
+    """Ask the worker to exit and wait for it, killing it if it does not"""
+    state["closed"] = True
+    with state["send_lock"]:
+        try:
+            state["conn"].send(("stop", 0, 0))
+        except (BrokenPipeError, OSError):
+            pass
+    process = state["process"]
+    process.join(timeout=2.0)
+    if process.is_alive():
+        process.kill()
+
+
+class DecoderProcess:
+    """Worker process holding one loaded Vosk model
+
+    Takes the place of ``vosk.Model`` for the engine and the model registry:
+    ``recognizer()`` opens a ``RemoteRecognizer`` on it, and any number of
+    them (one per microphone) share the process. The process is stopped when
+    the last reference to this object goes away.
+    """
+
+    def __init__(self, model_dir: Path) -> None:
+        self.model_dir = Path(model_dir)
+        self.restarts = 0
+        self.error: Optional[str] = None
+        self.pid: Optional[int] = None
+
+        self._ready = threading.Event()
+        self._channels: "weakref.WeakValueDictionary[int, RemoteRecognizer]" = weakref.WeakValueDictionary()
+        self._channel_ids = count(1)
+        self._started = 0.0
+        # Shared with the finalizer, which must not keep this object alive
+        self._state: dict = {"closed": False, "send_lock": threading.Lock()}
+        self._spawn()
+        self._finalizer = weakref.finalize(self, _stop_process, self._state)
+
+    def _spawn(self) -> None:
+        # Not forked: the parent runs Qt and audio threads
+        context = get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=run_decoder, args=(str(self.model_dir), child_conn), name="aleva-decoder", daemon=True
+        )
+        process.start()
+        # The worker holds the only other end, so its exit shows up as EOF here
+        child_conn.close()
+        self._state["process"] = process
+        self._state["conn"] = parent_conn
+        self._started = time.monotonic()
+        reader = threading.Thread(
+            target=_read_replies, args=(weakref.ref(self), parent_conn), name="aleva-decoder-reader", daemon=True
+        )
+        reader.start()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the model is loaded; False if it failed to load or took too long"""
+        return self._ready.wait(timeout) and self.error is None
+
+    @property
+    def ready(self) -> bool:
+        """Whether the worker has the model loaded and takes requests"""
+        return self._ready.is_set() and self.error is None
+
+    @property
+    def is_alive(self) -> bool:
+        """Whether the worker process is running"""
+        return self._state["process"].is_alive()
+
+    def recognizer(self, sample_rate: int, frame_bytes: int, **kwargs) -> "RemoteRecognizer":
+        """Open a recognizer in the worker, see ``RemoteRecognizer``"""
+        return RemoteRecognizer(self, sample_rate, frame_bytes, **kwargs)
+
+    def close(self) -> None:
+        """Stop the worker process"""
+        self._finalizer()
+
+    def send(self, message: tuple) -> bool:
+        """Send a request to the worker; False if it is not running"""
+        with self._state["send_lock"]:
+            try:
+                self._state["conn"].send(message)
+                return True
+            except (BrokenPipeError, OSError):
+                # The reader notices the crash and restarts the worker
+                return False
+
+    def _open_channel(self, recognizer: "RemoteRecognizer") -> int:
+        channel = next(self._channel_ids)
+        with self._state["send_lock"]:
+            self._channels[channel] = recognizer
+        self.send(recognizer.open_message(channel))
+        return channel
+
+    def _handle(self, message: tuple) -> None:
+        if message[0] == "ready":
+            self.pid = message[1]
+            self.error = None
+            self._ready.set()
+        elif message[0] == "error":
+            self.error = message[1]
+            print(f"Error loading Vosk model {self.model_dir.name} in decoder process: {self.error}")
+            self._ready.set()
+        else:
+            recognizer = self._channels.get(message[0])
+            if recognizer is not None:
+                recognizer.handle_reply(*message[1:])
+
+    def _restart(self) -> None:
+        """Start a new worker after a crash and reopen every recognizer in it"""
+        if self.error is not None or self._state["closed"]:
+            # A model that failed to load would fail again
+            return
+
+        self._ready.clear()
+        process = self._state["process"]
+        process.join(timeout=1.0)
+        exitcode = process.exitcode
+        print(f"Vosk decoder process exited unexpectedly (exit code {exitcode}), restarting")
+        self.restarts += 1
+        delay = self._started + RESTART_DELAY - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        if self._state["closed"]:
+            return
+
+        with self._state["send_lock"]:
+            self._spawn()
+            recognizers = list(self._channels.items())
+        for channel, recognizer in recognizers:
+            recognizer.abandon()
+            self.send(recognizer.open_message(channel))
+
+
+def _read_replies(decoder_ref: weakref.ref, conn: connection.Connection) -> None:
+    """Reader thread: hand replies to their recognizers, restart the worker if it dies"""
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            # Only this thread reads the pipe, so only this thread closes it
+            conn.close()
+            decoder = decoder_ref()
+            if decoder is not None:
+                decoder._restart()
+            return
+
+        decoder = decoder_ref()
+        if decoder is None:
+            return
+        decoder._handle(message)
+        # Not kept while waiting, so the decoder can be collected
+        del decoder
+
+
+def load_decoder(model_dir: Path) -> Optional[DecoderProcess]:
+    """Start a decoder process for a Vosk model directory, returning None if the model cannot be loaded"""
+    try:
+        decoder = DecoderProcess(model_dir)
+    except Exception as e:
+        print(f"Error starting Vosk decoder process: {e}")
+        return None
+    if not decoder.wait_ready():
+        decoder.close()
+        return None
+    return decoder
+
+
+def _close_channel(decoder: DecoderProcess, channel: int, ring: shared_memory.SharedMemory) -> None:
+    decoder.send(("close", channel, 0))
+    ring.close()
+    ring.unlink()
+
+
+class RemoteRecognizer:
+    """``KaldiRecognizer`` lookalike that decodes in a ``DecoderProcess``
+
+    The ring holds ``ring_seconds`` of frames of at most ``frame_bytes``. A
+    call waits at most ``reply_timeout`` seconds for the worker; a result that
+    arrives later is returned by the next ``AcceptWaveform``. When the worker
+    falls a full ring behind, frames are dropped instead of blocking the
+    caller. Partial results come with every frame when ``partials`` is set,
+    so ``PartialResult()`` never waits. Calls come from one thread at a time.
+    """
+
+    def __init__(
+        self,
+        decoder: DecoderProcess,
+        sample_rate: int,
+        frame_bytes: int,
+        partials: bool = True,
+        ring_seconds: float = 10.0,
+        reply_timeout: float = 0.1,
+        final_timeout: float = 1.0,
+    ) -> None:
+        self.decoder = decoder
+        self.sample_rate = sample_rate
+        self.frame_bytes = frame_bytes
+        self.partials = partials
+        self.reply_timeout = reply_timeout
+        self.final_timeout = final_timeout
+        self.slots = max(2, math.ceil(ring_seconds * sample_rate * 2 / frame_bytes))
+        self.ring = shared_memory.SharedMemory(create=True, size=self.slots * frame_bytes)
+
+        self.dropped_frames = 0
+        self.late_replies = 0
+
+        # Requests are numbered; the worker answers them in order
+        self._sent = 0
+        self._acked = 0
+        self._results: deque = deque()
+        self._result: Optional[str] = None
+        self._final: Optional[str] = None
+        self._partial = EMPTY_PARTIAL
+        self._replied = threading.Condition()
+
+        self.channel = decoder._open_channel(self)
+        self._finalizer = weakref.finalize(self, _close_channel, decoder, self.channel, self.ring)
+
+    def open_message(self, channel: int) -> tuple:
+        """Request that creates this recognizer's state in the worker"""
+        return ("open", channel, 0, self.ring.name, self.sample_rate, self.partials)
+
+    def handle_reply(self, seq: int, kind: Optional[str], payload: Optional[str]) -> None:
+        """Called by the decoder's reader thread with the worker's answer to request ``seq``"""
+        with self._replied:
+            self._acked = max(self._acked, seq)
+            if kind == "result":
+                self._results.append(payload)
+                self._partial = EMPTY_PARTIAL
+            elif kind == "partial":
+                self._partial = payload
+            elif kind == "final":
+                self._final = payload
+                self._partial = EMPTY_PARTIAL
+            self._replied.notify_all()
+
+    def abandon(self) -> None:
+        """Forget requests the crashed worker never answered"""
+        with self._replied:
+            self._acked = self._sent
+            self._results.clear()
+            self._partial = EMPTY_PARTIAL
+            self._replied.notify_all()
+
+    def _request(self, command: str, *args) -> bool:
+        self._sent += 1
+        if self.decoder.send((command, self.channel, self._sent, *args)):
+            return True
+        # Never answered, nothing to wait for
+        self.abandon()
+        return False
+
+    def _wait(self, seq: int, timeout: float) -> bool:
+        with self._replied:
+            return self._replied.wait_for(lambda: self._acked >= seq, timeout)
+
+    def _take_result(self) -> bool:
+        with self._replied:
+            if not self._results:
+                return False
+            self._result = self._results.popleft()
+            return True
+
+    def AcceptWaveform(self, data) -> bool:
+        """Decode one frame of 16-bit PCM; True when an utterance ended"""
+        data = memoryview(data).cast("B")
+        if len(data) > self.frame_bytes:
+            raise ValueError(f"Frame of {len(data)} bytes does not fit ring slots of {self.frame_bytes}")
+
+        seq = self._sent + 1
+        if not self.decoder.ready or seq - self._acked > self.slots:
+            # The model is reloading after a crash, or the worker is a whole ring behind
+            self.dropped_frames += 1
+            return self._take_result()
+
+        start = (seq % self.slots) * self.frame_bytes
+        self.ring.buf[start : start + len(data)] = data
+        if not self._request("frame", start, len(data)):
+            self.dropped_frames += 1
+            return self._take_result()
+        if not self._wait(seq, self.reply_timeout):
+            self.late_replies += 1
+        return self._take_result()
+
+    def Result(self) -> str:
+        """JSON of the utterance that ended"""
+        result, self._result = self._result, None
+        return result or EMPTY_RESULT
+
+    def PartialResult(self) -> str:
+        """JSON of the utterance so far, as of the last frame the worker answered"""
+        return self._partial
+
+    def FinalResult(self) -> str:
+        """Flush the utterance in progress and return its JSON"""
+        with self._replied:
+            self._final = None
+        if self.decoder.ready and self._request("final") and not self._wait(self._sent, self.final_timeout):
+            self.late_replies += 1
+        return self._final or EMPTY_RESULT
+
+    def Reset(self) -> None:
+        """Drop the utterance in progress"""
+        self._request("reset")
+        with self._replied:
+            self._results.clear()
+            self._result = None
+            self._partial = EMPTY_PARTIAL
+
+    def close(self) -> None:
+        """Release the worker's recognizer and the ring"""
+        self._finalizer()
@@ -0,0 +1,209 @@
+"""
+Delivery of wake word and transcript events to the configured API URL.
+
+The engine's worker threads only append events to a bounded in-memory queue;
+one background thread sends them as JSON POSTs over a persistent keep-alive
+connection. Events that arrive while a request is in flight go out together in
+the next one, up to ``max_batch``. When the API cannot keep up, the oldest
+events are dropped and counted rather than stalling the audio pipeline, and
+failed requests are retried with exponential backoff. Qt-free.
+"""
+
+import http.client
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlsplit
+
+from .metrics import MetricsRegistry
+
+# Engine events forwarded to the API
+DELIVERED_EVENTS = ("wake_word", "transcript")
+
+# Upper bounds in seconds, from an API on localhost to one that needed retries
+SEND_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Responses worth retrying; any other error status means the request itself was rejected
+RETRY_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class StaleConnection(http.client.HTTPException):
+    """The server closed the kept-alive connection while it was idle, before reading the request"""
+
+
+def event_record(event: str, payload: dict) -> dict:
+    """JSON-ready record of an engine event, stamped with the current UTC time"""
+    return {"time": datetime.now(timezone.utc).isoformat(), "event": event, **payload}
+
+
+class EventDelivery(threading.Thread):
+    """Background sender of engine events to an HTTP endpoint
+
+    ``submit()`` is safe to call from any thread and never waits for the
+    network. Each request body is ``{"events": [record, ...]}`` with records
+    as produced by ``event_record``.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        metrics: Optional[MetricsRegistry] = None,
+        timeout: float = 5.0,
+        max_batch: int = 32,
+        max_queue: int = 1000,
+        max_retries: int = 5,
+        retry_delay: float = 0.5,
+        max_retry_delay: float = 30.0,
+    ) -> None:
+        super().__init__(name="aleva-delivery", daemon=True)
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported API URL: {url}")
+
+        self.url = url
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.timeout = timeout
+        self.max_batch = max(1, max_batch)
+        self.max_queue = max(1, max_queue)
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.queue: deque = deque()
+        self.connection: Optional[http.client.HTTPConnection] = None
+        self._condition = threading.Condition()
+        self._stop_event = threading.Event()
+
+        metrics = metrics or MetricsRegistry()
+        self.send_seconds = metrics.histogram(
+            "aleva_api_send_seconds", "Time from an event until the API acknowledged it", buckets=SEND_BUCKETS
+        )
+        self.request_seconds = metrics.histogram(
+            "aleva_api_request_seconds", "Round trip of one successful API request", buckets=SEND_BUCKETS
+        )
+        self.sent = metrics.counter("aleva_api_events_sent_total", "Events acknowledged by the API")
+        self.dropped = metrics.counter("aleva_api_events_dropped_total", "Events dropped because the queue was full")
+        self.failed = metrics.counter("aleva_api_events_failed_total", "Events given up on after retries or rejection")
+        self.retries = metrics.counter("aleva_api_retries_total", "API requests repeated after an error")
+        self.connections = metrics.counter("aleva_api_connections_total", "Connections opened to the API")
+        metrics.gauge("aleva_api_queue_depth", "Events waiting to be sent", func=lambda: len(self.queue))
+
+    def submit(self, event: str, payload: dict) -> None:
+        """Queue an event for sending; drops the oldest one when the queue is full"""
+        if event not in DELIVERED_EVENTS:
+            return
+
+        item = (time.perf_counter(), event_record(event, payload))
+        with self._condition:
+            if len(self.queue) >= self.max_queue:
+                self.queue.popleft()
+                self.dropped.inc()
+            self.queue.append(item)
+            self._condition.notify()
+
+    def run(self) -> None:
+        """Send queued events until stopped and the queue is empty"""
+        while True:
+            with self._condition:
+                while not self.queue and not self._stop_event.is_set():
+                    self._condition.wait()
+                if not self.queue:
+                    break
+                batch = [self.queue.popleft() for _ in range(min(len(self.queue), self.max_batch))]
+            self.deliver(batch)
+        self.close()
+
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        """Stop after sending what is queued, without retrying failures"""
+        with self._condition:
+            self._stop_event.set()
+            self._condition.notify()
+        if self.is_alive():
+            self.join(timeout=timeout)
+
+    def deliver(self, batch: list) -> None:
+        """Send one batch, retrying with backoff, and record its latency"""
+        body = json.dumps({"events": [record for _, record in batch]}, ensure_ascii=False).encode("utf-8")
+        delay = self.retry_delay
+        attempts = 0
+        error = ""
+        while attempts <= self.max_retries:
+            if attempts:
+                self.retries.inc()
+                if self._stop_event.wait(delay):
+                    break
+                delay = min(delay * 2, self.max_retry_delay)
+
+            started = time.perf_counter()
+            try:
+                status = self.post(body)
+            except StaleConnection as e:
+                # The request never reached the server, so sending it again cannot duplicate it
+                self.close()
+                error = str(e)
+                continue
+            except (OSError, http.client.HTTPException) as e:
+                # Including timeouts: the server may have processed the request it did not answer
+                self.close()
+                error = str(e) or type(e).__name__
+                attempts += 1
+                continue
+
+            if 200 <= status < 300:
+                now = time.perf_counter()
+                self.request_seconds.observe(now - started)
+                for created, _ in batch:
+                    self.send_seconds.observe(now - created)
+                self.sent.inc(len(batch))
+                return
+
+            error = f"HTTP {status}"
+            if status not in RETRY_STATUSES:
+                break
+            attempts += 1
+
+        self.failed.inc(len(batch))
+        print(f"Failed to send {len(batch)} events to {self.url}: {error}")
+
+    def post(self, body: bytes) -> int:
+        """POST ``body`` on the persistent connection and return the status code
+
+        Raises ``StaleConnection`` when a reused connection turns out to have
+        been closed by the server: writing the request fails, or the server
+        hangs up without sending a single byte of the response.
+        """
+        reused = self.connection is not None
+        if self.connection is None:
+            connection_class = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            self.connection = connection_class(self.host, self.port, timeout=self.timeout)
+            self.connections.inc()
+
+        try:
+            self.connection.request("POST", self.path, body, {"Content-Type": "application/json"})
+        except (BrokenPipeError, ConnectionResetError, ConnectionAbortedError) as e:
+            if reused:
+                raise StaleConnection(f"Connection closed by the server: {e}") from e
+            raise
+        try:
+            response = self.connection.getresponse()
+        except http.client.RemoteDisconnected as e:
+            if reused:
+                raise StaleConnection(f"Connection closed by the server: {e}") from e
+            raise
+        # The response has to be read completely before the connection can be reused
+        response.read()
+        if response.will_close:
+            self.close()
+        return response.status
+
+    def close(self) -> None:
+        """Close the connection, the next request opens a new one"""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,206 @@
+"""
+Microphone enumeration and hot-plug detection.
+
+PortAudio reads the device list once when it is initialized, so a microphone
+plugged in later only shows up after re-initializing it, which would break any
+open input stream. ``DeviceMonitor`` enumerates microphones on a background
+thread, re-initializes PortAudio only while nothing is capturing, and reports
+the list only when it changed. On Linux, ``/proc/asound/cards`` tells it
+when a sound card came or went. Elsewhere there is nothing cheap to poll, so
+it rescans only when asked to: on Windows when the device change broadcast
+arrives (see ``is_device_change_message``), when the user opens the
+microphone list, and everywhere when the user presses Refresh. sounddevice is
+imported on the monitor thread, and nothing here imports Qt.
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+# Device names containing any of these are virtual devices, not microphones
+VIRTUAL_KEYWORDS = (
+    "virtual",
+    "loopback",
+    "cable",
+    "mix",
+    "mixer",
+    "voicemeeter",
+    "obs",
+    "stream",
+    "capture",
+    "monitor",
+    "what u hear",
+    "stereo mix",
+    "wave",
+    "software",
+    "digital",
+    "system",
+    "aggregate",
+    "multi-output",
+)
+VIRTUAL_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in VIRTUAL_KEYWORDS))
+
+# Sound cards known to ALSA, rewritten by the kernel when one is plugged in or removed
+ALSA_CARDS = Path("/proc/asound/cards")
+
+# Held while input streams are opened and while PortAudio is re-initialized
+portaudio_lock = threading.Lock()
+
+# Broadcast to every top-level window on Windows when a device is added or removed
+WM_DEVICECHANGE = 0x0219
+DBT_DEVNODES_CHANGED = 0x0007
+
+
+def card_signature() -> Optional[str]:
+    """Cheap summary of the sound cards present, None where the platform has none"""
+    try:
+        return ALSA_CARDS.read_text()
+    except OSError:
+        return None
+
+
+def is_device_change_message(event_type: bytes, message: int) -> bool:
+    """Whether a native window message (as given to Qt's ``nativeEvent``) says devices came or went"""
+    if event_type != b"windows_generic_MSG":
+        return False
+    from ctypes import wintypes
+
+    msg = wintypes.MSG.from_address(message)
+    return msg.message == WM_DEVICECHANGE and msg.wParam == DBT_DEVNODES_CHANGED
+
+
+def list_microphones(devices, host_apis) -> list[str]:
+    """``"Name (index)"`` labels of the physical input devices
+
+    ``host_apis`` is the full host API table, queried once instead of per device.
+    """
+    microphones = []
+    device_names = set()
+    for index, device in enumerate(devices):
+        if device["max_input_channels"] <= 0:
+            continue
+        device_name = device["name"].lower()
+        if device_name in device_names:
+            continue
+        device_names.add(device_name)
+
+        if VIRTUAL_PATTERN.search(device_name):
+            continue
+        # WASAPI lists every output again as a loopback input
+        host_api = device.get("hostapi", -1)
+        if 0 <= host_api < len(host_apis) and "wasapi" in host_apis[host_api]["name"].lower():
+            if "loopback" in device_name:
+                continue
+        microphones.append(f"{device['name']} ({index})")
+    return microphones
+
+
+class DeviceMonitor(threading.Thread):
+    """Keeps the list of microphones current and reports changes
+
+    ``on_change`` is called on the monitor thread with the new list, once at
+    startup and then only when the list differs from the last one. ``busy``
+    says whether input streams may be open; PortAudio is not re-initialized
+    then, and a card change is picked up once capture has stopped. Without
+    ``/proc/asound/cards`` the interval only retries what is outstanding, the
+    devices are re-read on ``refresh()``.
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[list[str]], None],
+        busy: Optional[Callable[[], bool]] = None,
+        interval: float = 2.0,
+    ) -> None:
+        super().__init__(name="aleva-devices", daemon=True)
+        self.on_change = on_change
+        self.busy = busy or (lambda: False)
+        self.interval = interval
+        self.microphones: Optional[list[str]] = None
+        self.scans = 0
+
+        self._host_apis: Optional[tuple] = None
+        self._signature: Optional[str] = None
+        self._rescan_requested = False
+        # PortAudio was terminated and could not be initialized again yet
+        self._portaudio_down = False
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+    def refresh(self) -> None:
+        """Re-read the devices from the system now, e.g. for a Refresh button or a device change message"""
+        self._rescan_requested = True
+        self._wake.set()
+
+    @property
+    def watches_cards(self) -> bool:
+        """Whether sound cards coming and going are noticed without ``refresh()``"""
+        return self._signature is not None
+
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        """Stop the monitor thread"""
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join(timeout=timeout)
+
+    def run(self) -> None:
+        """Enumerate now, then watch for changes until stopped"""
+        self._signature = card_signature()
+        # PortAudio was just initialized by the import, its list is current
+        self.scan(rescan=False)
+        while not self._stop_event.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop_event.is_set():
+                break
+
+            rescan = self._rescan_requested or self._portaudio_down
+            signature = card_signature()
+            # Without a signature there is no telling, and re-initializing on a timer would be
+            # wasted work almost every time; refresh() is the signal then
+            if signature is not None and signature != self._signature:
+                rescan = True
+            if rescan and self.scan(rescan=True):
+                self._rescan_requested = False
+                self._signature = signature
+
+    def scan(self, rescan: bool = True) -> bool:
+        """Enumerate microphones; False if PortAudio could not be re-initialized because of capture"""
+        try:
+            import sounddevice as sd
+
+            with portaudio_lock:
+                if rescan:
+                    if self.busy():
+                        return False
+                    self._host_apis = None
+                    self.reinitialize(sd)
+                if self._host_apis is None:
+                    self._host_apis = tuple(sd.query_hostapis())
+                microphones = list_microphones(sd.query_devices(), self._host_apis)
+        except Exception as e:
+            print(f"Error querying audio devices: {e}")
+            microphones = []
+
+        self.scans += 1
+        if microphones != self.microphones:
+            self.microphones = microphones
+            self.on_change(list(microphones))
+        return True
+
+    def reinitialize(self, sd) -> None:
+        """Terminate and initialize PortAudio so that it reads the device list again
+
+        sounddevice has no public way to do this. If initializing fails,
+        PortAudio is left terminated; it is not terminated a second time, and
+        every interval tries to initialize it again until that works.
+        """
+        # Private sounddevice functions, present from 0.4.6 through 0.5.x; pyproject.toml
+        # pins sounddevice below 0.6 so that an upgrade is checked before it can remove them
+        if not self._portaudio_down:
+            sd._terminate()
+            self._portaudio_down = True
+        sd._initialize()
+        self._portaudio_down = False
@@ -0,0 +1,350 @@
+"""
+Resumable, verified model downloads.
+
+Data is written to ``<target>.part`` next to the final file. When the server
+supports byte ranges, progress is recorded in ``<target>.part.json`` so an
+interrupted download continues where it stopped, optionally over several
+parallel range requests. The file is hashed while it downloads and checked
+against a pinned SHA-256 before it is renamed into place; a file without a
+pinned digest is not downloaded unless that is explicitly allowed. Qt-free;
+``DownloadThread`` in the GUI is a thin wrapper around ``Downloader``.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Callable, Optional
+
+# Pinned SHA-256 digests of model archives, by file name. Only digests that were
+# checked against a known-good download belong here; a models/manifest.json
+# file with the same layout can add or override entries locally. Archives
+# without a digest are refused unless unverified downloads are allowed.
+PINNED_SHA256: dict[str, str] = {}
+
+MANIFEST_FILE = "manifest.json"
+
+# Bytes per read from the socket, small enough to react to cancel() quickly
+CHUNK_SIZE = 64 * 1024
+
+# Parallel segments smaller than this are not worth an extra connection
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# Bytes per read when hashing a file on disk
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Seconds between writes of the resume state
+STATE_INTERVAL = 1.0
+
+
+class DownloadError(Exception):
+    """Download failed and cannot continue"""
+
+
+class DownloadCancelled(DownloadError):
+    """Download was stopped on request; the ``.part`` file is kept for resuming"""
+
+
+class MissingDigest(DownloadError):
+    """No SHA-256 is pinned for the file and unverified downloads are not allowed"""
+
+
+def load_manifest(models_dir: Path) -> dict[str, str]:
+    """Pinned digests merged with the local ``manifest.json``, if any"""
+    manifest = dict(PINNED_SHA256)
+    try:
+        with open(models_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            manifest.update({name: digest.lower() for name, digest in json.load(f).items()})
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error reading model manifest: {e}")
+    return manifest
+
+
+def plan_segments(size: int, count: int) -> list[list[int]]:
+    """Split ``size`` bytes into ``count`` ``[start, end, done]`` ranges (``end`` inclusive)"""
+    count = max(1, min(count, size // MIN_SEGMENT_SIZE or 1))
+    step = size // count
+    segments = []
+    for index in range(count):
+        start = index * step
+        end = size - 1 if index == count - 1 else start + step - 1
+        segments.append([start, end, 0])
+    return segments
+
+
+def downloaded_prefix(segments: list[list[int]]) -> int:
+    """Offset up to which every byte of the file has been downloaded"""
+    for start, end, done in segments:
+        if start + done <= end:
+            return start + done
+    return segments[-1][1] + 1 if segments else 0
+
+
+class Downloader:
+    """Fetch ``url`` into ``target`` with resume, parallel ranges and verification
+
+    ``progress(done, total)`` is called from the download threads; ``total`` is
+    0 when the server does not report a size. Call ``cancel()`` from any thread
+    to stop at the next chunk boundary. Without ``expected_sha256`` the
+    download fails with ``MissingDigest`` unless ``allow_unverified`` is set.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        target: Path,
+        expected_sha256: Optional[str] = None,
+        segments: int = 1,
+        progress: Optional[Callable[[int, int], None]] = None,
+        timeout: float = 30.0,
+        allow_unverified: bool = False,
+    ) -> None:
+        self.url = url
+        self.target = Path(target)
+        self.part_path = self.target.with_name(self.target.name + ".part")
+        self.state_path = self.target.with_name(self.target.name + ".part.json")
+        self.expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+        self.segments = max(1, segments)
+        self.progress = progress
+        self.timeout = timeout
+        self.allow_unverified = allow_unverified
+
+        self.total = 0
+        self.done = 0
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self.errors: list[Exception] = []
+        self._state: Optional[dict] = None
+        self._state_written = 0.0
+
+    def cancel(self) -> None:
+        """Ask the download to stop; safe to call from any thread"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """True once ``cancel()`` was called"""
+        return self._cancel_event.is_set()
+
+    @property
+    def stopping(self) -> bool:
+        """True when the download threads should stop at the next chunk"""
+        return self._cancel_event.is_set() or bool(self.errors)
+
+    def run(self) -> Path:
+        """Download, verify and move into place, returning the target path"""
+        if not self.expected_sha256 and not self.allow_unverified:
+            raise MissingDigest(
+                f"No SHA-256 is pinned for {self.target.name}. Add it to {MANIFEST_FILE} in the models "
+                "directory, or set models.allow_unverified_downloads in config.json to download it unverified."
+            )
+        self.target.parent.mkdir(parents=True, exist_ok=True)
+        size, ranges = self.probe()
+
+        if size and ranges:
+            digest = self.download_ranges(size)
+        else:
+            digest = self.download_stream()
+
+        if self.cancelled:
+            raise DownloadCancelled("Download cancelled")
+
+        if self.expected_sha256 and digest != self.expected_sha256:
+            # A corrupt file must not be resumed either
+            self.discard()
+            raise DownloadError(f"SHA-256 mismatch: expected {self.expected_sha256}, got {digest}")
+
+        os.replace(self.part_path, self.target)
+        self.state_path.unlink(missing_ok=True)
+        return self.target
+
+    def discard(self) -> None:
+        """Remove partial data and resume state"""
+        self.part_path.unlink(missing_ok=True)
+        self.state_path.unlink(missing_ok=True)
+
+    def open(self, start: Optional[int] = None, end: Optional[int] = None):
+        """Open the URL, optionally for a byte range"""
+        request = urllib.request.Request(self.url)
+        if start is not None:
+            request.add_header("Range", f"bytes={start}-{'' if end is None else end}")
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def probe(self) -> tuple[int, bool]:
+        """Return the file size and whether the server honours byte ranges"""
+        try:
+            with self.open(0, 0) as response:
+                if response.status == 206:
+                    # Content-Range: bytes 0-0/12345
+                    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    return (int(total), True) if total.isdigit() else (0, False)
+                return int(response.headers.get("Content-Length") or 0), False
+        except urllib.error.HTTPError as e:
+            if e.code == 416:
+                # Empty file, nothing to resume
+                return 0, False
+            raise
+
+    def add_progress(self, count: int) -> None:
+        """Count downloaded bytes and report progress"""
+        with self._lock:
+            self.done += count
+            done = self.done
+        if self.progress is not None:
+            self.progress(done, self.total)
+
+    def load_state(self, size: int) -> list[list[int]]:
+        """Segments from an earlier attempt at the same file, or a fresh plan"""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("url") == self.url and state.get("size") == size and self.part_path.exists():
+                return state["segments"]
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Ignoring unreadable download state: {e}")
+
+        # An old .part file without state cannot be trusted, start over
+        with open(self.part_path, "wb") as f:
+            f.truncate(size)
+        return plan_segments(size, self.segments)
+
+    def save_state(self, force: bool = False) -> None:
+        """Record segment progress, at most once per STATE_INTERVAL unless forced"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._state_written < STATE_INTERVAL:
+                return
+            self._state_written = now
+            temp_path = self.state_path.with_name(self.state_path.name + ".tmp")
+            temp_path.write_text(json.dumps(self._state), encoding="utf-8")
+            os.replace(temp_path, self.state_path)
+
+    def download_ranges(self, size: int) -> Optional[str]:
+        """Fetch the missing parts of every segment, in parallel when there are several
+
+        Returns the SHA-256 when one is expected. With a single segment it is
+        computed from the chunks as they arrive; with several, this thread
+        follows the downloaded prefix of the file while the segments are
+        fetched, see ``hash_in_order``. Bytes kept from an earlier attempt are
+        read back from the part file either way.
+        """
+        segments = self.load_state(size)
+        self._state = {"url": self.url, "size": size, "segments": segments}
+        self.total = size
+        self.add_progress(sum(segment[2] for segment in segments))
+        self.save_state(force=True)
+
+        hasher = hashlib.sha256() if self.expected_sha256 else None
+        # Chunks are hashed as they arrive only when they arrive in file order
+        chunk_hasher = hasher if len(segments) == 1 else None
+        if chunk_hasher is not None:
+            self.hash_file(self.part_path, chunk_hasher, limit=segments[0][2])
+
+        threads = [
+            threading.Thread(target=self.fetch_segment, args=(segment, chunk_hasher), daemon=True)
+            for segment in segments
+            if segment[0] + segment[2] <= segment[1]
+        ]
+        if len(segments) == 1:
+            for thread in threads:
+                thread.run()
+        else:
+            for thread in threads:
+                thread.start()
+            if hasher is not None:
+                self.hash_in_order(segments, hasher, threads)
+            for thread in threads:
+                thread.join()
+
+        self.save_state(force=True)
+        if self.errors:
+            raise DownloadError(str(self.errors[0]))
+        return hasher.hexdigest() if hasher is not None else None
+
+    def hash_in_order(self, segments: list[list[int]], hasher, threads: list[threading.Thread]) -> None:
+        """Hash the part file from the start while ``threads`` download its segments
+
+        Reads up to the end of the downloaded prefix whenever it moves, so the
+        bytes come back from the page cache shortly after they were written,
+        and once the last segment is complete only its tail is left to hash.
+        """
+        hashed = 0
+        with open(self.part_path, "rb") as f:
+            while True:
+                # Checked before reading, so the last pass sees the final prefix
+                running = any(thread.is_alive() for thread in threads)
+                prefix = downloaded_prefix(segments)
+                while hashed < prefix:
+                    chunk = f.read(min(HASH_BLOCK_SIZE, prefix - hashed))
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    hashed += len(chunk)
+                if not running or self.stopping:
+                    return
+                self._cancel_event.wait(0.05)
+
+    def fetch_segment(self, segment: list[int], hasher) -> None:
+        """Download one ``[start, end, done]`` range into the part file"""
+        start, end, _ = segment
+        try:
+            with self.open(start + segment[2], end) as response, open(self.part_path, "r+b") as f:
+                if response.status != 206:
+                    raise DownloadError("Server ignored the byte range request")
+                f.seek(start + segment[2])
+                while not self.stopping and start + segment[2] <= end:
+                    chunk = response.read(min(CHUNK_SIZE, end + 1 - start - segment[2]))
+                    if not chunk:
+                        raise DownloadError("Connection closed before the segment was complete")
+                    f.write(chunk)
+                    # Readers of the part file (hash_in_order, the next attempt) trust segment progress
+                    f.flush()
+                    if hasher is not None:
+                        hasher.update(chunk)
+                    segment[2] += len(chunk)
+                    self.add_progress(len(chunk))
+                    self.save_state()
+        except Exception as e:
+            # Stops the other segments too, their progress is kept for resuming
+            self.errors.append(e)
+
+    def download_stream(self) -> Optional[str]:
+        """Plain download for servers without range support, restarts from zero"""
+        self.discard()
+        hasher = hashlib.sha256() if self.expected_sha256 else None
+        with self.open() as response, open(self.part_path, "wb") as f:
+            self.total = int(response.headers.get("Content-Length") or 0)
+            while not self.cancelled:
+                chunk = response.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+                self.add_progress(len(chunk))
+
+        if not self.cancelled and self.total and self.done != self.total:
+            raise DownloadError(f"Incomplete download: {self.done} of {self.total} bytes")
+        return hasher.hexdigest() if hasher is not None else None
+
+    def hash_file(self, path: Path, hasher=None, limit: Optional[int] = None) -> str:
+        """SHA-256 of the first ``limit`` bytes of ``path`` (the whole file by default)"""
+        hasher = hasher or hashlib.sha256()
+        remaining = limit
+        with open(path, "rb") as f:
+            while remaining is None or remaining > 0:
+                chunk = f.read(HASH_BLOCK_SIZE if remaining is None else min(HASH_BLOCK_SIZE, remaining))
+                if not chunk:
+                    break
+                hasher.update(chunk)
+                if remaining is not None:
+                    remaining -= len(chunk)
+        return hasher.hexdigest()
@@ -0,0 +1,945 @@
+"""
+Qt-free wake word and speech recognition engine.
+
+Used by the tray application and by ``python -m aleva --headless``. Results are
+reported through a plain ``on_event(name, payload)`` callback so any front end
+can consume them. numpy, sounddevice, vosk and openwakeword are imported only
+when models are loaded or listening starts.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Optional
+
+from .config import CAPTURE_DTYPES, WAKE_WORD_FRAME_SIZE
+from .decoder import DecoderProcess, RemoteRecognizer, load_decoder
+from .devices import portaudio_lock
+from .install import is_vosk_model
+from .metrics import MetricsDumper, MetricsRegistry
+from .streams import DeviceStream, StreamDeduplicator, StreamMetrics, device_label
+from .wakeword import WakeWordDetector
+
+if TYPE_CHECKING:
+    import numpy as np
+    from openwakeword.model import Model as WakeWordModel
+    from vosk import KaldiRecognizer
+    from vosk import Model as VoskModel
+
+    from .audio import FrameConsumer, FrameScheduler, RingReader
+    from .delivery import EventDelivery
+    from .spool import UtteranceSpool
+
+WAKE_WORD_FILE = "alexa_v0.1.onnx"
+VOSK_MODEL_URL = "https://alphacephei.com/vosk/models/vosk-model-en-us-0.22.zip"
+VOSK_MODEL_NAME = "vosk-model-en-us-0.22"
+
+# Default wake word score threshold, see WakeWordDetector for the other settings
+WAKE_WORD_THRESHOLD = 0.5
+
+# Upper bounds in seconds for model swaps, which wait for the current utterance to end
+SWAP_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def vosk_waveform(samples: np.ndarray):
+    """Zero-copy byte view of int16 samples for KaldiRecognizer.AcceptWaveform
+
+    Vosk's cffi binding only accepts bytes or cffi buffers for its ``const char *``
+    argument, so the array is wrapped once with ``from_buffer`` instead of calling
+    ``tobytes()`` on every frame.
+    """
+    from vosk import _ffi as vosk_ffi
+
+    return vosk_ffi.from_buffer(memoryview(samples).cast("B"))
+
+
+def download_wake_word_models(models_dir: Path) -> None:
+    """Download the OpenWakeWord feature and wake word models"""
+    try:
+        import openwakeword.utils
+
+        # TODO: use Aleva model
+        openwakeword.utils.download_models(target_directory=str(models_dir))
+    except Exception as e:
+        print(f"Failed to download wake word models: {e}")
+
+
+def load_wake_word_model(model_file: Path, onnx_config: Optional[dict] = None) -> Optional[WakeWordModel]:
+    """Create the OpenWakeWord model, returning None if it cannot be loaded
+
+    ``onnx_config`` is the ``onnx`` section of the configuration; optimized
+    models are cached next to ``model_file``.
+    """
+    try:
+        from openwakeword.model import Model as WakeWordModel
+
+        from .inference import ONNX_CACHE_DIR, tuned_sessions
+
+        onnx_config = onnx_config or {}
+        cache_dir = model_file.parent / ONNX_CACHE_DIR if onnx_config.get("cache_optimized_models", True) else None
+
+        print(f"Using wake word model: {model_file}")
+        with tuned_sessions(onnx_config, cache_dir):
+            oww_model = WakeWordModel(
+                # TODO: use Aleva model
+                # wakeword_models=["aleva"],
+                wakeword_models=[str(model_file)],
+                # inference_framework="tflite",
+                inference_framework="onnx",
+                vad_threshold=0.2,
+            )
+        print("Wake word model initialized successfully")
+
+        # Note: For a custom "aleva" wake word, you would need to train a custom model
+        # For now, we'll use the general model and implement simple text matching
+        print("Using general wake word detection model")
+        return oww_model
+
+    except Exception as e:
+        print(f"Failed to initialize wake word model: {e}")
+        return None
+
+
+def wake_word_history_frames(oww_model) -> int:
+    """Frames of audio behind one wake word score
+
+    The classifier looks at the last ``model_inputs`` embeddings, and each
+    embedding is computed from about 0.76 s (76 mel frames) of audio.
+    """
+    return max(getattr(oww_model, "model_inputs", {}).values(), default=16) + 10
+
+
+def load_vosk_model(model_dir: Path) -> Optional[VoskModel]:
+    """Load a Vosk model directory, returning None if it cannot be loaded"""
+    try:
+        from vosk import Model as VoskModel
+
+        return VoskModel(str(model_dir))
+    except Exception as e:
+        print(f"Error initializing Vosk model: {e}")
+        return None
+
+
+def parse_device_id(microphone_text: Optional[str]) -> Optional[int]:
+    """Extract the device index from a "Name (index)" microphone label"""
+    if microphone_text and "(" in microphone_text and ")" in microphone_text:
+        try:
+            return int(microphone_text.split("(")[-1].split(")")[0])
+        except (ValueError, IndexError):
+            return None
+    return None
+
+
+class StartupTimer:
+    """Collects how long each startup phase took"""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as the named phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - started
+
+    def report(self) -> str:
+        """Human readable summary of all recorded phases"""
+        return ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.phases.items())
+
+
+class AudioEngine:
+    """Wake word detection and speech recognition over a live capture stream
+
+    Events passed to ``on_event``:
+
+    - ``wake_word``: ``wake_word``, ``score``, ``device_id``
+    - ``partial``: ``text`` (hypothesis of the utterance so far, rate-limited
+      and only sent when it changed; ``""`` when it was dropped)
+    - ``transcript``: ``text``, ``device_id``
+    - ``model_switched``: ``model``, ``seconds`` (from the switch request until
+      the new recognizer took over)
+    - ``error``: ``message`` (listening has stopped)
+
+    The callback runs on the engine's worker threads. Wake word and transcript
+    events are also sent to the API URL set with ``configure_api``. When
+    listening on several microphones, an utterance that more than one of them
+    heard is reported once.
+    """
+
+    def __init__(self, on_event: Optional[Callable[[str, dict], None]] = None) -> None:
+        self.on_event = on_event
+
+        # Models
+        self.oww_model: Optional[WakeWordModel] = None
+        self.vosk_model: Optional[VoskModel | DecoderProcess] = None
+        self.vosk_recognizer: Optional[KaldiRecognizer | RemoteRecognizer] = None
+        self.vosk_model_name: Optional[str] = None
+
+        # Guards the streams against model switches, see set_vosk_model()
+        self._swap_lock = threading.Lock()
+        self._announced_swap: Optional[float] = None
+
+        # Audio settings
+        self.sample_rate = 16000
+        self.chunk_size = 1280
+        self.wake_word_frame_size = WAKE_WORD_FRAME_SIZE
+        self.vosk_frame_size = 4000
+        self.ring_buffer_seconds = 2.0
+        self.capture_dtype = "float32"
+        self.gated_recognition = False
+        self.pre_roll_ms = 500
+        self.utterance_timeout = 10.0
+        self.partial_results = True
+        self.partial_interval = 0.1
+        self.decoder_process = False
+        self.wake_word_detector = WakeWordDetector(WAKE_WORD_THRESHOLD)
+        self.audio_config: dict = {}
+        self.inference_workers = 0
+
+        # Pipeline state
+        self.is_listening = False
+        self.audio_thread: Optional[threading.Thread] = None
+        self.streams: list[DeviceStream] = []
+        self.consumers: list[FrameConsumer] = []
+        self.scheduler: Optional[FrameScheduler] = None
+        self.deduplicator = StreamDeduplicator()
+
+        # Counters and latency histograms, see register_metrics(); per microphone, kept across restarts
+        self.metrics = MetricsRegistry()
+        self.stream_metrics: dict[str, StreamMetrics] = {}
+        self.metrics_dumper: Optional[MetricsDumper] = None
+        self.register_metrics()
+
+        # Sends events to the configured API, see configure_api()
+        self.delivery: Optional[EventDelivery] = None
+
+        # Keeps the audio of recognized utterances, see configure_recording()
+        self.spool: Optional[UtteranceSpool] = None
+
+    def register_metrics(self) -> None:
+        """Create the pipeline metrics
+
+        Histograms are updated by the threads that do the work, one series per
+        microphone (see ``StreamMetrics``), so each has a single writer. Counters
+        and gauges read the live capture stats and consumers, summed over all
+        microphones, so they keep working across listening restarts.
+        """
+        metrics = self.metrics
+        metrics.counter(
+            "aleva_duplicates_suppressed_total",
+            "Wake words and transcripts dropped because another microphone already reported them",
+            func=lambda: self.deduplicator.suppressed,
+        )
+        metrics.gauge("aleva_streams", "Microphones being listened to", func=lambda: len(self.streams))
+        # Switches while not listening; each microphone reports its own while listening
+        self.swap_seconds = metrics.histogram(
+            "aleva_model_swap_seconds", "Time from a model switch until the new recognizer runs", buckets=SWAP_BUCKETS
+        )
+
+        def decoder_value(name: str):
+            return lambda: sum(getattr(stream.recognizer, name, 0) for stream in self.streams)
+
+        metrics.counter(
+            "aleva_decoder_restarts_total",
+            "Times the Vosk decoder process of the current model was restarted after a crash",
+            func=lambda: getattr(self.vosk_model, "restarts", 0),
+        )
+        metrics.counter(
+            "aleva_decoder_dropped_frames_total",
+            "Frames not decoded because the decoder process was a whole ring behind or restarting",
+            func=decoder_value("dropped_frames"),
+        )
+        metrics.counter(
+            "aleva_decoder_late_replies_total",
+            "Frames the decoder process answered after the speech thread stopped waiting",
+            func=decoder_value("late_replies"),
+        )
+
+        def gate_value(read: Callable):
+            return lambda: sum(read(stream.activity_gate) for stream in self.streams if stream.activity_gate)
+
+        def skipped_ratio():
+            skipped = gate_value(lambda gate: gate.skipped)()
+            total = skipped + gate_value(lambda gate: gate.scored)()
+            return skipped / total if total else 0.0
+
+        def noise_floor():
+            floors = [stream.activity_gate.noise_floor for stream in self.streams if stream.activity_gate is not None]
+            floors = [floor for floor in floors if floor is not None]
+            return sum(floors) / len(floors) if floors else 0.0
+
+        metrics.counter(
+            "aleva_wake_word_frames_skipped_total",
+            "Wake word frames not scored because there was only background noise",
+            func=gate_value(lambda gate: gate.skipped),
+        )
+        metrics.counter(
+            "aleva_wake_word_frames_replayed_total",
+            "Skipped frames fed to the wake word model when speech started",
+            func=gate_value(lambda gate: gate.replayed),
+        )
+        metrics.gauge(
+            "aleva_wake_word_skipped_ratio",
+            "Share of wake word frames not scored since listening started",
+            func=skipped_ratio,
+        )
+        metrics.gauge(
+            "aleva_wake_word_noise_floor_dbfs",
+            "Noise floor the wake word gate compares frame levels against, averaged over microphones",
+            func=noise_floor,
+        )
+
+        def capture_value(read: Callable):
+            return lambda: sum(read(stream.capture_stats) for stream in self.streams if stream.capture_stats)
+
+        def consumer_value(name: str, read: Callable):
+            return lambda: sum(read(consumer) for consumer in self.consumers if consumer.reader.name == name)
+
+        capture_counters = {
+            "aleva_capture_blocks_total": ("Blocks delivered by the capture callback", "blocks"),
+            "aleva_input_overflows_total": ("Input overflows reported by PortAudio", "input_overflows"),
+            "aleva_input_underflows_total": ("Input underflows reported by PortAudio", "input_underflows"),
+            "aleva_status_errors_total": ("Callbacks with any PortAudio status flag", "status_errors"),
+        }
+        for name, (description, attribute) in capture_counters.items():
+            read = capture_value(lambda stats, attribute=attribute: getattr(stats, attribute))
+            metrics.counter(name, description, func=read)
+
+        cpu_percent = "CPU usage of an audio thread"
+        cpu_seconds = "CPU time of an audio thread"
+        labels = {"thread": "capture"}
+        metrics.gauge("aleva_thread_cpu_percent", cpu_percent, labels, capture_value(lambda stats: stats.cpu.percent))
+        metrics.counter(
+            "aleva_thread_cpu_seconds_total", cpu_seconds, labels, capture_value(lambda stats: stats.cpu.cpu_seconds)
+        )
+
+        for consumer in ("wake-word", "speech"):
+            labels = {"consumer": consumer}
+            metrics.gauge(
+                "aleva_queue_depth_samples",
+                "Samples waiting in the consumer's ring reader",
+                labels,
+                consumer_value(consumer, lambda c: c.reader.depth),
+            )
+            metrics.counter(
+                "aleva_reader_overruns_total",
+                "Times the consumer fell a full ring behind",
+                labels,
+                consumer_value(consumer, lambda c: c.reader.overruns),
+            )
+            metrics.counter(
+                "aleva_frames_processed_total",
+                "Frames handled by the consumer",
+                labels,
+                consumer_value(consumer, lambda c: c.frames_processed),
+            )
+
+            labels = {"thread": consumer}
+            metrics.gauge(
+                "aleva_thread_cpu_percent",
+                cpu_percent,
+                labels,
+                consumer_value(consumer, lambda c: c.cpu.percent),
+            )
+            metrics.counter(
+                "aleva_thread_cpu_seconds_total",
+                cpu_seconds,
+                labels,
+                consumer_value(consumer, lambda c: c.cpu.cpu_seconds),
+            )
+
+    def configure(self, audio_config: dict) -> None:
+        """Apply the ``audio`` section of the configuration"""
+        self.sample_rate = audio_config.get("sample_rate", 16000)
+        self.chunk_size = audio_config.get("chunk_size", 1280)
+        self.wake_word_frame_size = audio_config.get("wake_word_frame_size", WAKE_WORD_FRAME_SIZE)
+        self.vosk_frame_size = audio_config.get("vosk_frame_size", 4000)
+        self.ring_buffer_seconds = audio_config.get("ring_buffer_seconds", 2.0)
+        capture_dtype = audio_config.get("capture_dtype", "float32")
+        self.capture_dtype = capture_dtype if capture_dtype in CAPTURE_DTYPES else "float32"
+        self.gated_recognition = audio_config.get("gated_recognition", False)
+        self.pre_roll_ms = audio_config.get("pre_roll_ms", 500)
+        self.utterance_timeout = audio_config.get("utterance_timeout", 10.0)
+        self.partial_results = audio_config.get("partial_results", True)
+        self.partial_interval = audio_config.get("partial_interval_ms", 100) / 1000
+        # Only models loaded after this is set decode in a worker process
+        self.decoder_process = audio_config.get("decoder_process", False)
+        self.wake_word_detector = WakeWordDetector.from_config(
+            audio_config, self.wake_word_frame_size / self.sample_rate
+        )
+        # The wake word gate needs the model's history length, it is built when listening starts
+        self.audio_config = audio_config
+        self.inference_workers = audio_config.get("inference_workers", 0)
+        self.deduplicator.window = audio_config.get("duplicate_window", 2.0)
+
+    def configure_diagnostics(self, diagnostics_config: dict) -> None:
+        """Start, restart or stop the periodic metrics dump from the ``diagnostics`` section"""
+        self.stop_metrics_dump()
+
+        metrics_file = diagnostics_config.get("metrics_file")
+        if metrics_file:
+            interval = diagnostics_config.get("metrics_interval", 10.0)
+            self.metrics_dumper = MetricsDumper(self.metrics, Path(metrics_file).expanduser(), interval)
+            self.metrics_dumper.start()
+            print(f"Writing metrics to {self.metrics_dumper.path} every {self.metrics_dumper.interval} s")
+
+    def stop_metrics_dump(self) -> None:
+        """Stop the metrics dump thread after writing a final dump"""
+        if self.metrics_dumper is not None:
+            self.metrics_dumper.stop()
+            self.metrics_dumper = None
+
+    def configure_api(self, api_config: dict) -> None:
+        """Start, restart or stop sending events to the ``api`` URL"""
+        self.stop_delivery()
+
+        url = api_config.get("url")
+        if not url:
+            return
+
+        from .delivery import EventDelivery
+
+        try:
+            delivery = EventDelivery(
+                url,
+                self.metrics,
+                timeout=api_config.get("timeout", 5.0),
+                max_batch=api_config.get("max_batch", 32),
+                max_queue=api_config.get("max_queue", 1000),
+                max_retries=api_config.get("max_retries", 5),
+            )
+        except ValueError as e:
+            print(f"Not sending events: {e}")
+            return
+        delivery.start()
+        self.delivery = delivery
+        print(f"Sending events to {url}")
+
+    def stop_delivery(self) -> None:
+        """Stop sending events after flushing the ones already queued"""
+        if self.delivery is not None:
+            delivery, self.delivery = self.delivery, None
+            delivery.stop()
+
+    def load_models(
+        self,
+        models_dir: Path,
+        timer: Optional[StartupTimer] = None,
+        vosk_model_dir: Optional[Path] = None,
+        onnx_config: Optional[dict] = None,
+    ) -> None:
+        """Load the wake word and Vosk models synchronously"""
+        timer = timer or StartupTimer()
+
+        model_file = models_dir / WAKE_WORD_FILE
+        if not model_file.exists():
+            with timer.phase("oww_download"):
+                download_wake_word_models(models_dir)
+
+        with timer.phase("oww"):
+            self.oww_model = load_wake_word_model(model_file, onnx_config)
+
+        vosk_model_dir = vosk_model_dir or models_dir / VOSK_MODEL_NAME
+        if is_vosk_model(vosk_model_dir):
+            with timer.phase("vosk"):
+                self.set_vosk_model(self.load_speech_model(vosk_model_dir), vosk_model_dir.name)
+
+    def load_speech_model(self, model_dir: Path) -> Optional[VoskModel | DecoderProcess]:
+        """Load a Vosk model here, or in a decoder process with ``audio.decoder_process``"""
+        if self.decoder_process:
+            return load_decoder(model_dir)
+        return load_vosk_model(model_dir)
+
+    def set_vosk_model(self, vosk_model: Optional[VoskModel | DecoderProcess], name: Optional[str] = None) -> None:
+        """Use a loaded Vosk model and create the recognizers for it
+
+        While listening, a recognizer per microphone is only prepared here.
+        Each stream's speech consumer installs its own between frames once no
+        utterance is in progress, so the input streams keep running and no
+        audio is lost.
+        """
+        requested = time.perf_counter()
+        with self._swap_lock:
+            recognizers = []
+            if vosk_model is not None:
+                try:
+                    recognizers = [self.create_recognizer(vosk_model) for _ in range(max(len(self.streams), 1))]
+                    print("Vosk model and recognizer initialized successfully")
+                except Exception as e:
+                    print(f"Error initializing Vosk recognizer: {e}")
+                    vosk_model = None
+
+            self.vosk_model = vosk_model
+            self.vosk_model_name = name if vosk_model is not None else None
+            if not self.streams:
+                self.install_recognizer(recognizers[0] if recognizers else None, self.vosk_model_name, requested)
+                return
+            for stream in self.streams:
+                recognizer = recognizers[stream.index] if recognizers else None
+                stream.pending_recognizer = (recognizer, self.vosk_model_name, requested)
+
+    def create_recognizer(self, vosk_model: VoskModel | DecoderProcess) -> KaldiRecognizer | RemoteRecognizer:
+        """New recognizer state for a loaded model"""
+        if isinstance(vosk_model, DecoderProcess):
+            return vosk_model.recognizer(self.sample_rate, self.vosk_frame_size * 2, partials=self.partial_results)
+
+        from vosk import KaldiRecognizer
+
+        return KaldiRecognizer(vosk_model, self.sample_rate)
+
+    def install_recognizer(
+        self,
+        recognizer: Optional[KaldiRecognizer | RemoteRecognizer],
+        name: Optional[str],
+        requested: float,
+        stream: Optional[DeviceStream] = None,
+    ) -> None:
+        """Make ``recognizer`` the active one of ``stream`` and report the swap latency
+
+        Without a stream it becomes the recognizer the next listening session
+        starts with, which is also the first stream's.
+        """
+        if stream is None:
+            previous = self.vosk_recognizer
+        else:
+            previous, stream.recognizer = stream.recognizer, recognizer
+        if stream is None or stream.index == 0:
+            self.vosk_recognizer = recognizer
+        if previous is None or recognizer is None:
+            # The first model is a load, not a switch
+            return
+
+        seconds = time.perf_counter() - requested
+        (self.swap_seconds if stream is None else stream.metrics.swap_seconds).observe(seconds)
+        if requested != self._announced_swap:
+            # Once per switch, however many microphones are listening
+            self._announced_swap = requested
+            print(f"Switched to Vosk model {name} in {seconds * 1000:.0f} ms")
+            self.emit("model_switched", model=name, seconds=seconds)
+
+    def install_pending_recognizer(self, stream: DeviceStream, force: bool = False) -> None:
+        """On a speech consumer: swap in the stream's waiting recognizer at an utterance boundary
+
+        Nothing has been decoded yet when the current recognizer has no partial
+        result, so handing the next frame to the new one loses no speech.
+        """
+        recognizer = stream.recognizer
+        if not force and recognizer is not None and json.loads(recognizer.PartialResult()).get("partial"):
+            return
+
+        with self._swap_lock:
+            pending, stream.pending_recognizer = stream.pending_recognizer, None
+        if pending is not None:
+            self.install_recognizer(*pending, stream=stream)
+
+    def configure_recording(self, recording_config: dict, default_directory: Path) -> None:
+        """Start or stop keeping utterance audio from the ``recording`` section
+
+        Takes effect the next time listening starts.
+        """
+        self.stop_recording()
+        if not recording_config.get("enabled"):
+            return
+
+        from .spool import UtteranceSpool
+
+        directory = Path(recording_config.get("directory") or default_directory).expanduser()
+        max_mb = recording_config.get("max_mb", 500)
+        self.spool = UtteranceSpool(
+            directory,
+            int(max_mb * 1024 * 1024),
+            self.sample_rate,
+            recording_config.get("max_utterance_seconds", 30.0),
+            self.metrics,
+        )
+        self.spool.start()
+        print(f"Recording utterances to {directory} (up to {max_mb} MB)")
+
+    def stop_recording(self) -> None:
+        """Stop the spool thread after writing the utterances already queued"""
+        if self.spool is not None:
+            spool, self.spool = self.spool, None
+            spool.stop()
+
+    def emit(self, event: str, **payload) -> None:
+        """Report an event to the front end and queue it for the API"""
+        delivery = self.delivery
+        if delivery is not None:
+            delivery.submit(event, payload)
+
+        if self.on_event is not None:
+            try:
+                self.on_event(event, payload)
+            except Exception as e:
+                print(f"Error handling {event} event: {e}")
+
+    def start(self, device_ids) -> None:
+        """Start audio capture and processing on a background thread
+
+        ``device_ids`` is a device index, None for the default input device,
+        or a list of them to listen on several microphones at once.
+        """
+        if self.is_listening:
+            return
+
+        if not isinstance(device_ids, (list, tuple)):
+            device_ids = [device_ids]
+        # The same device twice would report everything twice
+        device_ids = list(dict.fromkeys(device_ids))
+
+        self.is_listening = True
+        self.audio_thread = threading.Thread(target=self.audio_processing_loop, args=(device_ids,), daemon=True)
+        self.audio_thread.start()
+
+    def stop(self) -> None:
+        """Stop audio capture and processing"""
+        self.is_listening = False
+        if self.audio_thread and self.audio_thread.is_alive():
+            self.audio_thread.join(timeout=1.0)
+
+    @property
+    def is_capturing(self) -> bool:
+        """Whether input streams may be open, from start() until they are closed"""
+        return self.is_listening or (self.audio_thread is not None and self.audio_thread.is_alive())
+
+    def audio_processing_loop(self, device_ids: list) -> None:
+        """Main audio processing loop"""
+        import sounddevice as sd
+
+        try:
+            streams = self.start_streams(device_ids)
+
+            # Start recording, one input stream per microphone
+            raw_capture = self.capture_dtype == "int16"
+            stream_class = sd.RawInputStream if raw_capture else sd.InputStream
+            with ExitStack() as input_streams:
+                # Not while the device monitor re-initializes PortAudio
+                with portaudio_lock:
+                    for stream in streams:
+                        input_streams.enter_context(
+                            stream_class(
+                                device=stream.device_id,
+                                channels=1,
+                                samplerate=self.sample_rate,
+                                blocksize=self.chunk_size,
+                                callback=stream.callback,
+                                dtype=self.capture_dtype,
+                            )
+                        )
+                        print(f"Started listening on device {stream.device_id}")
+                while self.is_listening:
+                    time.sleep(0.1)
+
+        except Exception as e:
+            print(f"Error in audio processing: {e}")
+            self.is_listening = False
+            self.emit("error", message=str(e))
+
+        finally:
+            self.stop_pipeline()
+
+    def start_pipeline(self, device_id: Optional[int] = None):
+        """Build the pipeline for a single device and return its capture callback
+
+        Anything that feeds blocks to the callback (a microphone, a file
+        replay) goes through exactly the same processing.
+        """
+        return self.start_streams([device_id])[0].callback
+
+    def start_streams(self, device_ids: list) -> list[DeviceStream]:
+        """Build a ring buffer and consumers per device and start the workers
+
+        Each stream's ``callback`` is what its input stream hands blocks to.
+        The consumers of all streams share one ``FrameScheduler``.
+        """
+        import numpy as np
+
+        from .audio import (
+            AudioRingBuffer,
+            CaptureStats,
+            FrameConsumer,
+            FrameScheduler,
+            RecognitionGate,
+            make_capture_callback,
+        )
+
+        # The callback only copies into the ring; consumers do the heavy lifting
+        raw_capture = self.capture_dtype == "int16"
+        sample_dtype = np.int16 if raw_capture else np.float32
+        ring_size = int(self.sample_rate * self.ring_buffer_seconds)
+        largest_frame = max(self.chunk_size, self.wake_word_frame_size, self.vosk_frame_size)
+
+        streams = []
+        for index, device_id in enumerate(device_ids):
+            stream = DeviceStream(index, device_id)
+            stream.ring = AudioRingBuffer(max(ring_size, largest_frame * 4), dtype=sample_dtype)
+            stream.metrics = self.stream_metrics.get(stream.label)
+            if stream.metrics is None:
+                stream.metrics = StreamMetrics(self.metrics, stream.label, SWAP_BUCKETS)
+                self.stream_metrics[stream.label] = stream.metrics
+            stream.capture_stats = CaptureStats(callback_seconds=stream.metrics.callback_seconds)
+            stream.callback = make_capture_callback(stream.ring, stream.capture_stats, raw=raw_capture)
+
+            # In gated mode Vosk stays idle until the wake word opens the gate
+            if self.gated_recognition:
+                stream.recognition_gate = RecognitionGate(
+                    pre_roll_samples=int(self.sample_rate * self.pre_roll_ms / 1000),
+                    max_active_samples=int(self.sample_rate * self.utterance_timeout),
+                )
+            stream.detector = self.wake_word_detector
+            if index:
+                stream.detector = WakeWordDetector.from_config(
+                    self.audio_config, self.wake_word_frame_size / self.sample_rate
+                )
+
+            wake_word_frame = np.zeros(self.wake_word_frame_size, dtype=sample_dtype)
+            wake_word_reader = stream.ring.add_reader("wake-word")
+            speech_frame = np.zeros(self.vosk_frame_size, dtype=sample_dtype)
+            speech_reader = stream.ring.add_reader("speech")
+            stream.consumers = [
+                FrameConsumer(
+                    wake_word_reader,
+                    wake_word_frame,
+                    self.make_wake_word_processor(wake_word_frame, stream, wake_word_reader),
+                    name=f"aleva-wake-word-{stream.label}",
+                ),
+                FrameConsumer(
+                    speech_reader,
+                    speech_frame,
+                    self.make_speech_processor(speech_frame, stream, speech_reader),
+                    name=f"aleva-speech-{stream.label}",
+                    gate=stream.recognition_gate,
+                ),
+            ]
+            streams.append(stream)
+
+        consumers = [consumer for stream in streams for consumer in stream.consumers]
+        # From here on, model switches wait for an utterance boundary
+        with self._swap_lock:
+            for stream in streams:
+                stream.recognizer = self.vosk_recognizer
+                if stream.index and self.vosk_model is not None:
+                    # Every microphone decodes with the same model but needs its own recognizer state
+                    stream.recognizer = self.create_recognizer(self.vosk_model)
+            self.streams = streams
+            self.consumers = consumers
+
+        self.scheduler = FrameScheduler(consumers, self.inference_workers)
+        self.scheduler.start()
+        return streams
+
+    def stop_pipeline(self) -> None:
+        """Stop the consumers"""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        with self._swap_lock:
+            streams, self.streams = self.streams, []
+            self.consumers = []
+
+        # A switch requested mid-utterance takes effect for the next session
+        for stream in streams:
+            self.install_pending_recognizer(stream, force=True)
+
+    def capture_time(self, reader: RingReader, frame: np.ndarray) -> float:
+        """When the frame a consumer just read was captured, on the time.monotonic() clock"""
+        return time.monotonic() - (reader.depth + len(frame)) / self.sample_rate
+
+    def make_wake_word_processor(self, frame: np.ndarray, stream: DeviceStream, reader: RingReader):
+        """Build the frame handler for a stream's wake word consumer"""
+        import numpy as np
+
+        from .audio import VoiceActivityGate, float_to_int16
+
+        # int16 capture frames are scored as-is, float frames are converted once
+        convert = frame.dtype != np.int16
+        audio_int16 = np.zeros(len(frame), dtype=np.int16) if convert else frame
+        detector = stream.detector
+        detector.reset()
+        gate = stream.activity_gate = VoiceActivityGate.from_config(
+            self.audio_config, len(frame), self.sample_rate, wake_word_history_frames(self.oww_model)
+        )
+
+        def process(frame: np.ndarray) -> None:
+            # Shares the weights of the engine's model, with this stream's own buffers
+            oww_model = stream.wake_word_model(self.oww_model)
+            if oww_model is None:
+                return
+
+            if convert:
+                float_to_int16(frame, audio_int16)
+
+            # Background noise is not scored, the model catches up once speech starts
+            if gate is not None and not gate.admit(audio_int16, oww_model.predict):
+                detector.skip()
+                return
+
+            # Get prediction scores
+            started = time.perf_counter()
+            prediction = oww_model.predict(audio_int16)
+            stream.metrics.predict_seconds.observe(time.perf_counter() - started)
+
+            # One detection per utterance, see WakeWordDetector
+            detection = detector.process(prediction)
+            if detection is None:
+                return
+
+            wake_word, score = detection
+            if not self.deduplicator.wake_word(stream.device_id, wake_word, self.capture_time(reader, frame)):
+                print(f"Wake word '{wake_word}' on device {stream.label} was already heard by another microphone")
+                return
+            stream.metrics.detections.inc()
+            print("device_id", stream.device_id)
+            print(f"Wake word '{wake_word}' detected with score: {score}")
+            if stream.recognition_gate is not None:
+                stream.recognition_gate.request_open()
+            self.emit("wake_word", wake_word=wake_word, score=score, device_id=stream.device_id)
+
+        return process
+
+    def make_speech_processor(self, frame: np.ndarray, stream: DeviceStream, reader: RingReader):
+        """Build the frame handler for a stream's speech recognition consumer"""
+        import numpy as np
+
+        from .audio import UtteranceBuffer, float_to_int16
+
+        convert = frame.dtype != np.int16
+        audio_int16 = np.zeros(len(frame), dtype=np.int16) if convert else frame
+        # Vosk takes a cffi buffer, a decoder process plain bytes (and Vosk is not needed here then)
+        pcm = memoryview(audio_int16).cast("B")
+        waveform = None
+        gate = stream.recognition_gate
+
+        # With recording on, the audio fed to Vosk since the last endpoint is kept
+        spool = self.spool
+        utterance = UtteranceBuffer(spool.max_samples) if spool is not None else None
+
+        def end_utterance(text: str) -> None:
+            if utterance is None:
+                return
+            if text:
+                # Copied so the buffer can be reused while the spool thread writes
+                spool.submit(utterance.take(), text, utterance.truncated, self.vosk_model_name)
+            utterance.clear()
+
+        # Partial results are polled at most every partial_interval and only reported when changed
+        partials = self.partial_results
+        last_partial = ""
+        partial_text = ""
+        next_partial = 0.0
+
+        def update_partial() -> None:
+            nonlocal last_partial, partial_text, next_partial
+            now = time.perf_counter()
+            if now < next_partial:
+                return
+            next_partial = now + self.partial_interval
+
+            # Vosk formats the JSON the same way each time, comparing the string avoids parsing it
+            raw = stream.recognizer.PartialResult()
+            if raw == last_partial:
+                return
+            last_partial = raw
+            text = json.loads(raw).get("partial", "")
+            # Only one microphone at a time shows what it is hearing
+            if text != partial_text and self.deduplicator.partial(stream.device_id, text):
+                partial_text = text
+                self.emit("partial", text=text)
+
+        def end_partial(final_text: str) -> None:
+            nonlocal last_partial, partial_text, next_partial
+            if partial_text and self.deduplicator.partial(stream.device_id, "") and not final_text:
+                # No transcript follows to replace the partial, clear it
+                self.emit("partial", text="")
+            last_partial = partial_text = ""
+            next_partial = 0.0
+
+        def finish(result: str) -> str:
+            text = self.handle_speech_result(result, stream.device_id, self.capture_time(reader, frame))
+            end_utterance(text)
+            end_partial(text)
+            return text
+
+        def process(frame: np.ndarray) -> None:
+            nonlocal waveform
+            if stream.pending_recognizer is not None:
+                self.install_pending_recognizer(stream)
+
+            recognizer = stream.recognizer
+            if recognizer is None:
+                return
+
+            if convert:
+                float_to_int16(frame, audio_int16)
+            if utterance is not None:
+                utterance.append(audio_int16)
+
+            if isinstance(recognizer, RemoteRecognizer):
+                data = pcm
+            else:
+                if waveform is None:
+                    waveform = vosk_waveform(audio_int16)
+                data = waveform
+
+            # Feed audio to Vosk recognizer
+            started = time.perf_counter()
+            accepted = recognizer.AcceptWaveform(data)
+            stream.metrics.accept_seconds.observe(time.perf_counter() - started)
+            if accepted:
+                # End of utterance detected (silence after speech)
+                text = finish(recognizer.Result())
+                # An endpoint without words, e.g. a false wake word, does not keep Vosk running either
+                if gate is not None and (text or gate.past_pre_roll(len(frame))):
+                    gate.close()
+                    return
+            elif partials:
+                update_partial()
+
+            if gate is not None and gate.advance(len(frame)):
+                # No endpoint before the timeout, flush what we have
+                finish(recognizer.FinalResult())
+                gate.close()
+
+        return process
+
+    def handle_speech_result(
+        self, result: str, device_id: Optional[int] = None, captured: Optional[float] = None
+    ) -> str:
+        """Handle a final Vosk result and return the recognized text
+
+        Returns "" for a transcript another microphone already reported.
+        """
+        result_dict = json.loads(result)
+        text = result_dict.get("text", "").strip()
+        if not text:
+            return ""
+
+        if captured is not None and not self.deduplicator.transcript(device_id, text, captured):
+            print(f"Speech on device {device_label(device_id)} was already recognized by another microphone")
+            return ""
+
+        print(f"Recognized speech: {text}")
+        self.emit("transcript", text=text, device_id=device_id)
+        return text
+
+    def get_pipeline_stats(self) -> dict:
+        """Snapshot of capture and consumer counters
+
+        The top level describes the first microphone; with several, ``streams``
+        has every one of them by device.
+        """
+        streams = self.streams
+        if not streams:
+            return {}
+
+        stats = streams[0].stats()
+        if len(streams) > 1:
+            stats["streams"] = {stream.label: stream.stats() for stream in streams}
+        return stats
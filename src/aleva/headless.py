@@ -0,0 +1,102 @@
+"""
+Headless runner for servers and kiosks without a display.
+
+Reads the same ``config.json`` as the tray application, runs the audio engine
+and prints its events to stdout. Does not import PySide6.
+"""
+
+import json
+import signal
+import sys
+import threading
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Optional
+
+from .config import ConfigStore, default_config_dir, migrate_legacy_config_dir
+from .delivery import event_record
+from .engine import AudioEngine, StartupTimer, parse_device_id
+from .registry import ModelRegistry
+
+
+def make_event_printer(output_format: str, stream=None):
+    """Build an engine event callback that prints to ``stream`` (stdout by default)"""
+    stream = stream or sys.stdout
+    lock = threading.Lock()
+
+    def print_event(event: str, payload: dict) -> None:
+        if output_format == "json":
+            line = json.dumps(event_record(event, payload), ensure_ascii=False)
+        else:
+            details = " ".join(f"{key}={value}" for key, value in payload.items())
+            line = f"[{event}] {details}"
+
+        with lock:
+            print(line, file=stream, flush=True)
+
+    return print_event
+
+
+def run_headless(
+    config_file: Optional[Path] = None, devices: Optional[list[int]] = None, output_format: str = "json"
+) -> int:
+    """Run the engine until interrupted, returning the process exit code"""
+    # stdout carries only events, everything the engine logs goes to stderr
+    events = sys.stdout
+    with redirect_stdout(sys.stderr):
+        return _run(config_file, devices, make_event_printer(output_format, events))
+
+
+def _run(config_file: Optional[Path], devices: Optional[list[int]], on_event) -> int:
+    """Load config and models, then listen until stopped"""
+    timer = StartupTimer()
+
+    with timer.phase("config"):
+        config_dir = config_file.parent if config_file else migrate_legacy_config_dir(default_config_dir())
+        config_file = config_file or config_dir / "config.json"
+        config = ConfigStore(config_file).load()
+
+    engine = AudioEngine(on_event=on_event)
+    engine.configure(config.get("audio", {}))
+
+    models_dir = config_dir / "models"
+    vosk_model_path = config.get("models", {}).get("vosk_model_path")
+    registry = ModelRegistry(models_dir)
+    registry.scan([vosk_model_path])
+    vosk_model = registry.select(vosk_model_path, config.get("ui", {}).get("language"))
+    engine.load_models(models_dir, timer, vosk_model.path if vosk_model else None, config.get("onnx", {}))
+    print(f"Startup timing: {timer.report()}")
+
+    if engine.oww_model is None:
+        print("Wake word model not available")
+        return 1
+    if engine.vosk_model is None:
+        print(f"Speech model not available in {models_dir}")
+        return 1
+
+    if not devices:
+        audio_config = config.get("audio", {})
+        devices = [parse_device_id(audio_config.get("selected_microphone"))]
+        for microphone in audio_config.get("additional_microphones", []):
+            device = parse_device_id(microphone)
+            if device is not None:
+                devices.append(device)
+
+    # Stop cleanly on Ctrl+C and on service manager shutdown
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    engine.configure_diagnostics(config.get("diagnostics", {}))
+    engine.configure_api(config.get("api", {}))
+    engine.configure_recording(config.get("recording", {}), config_dir / "utterances")
+    engine.start(devices)
+    while engine.is_listening and not stop_event.wait(0.5):
+        pass
+
+    failed = not engine.is_listening and not stop_event.is_set()
+    engine.stop()
+    engine.stop_delivery()
+    engine.stop_recording()
+    engine.stop_metrics_dump()
+    return 1 if failed else 0
@@ -0,0 +1,110 @@
+"""
+ONNX Runtime settings for the wake word models.
+
+OpenWakeWord creates its ONNX Runtime sessions itself, with fixed options.
+Inside ``tuned_sessions`` every session it creates is built from the ``onnx``
+section of the configuration instead: intra- and inter-op thread counts, the
+graph optimization level and an on-disk cache of optimized models. A cached
+model was optimized when it was written, so it is loaded with optimization
+disabled and later startups skip that work. onnxruntime is imported lazily.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+# Directory below the models directory that holds optimized models
+ONNX_CACHE_DIR = ".onnx-cache"
+
+# Config values and the onnxruntime.GraphOptimizationLevel members they stand for
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disabled": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+# onnxruntime.InferenceSession is swapped out while a tuned_sessions block runs
+_patch_lock = threading.Lock()
+
+
+def session_options(onnx_config: dict, optimization: Optional[str] = None):
+    """SessionOptions from the ``onnx`` section; ``optimization`` overrides its level"""
+    import onnxruntime as ort
+
+    level = optimization or onnx_config.get("graph_optimization", "all")
+    if level not in GRAPH_OPTIMIZATION_LEVELS:
+        raise ValueError(f"Unknown graph optimization level: {level}")
+
+    options = ort.SessionOptions()
+    # 0 lets ONNX Runtime start one thread per core
+    options.intra_op_num_threads = onnx_config.get("intra_op_threads", 1)
+    options.inter_op_num_threads = onnx_config.get("inter_op_threads", 1)
+    options.graph_optimization_level = getattr(ort.GraphOptimizationLevel, GRAPH_OPTIMIZATION_LEVELS[level])
+    return options
+
+
+def cached_model_path(model_path: Path, cache_dir: Path, level: str) -> Path:
+    """Optimized copy of a model; the name changes with the source file, the level and onnxruntime"""
+    import onnxruntime as ort
+
+    stat = model_path.stat()
+    return cache_dir / f"{model_path.stem}-{stat.st_size:x}-{stat.st_mtime_ns:x}.{level}.ort-{ort.__version__}.onnx"
+
+
+def create_session(model_path, onnx_config: dict, cache_dir: Optional[Path] = None, providers=None):
+    """InferenceSession for ``model_path``, from the optimized model cache when possible"""
+    # The class itself, not the module attribute tuned_sessions replaces
+    from onnxruntime.capi.onnxruntime_inference_collection import InferenceSession
+
+    model_path = Path(model_path)
+    level = onnx_config.get("graph_optimization", "all")
+    if cache_dir is None or level == "disabled":
+        return InferenceSession(str(model_path), sess_options=session_options(onnx_config), providers=providers)
+
+    cached = cached_model_path(model_path, cache_dir, level)
+    if cached.exists():
+        try:
+            options = session_options(onnx_config, "disabled")
+            return InferenceSession(str(cached), sess_options=options, providers=providers)
+        except Exception as e:
+            print(f"Ignoring unusable optimized model {cached}: {e}")
+
+    options = session_options(onnx_config)
+    # Written under a temporary name, batch workers may optimize the same model at once
+    temp_path = cached.with_name(f".{cached.stem}.{os.getpid()}.tmp.onnx")
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        options.optimized_model_filepath = str(temp_path)
+    except OSError as e:
+        print(f"Not caching optimized model {model_path.name}: {e}")
+    session = InferenceSession(str(model_path), sess_options=options, providers=providers)
+
+    if temp_path.exists():
+        try:
+            # Copies optimized from an older version of the model are never read again
+            for stale in cache_dir.glob(f"{model_path.stem}-*.onnx"):
+                stale.unlink(missing_ok=True)
+            os.replace(temp_path, cached)
+        except OSError as e:
+            print(f"Not caching optimized model {model_path.name}: {e}")
+    return session
+
+
+@contextmanager
+def tuned_sessions(onnx_config: dict, cache_dir: Optional[Path] = None):
+    """Build every InferenceSession created in this block with the ``onnx`` settings"""
+    import onnxruntime as ort
+
+    def create(path, sess_options=None, providers=None, **kwargs):
+        return create_session(path, onnx_config, cache_dir, providers)
+
+    with _patch_lock:
+        original = ort.InferenceSession
+        ort.InferenceSession = create
+        try:
+            yield
+        finally:
+            ort.InferenceSession = original
@@ -0,0 +1,223 @@
+"""
+Model installation from downloaded or local archives.
+
+A model is unpacked (or copied, for a directory) into a hidden staging
+directory inside ``models/``, checked, and only then renamed to its final name.
+The staged files and directories are flushed to disk before the rename, and
+the models directory after it, so neither an interrupted install nor a power
+loss leaves a half-written model directory behind; leftovers are cleaned up by
+``cleanup_incomplete_installs``. Qt-free, so
+the same code backs the download dialog, the import menu and
+``python -m aleva import-model``.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Callable, Optional
+
+from .config import default_config_dir, fsync_directory, migrate_legacy_config_dir
+
+# Bytes per read while unpacking or copying
+COPY_BLOCK_SIZE = 1024 * 1024
+
+STAGING_PREFIX = ".installing-"
+REPLACED_PREFIX = ".replaced-"
+
+
+class InstallError(Exception):
+    """Model could not be installed"""
+
+
+class InstallCancelled(InstallError):
+    """Install was stopped on request; nothing was changed"""
+
+
+def is_vosk_model(path: Path) -> bool:
+    """Whether ``path`` looks like a complete Vosk model directory"""
+    return (path / "am" / "final.mdl").is_file() and (path / "conf").is_dir()
+
+
+def cleanup_incomplete_installs(models_dir: Path) -> None:
+    """Remove staging leftovers and restore models whose replacement never finished"""
+    if not models_dir.is_dir():
+        return
+
+    for entry in models_dir.iterdir():
+        try:
+            if entry.name.startswith(STAGING_PREFIX):
+                print(f"Removing incomplete model install: {entry.name}")
+                shutil.rmtree(entry)
+            elif entry.name.startswith(REPLACED_PREFIX):
+                original = models_dir / entry.name[len(REPLACED_PREFIX) :]
+                if original.exists():
+                    shutil.rmtree(entry)
+                else:
+                    # Crashed between moving the old model away and the new one in
+                    os.replace(entry, original)
+        except OSError as e:
+            print(f"Error cleaning up {entry}: {e}")
+
+
+class ModelInstaller:
+    """Install a Vosk model from a zip archive or a directory
+
+    ``progress(done, total)`` reports bytes written. ``cancel()`` may be called
+    from any thread and stops at the next block.
+    """
+
+    def __init__(self, source: Path, models_dir: Path, progress: Optional[Callable[[int, int], None]] = None) -> None:
+        self.source = Path(source)
+        self.models_dir = Path(models_dir)
+        self.progress = progress
+        self.done = 0
+        self.total = 0
+        self._cancel_event = threading.Event()
+
+    def cancel(self) -> None:
+        """Ask the install to stop; safe to call from any thread"""
+        self._cancel_event.set()
+
+    def run(self) -> Path:
+        """Install the model and return its final directory"""
+        if not self.source.exists():
+            raise InstallError(f"Not found: {self.source}")
+
+        self.models_dir.mkdir(parents=True, exist_ok=True)
+        cleanup_incomplete_installs(self.models_dir)
+
+        # Importing a model that is already in place only needs the check
+        if self.source.is_dir() and self.source.resolve().parent == self.models_dir.resolve():
+            if not is_vosk_model(self.source):
+                raise InstallError(f"{self.source.name} does not contain a Vosk model")
+            return self.source
+
+        # Staging lives next to the target so the final rename stays on one filesystem
+        staging = Path(tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=self.models_dir))
+        try:
+            if self.source.is_dir():
+                name = self.copy_directory(staging)
+            elif zipfile.is_zipfile(self.source):
+                name = self.extract_zip(staging)
+            else:
+                raise InstallError(f"Not a zip archive or directory: {self.source}")
+
+            model_dir = staging / name
+            if not is_vosk_model(model_dir):
+                raise InstallError(f"{self.source.name} does not contain a Vosk model")
+
+            return self.move_into_place(model_dir, self.models_dir / name)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def check_cancelled(self) -> None:
+        """Raise InstallCancelled once ``cancel()`` was called"""
+        if self._cancel_event.is_set():
+            raise InstallCancelled("Install cancelled")
+
+    def add_progress(self, count: int) -> None:
+        """Count written bytes and report progress"""
+        self.done += count
+        if self.progress is not None:
+            self.progress(self.done, self.total)
+
+    def copy_stream(self, source, target_path: Path) -> None:
+        """Copy an open binary stream to a new file in blocks"""
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(target_path, "wb") as target:
+            while True:
+                self.check_cancelled()
+                block = source.read(COPY_BLOCK_SIZE)
+                if not block:
+                    break
+                target.write(block)
+                self.add_progress(len(block))
+            target.flush()
+            os.fsync(target.fileno())
+
+    def extract_zip(self, staging: Path) -> str:
+        """Unpack the archive into ``staging``, returning the model directory name"""
+        with zipfile.ZipFile(self.source) as archive:
+            # Skip macOS resource forks, they are not part of the model
+            members = [member for member in archive.infolist() if not member.filename.startswith("__MACOSX/")]
+            paths = [PurePosixPath(member.filename).parts for member in members]
+            for member, parts in zip(members, paths, strict=True):
+                if member.filename.startswith("/") or ".." in parts or ":" in member.filename:
+                    raise InstallError(f"Unsafe path in archive: {member.filename}")
+
+            # Models are zipped as a single top-level directory; wrap loose files in one
+            top_level = {parts[0] for parts in paths if parts}
+            single_directory = len(top_level) == 1 and any(len(parts) > 1 for parts in paths)
+            name = top_level.pop() if single_directory else self.source.stem
+            root = staging if single_directory else staging / name
+
+            self.total = sum(member.file_size for member in members)
+            for member in members:
+                target_path = root / member.filename
+                if member.is_dir():
+                    target_path.mkdir(parents=True, exist_ok=True)
+                    continue
+                with archive.open(member) as source:
+                    self.copy_stream(source, target_path)
+        return name
+
+    def copy_directory(self, staging: Path) -> str:
+        """Copy a model directory into ``staging``, returning its name"""
+        files = [path for path in self.source.rglob("*") if path.is_file()]
+        self.total = sum(path.stat().st_size for path in files)
+        for path in files:
+            with open(path, "rb") as source:
+                self.copy_stream(source, staging / self.source.name / path.relative_to(self.source))
+        return self.source.name
+
+    def move_into_place(self, model_dir: Path, target: Path) -> Path:
+        """Rename the staged model to ``target``, replacing any existing model"""
+        self.check_cancelled()
+        # The files were synced as they were written, their directory entries are synced here
+        for directory, _, _ in os.walk(model_dir, topdown=False):
+            fsync_directory(Path(directory))
+
+        if not target.exists():
+            os.replace(model_dir, target)
+            fsync_directory(self.models_dir)
+            return target
+
+        # The old model is kept under a marker name until the new one is in place
+        replaced = self.models_dir / f"{REPLACED_PREFIX}{target.name}"
+        if replaced.exists():
+            shutil.rmtree(replaced)
+        os.replace(target, replaced)
+        os.replace(model_dir, target)
+        fsync_directory(self.models_dir)
+        shutil.rmtree(replaced, ignore_errors=True)
+        return target
+
+
+def run_import(source: Path, config_file: Optional[Path] = None) -> int:
+    """Install a model from the command line, returning the process exit code"""
+    config_dir = config_file.parent if config_file else migrate_legacy_config_dir(default_config_dir())
+    last_percentage = -1
+
+    def report(done: int, total: int) -> None:
+        nonlocal last_percentage
+        percentage = int(done * 100 / total) if total else 0
+        if percentage != last_percentage:
+            last_percentage = percentage
+            print(f"\rInstalling {source.name}: {percentage}%", end="", file=sys.stderr, flush=True)
+
+    installer = ModelInstaller(source, config_dir / "models", progress=report)
+    try:
+        model_dir = installer.run()
+    except (InstallError, OSError) as e:
+        print(f"\nFailed to install model: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("\nInstall cancelled", file=sys.stderr)
+        return 1
+
+    print(f"\nInstalled {model_dir}", file=sys.stderr)
+    return 0
@@ -111,6 +111,61 @@
         <source>Vosk model already exists. Do you want to redownload it?</source>
         <translation>Vosk model already exists. Do you want to redownload it?</translation>
     </message>
+    <message>
+        <source>Diagnostics</source>
+        <translation>Diagnostics</translation>
+    </message>
+    <message>
+        <source>Import</source>
+        <translation>Import</translation>
+    </message>
+    <message>
+        <source>From zip file...</source>
+        <translation>From zip file...</translation>
+    </message>
+    <message>
+        <source>From folder...</source>
+        <translation>From folder...</translation>
+    </message>
+    <message>
+        <source>Import Model</source>
+        <translation>Import Model</translation>
+    </message>
+    <message>
+        <source>Zip archives (*.zip)</source>
+        <translation>Zip archives (*.zip)</translation>
+    </message>
+    <message>
+        <source>Also</source>
+        <translation>Also</translation>
+    </message>
+    <message>
+        <source>Unverified Download</source>
+        <translation>Unverified Download</translation>
+    </message>
+    <message>
+        <source>No checksum is known for {0}, so the download cannot be checked for corruption or tampering. Download it anyway?</source>
+        <translation>No checksum is known for {0}, so the download cannot be checked for corruption or tampering. Download it anyway?</translation>
+    </message>
+</context>
+<context>
+    <name>ModelLoaderThread</name>
+    <message>
+        <source>Downloading wake word models...</source>
+        <translation>Downloading wake word models...</translation>
+    </message>
+    <message>
+        <source>Loading wake word model...</source>
+        <translation>Loading wake word model...</translation>
+    </message>
+    <message>
+        <source>Loading speech model...</source>
+        <translation>Loading speech model...</translation>
+    </message>
+    <message>
+        <source>Models ready</source>
+        <translation>Models ready</translation>
+    </message>
 </context>
 <context>
     <name>ApiUrlDialog</name>
@@ -161,5 +216,60 @@
         <source>Download Error</source>
         <translation>Download Error</translation>
     </message>
+    <message>
+        <source>Cancelling...</source>
+        <translation>Cancelling...</translation>
+    </message>
+    <message>
+        <source>Import Model</source>
+        <translation>Import Model</translation>
+    </message>
+    <message>
+        <source>Importing model...</source>
+        <translation>Importing model...</translation>
+    </message>
+    <message>
+        <source>Model imported successfully!</source>
+        <translation>Model imported successfully!</translation>
+    </message>
+    <message>
+        <source>Vosk model imported successfully!</source>
+        <translation>Vosk model imported successfully!</translation>
+    </message>
+    <message>
+        <source>Install Error</source>
+        <translation>Install Error</translation>
+    </message>
+    <message>
+        <source>Failed to install model: {0}</source>
+        <translation>Failed to install model: {0}</translation>
+    </message>
+    <message>
+        <source>Failed to download model: {0}</source>
+        <translation>Failed to download model: {0}</translation>
+    </message>
+</context>
+<context>
+    <name>DiagnosticsDialog</name>
+    <message>
+        <source>Diagnostics</source>
+        <translation>Diagnostics</translation>
+    </message>
+    <message>
+        <source>Metric</source>
+        <translation>Metric</translation>
+    </message>
+    <message>
+        <source>Value</source>
+        <translation>Value</translation>
+    </message>
+    <message>
+        <source>Close</source>
+        <translation>Close</translation>
+    </message>
+    <message>
+        <source>n={0}  mean {1:.2f} ms  p50 {2:.2f} ms  p99 {3:.2f} ms</source>
+        <translation>n={0}  mean {1:.2f} ms  p50 {2:.2f} ms  p99 {3:.2f} ms</translation>
+    </message>
 </context>
 </TS> 
\ No newline at end of file
@@ -111,6 +111,61 @@
         <source>Vosk model already exists. Do you want to redownload it?</source>
         <translation>Voskモデルが既に存在します。再ダウンロードしますか？</translation>
     </message>
+    <message>
+        <source>Diagnostics</source>
+        <translation>診断</translation>
+    </message>
+    <message>
+        <source>Import</source>
+        <translation>インポート</translation>
+    </message>
+    <message>
+        <source>From zip file...</source>
+        <translation>zip ファイルから...</translation>
+    </message>
+    <message>
+        <source>From folder...</source>
+        <translation>フォルダーから...</translation>
+    </message>
+    <message>
+        <source>Import Model</source>
+        <translation>モデルをインポート</translation>
+    </message>
+    <message>
+        <source>Zip archives (*.zip)</source>
+        <translation>Zip アーカイブ (*.zip)</translation>
+    </message>
+    <message>
+        <source>Also</source>
+        <translation>併用</translation>
+    </message>
+    <message>
+        <source>Unverified Download</source>
+        <translation>未検証のダウンロード</translation>
+    </message>
+    <message>
+        <source>No checksum is known for {0}, so the download cannot be checked for corruption or tampering. Download it anyway?</source>
+        <translation>{0} のチェックサムが不明なため、ダウンロードの破損や改ざんを確認できません。それでもダウンロードしますか？</translation>
+    </message>
+</context>
+<context>
+    <name>ModelLoaderThread</name>
+    <message>
+        <source>Downloading wake word models...</source>
+        <translation>ウェイクワードモデルをダウンロード中...</translation>
+    </message>
+    <message>
+        <source>Loading wake word model...</source>
+        <translation>ウェイクワードモデルを読み込み中...</translation>
+    </message>
+    <message>
+        <source>Loading speech model...</source>
+        <translation>音声モデルを読み込み中...</translation>
+    </message>
+    <message>
+        <source>Models ready</source>
+        <translation>モデルの準備ができました</translation>
+    </message>
 </context>
 <context>
     <name>ApiUrlDialog</name>
@@ -161,5 +216,60 @@
         <source>Download Error</source>
         <translation>ダウンロードエラー</translation>
     </message>
+    <message>
+        <source>Cancelling...</source>
+        <translation>キャンセル中...</translation>
+    </message>
+    <message>
+        <source>Import Model</source>
+        <translation>モデルをインポート</translation>
+    </message>
+    <message>
+        <source>Importing model...</source>
+        <translation>モデルをインポート中...</translation>
+    </message>
+    <message>
+        <source>Model imported successfully!</source>
+        <translation>モデルのインポートに成功しました！</translation>
+    </message>
+    <message>
+        <source>Vosk model imported successfully!</source>
+        <translation>Vosk モデルのインポートに成功しました！</translation>
+    </message>
+    <message>
+        <source>Install Error</source>
+        <translation>インストールエラー</translation>
+    </message>
+    <message>
+        <source>Failed to install model: {0}</source>
+        <translation>モデルのインストールに失敗しました: {0}</translation>
+    </message>
+    <message>
+        <source>Failed to download model: {0}</source>
+        <translation>モデルのダウンロードに失敗しました: {0}</translation>
+    </message>
+</context>
+<context>
+    <name>DiagnosticsDialog</name>
+    <message>
+        <source>Diagnostics</source>
+        <translation>診断</translation>
+    </message>
+    <message>
+        <source>Metric</source>
+        <translation>メトリクス</translation>
+    </message>
+    <message>
+        <source>Value</source>
+        <translation>値</translation>
+    </message>
+    <message>
+        <source>Close</source>
+        <translation>閉じる</translation>
+    </message>
+    <message>
+        <source>n={0}  mean {1:.2f} ms  p50 {2:.2f} ms  p99 {3:.2f} ms</source>
+        <translation>n={0}  平均 {1:.2f} ms  p50 {2:.2f} ms  p99 {3:.2f} ms</translation>
+    </message>
 </context>
 </TS> 
\ No newline at end of file
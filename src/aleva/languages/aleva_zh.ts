@@ -111,6 +111,61 @@
         <source>Vosk model already exists. Do you want to redownload it?</source>
         <translation>Vosk模型已存在。您要重新下载吗？</translation>
     </message>
+    <message>
+        <source>Diagnostics</source>
+        <translation>诊断</translation>
+    </message>
+    <message>
+        <source>Import</source>
+        <translation>导入</translation>
+    </message>
+    <message>
+        <source>From zip file...</source>
+        <translation>从 zip 文件...</translation>
+    </message>
+    <message>
+        <source>From folder...</source>
+        <translation>从文件夹...</translation>
+    </message>
+    <message>
+        <source>Import Model</source>
+        <translation>导入模型</translation>
+    </message>
+    <message>
+        <source>Zip archives (*.zip)</source>
+        <translation>Zip 压缩包 (*.zip)</translation>
+    </message>
+    <message>
+        <source>Also</source>
+        <translation>同时使用</translation>
+    </message>
+    <message>
+        <source>Unverified Download</source>
+        <translation>未验证的下载</translation>
+    </message>
+    <message>
+        <source>No checksum is known for {0}, so the download cannot be checked for corruption or tampering. Download it anyway?</source>
+        <translation>{0} 没有已知的校验和，无法检查下载是否损坏或被篡改。仍要下载吗？</translation>
+    </message>
+</context>
+<context>
+    <name>ModelLoaderThread</name>
+    <message>
+        <source>Downloading wake word models...</source>
+        <translation>正在下载唤醒词模型...</translation>
+    </message>
+    <message>
+        <source>Loading wake word model...</source>
+        <translation>正在加载唤醒词模型...</translation>
+    </message>
+    <message>
+        <source>Loading speech model...</source>
+        <translation>正在加载语音模型...</translation>
+    </message>
+    <message>
+        <source>Models ready</source>
+        <translation>模型已就绪</translation>
+    </message>
 </context>
 <context>
     <name>ApiUrlDialog</name>
@@ -161,5 +216,60 @@
         <source>Download Error</source>
         <translation>下载错误</translation>
     </message>
+    <message>
+        <source>Cancelling...</source>
+        <translation>正在取消...</translation>
+    </message>
+    <message>
+        <source>Import Model</source>
+        <translation>导入模型</translation>
+    </message>
+    <message>
+        <source>Importing model...</source>
+        <translation>正在导入模型...</translation>
+    </message>
+    <message>
+        <source>Model imported successfully!</source>
+        <translation>模型导入成功！</translation>
+    </message>
+    <message>
+        <source>Vosk model imported successfully!</source>
+        <translation>Vosk 模型导入成功！</translation>
+    </message>
+    <message>
+        <source>Install Error</source>
+        <translation>安装错误</translation>
+    </message>
+    <message>
+        <source>Failed to install model: {0}</source>
+        <translation>安装模型失败：{0}</translation>
+    </message>
+    <message>
+        <source>Failed to download model: {0}</source>
+        <translation>下载模型失败：{0}</translation>
+    </message>
+</context>
+<context>
+    <name>DiagnosticsDialog</name>
+    <message>
+        <source>Diagnostics</source>
+        <translation>诊断</translation>
+    </message>
+    <message>
+        <source>Metric</source>
+        <translation>指标</translation>
+    </message>
+    <message>
+        <source>Value</source>
+        <translation>值</translation>
+    </message>
+    <message>
+        <source>Close</source>
+        <translation>关闭</translation>
+    </message>
+    <message>
+        <source>n={0}  mean {1:.2f} ms  p50 {2:.2f} ms  p99 {3:.2f} ms</source>
+        <translation>n={0}  平均 {1:.2f} ms  p50 {2:.2f} ms  p99 {3:.2f} ms</translation>
+    </message>
 </context>
 </TS> 
\ No newline at end of file
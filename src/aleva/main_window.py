@@ -1,28 +1,32 @@
-import json
+from __future__ import annotations
+
 import os
 import sys
 import threading
-import time
-import urllib.request
-import zipfile
+from itertools import count
 from pathlib import Path
-from typing import Optional
 from platform import system
-
-import numpy as np
-import sounddevice as sd
-import onnxruntime as ort
-from vosk import Model as VoskModel, KaldiRecognizer
-import openwakeword
-from openwakeword.model import Model as WakeWordModel
-from PySide6.QtCore import Qt, QStandardPaths, QTranslator, QThread, Signal
+from typing import TYPE_CHECKING, Optional
+
+from PySide6.QtCore import (
+    QAbstractNativeEventFilter,
+    QObject,
+    QStandardPaths,
+    Qt,
+    QThread,
+    QTimer,
+    QTranslator,
+    Signal,
+)
 from PySide6.QtGui import QAction, QCloseEvent, QIcon, QPainter, QPixmap
 from PySide6.QtWidgets import (
     QApplication,
     QComboBox,
     QDialog,
     QDialogButtonBox,
+    QFileDialog,
     QHBoxLayout,
+    QHeaderView,
     QLabel,
     QLineEdit,
     QMainWindow,
@@ -32,50 +36,196 @@ from PySide6.QtWidgets import (
     QProgressDialog,
     QPushButton,
     QSystemTrayIcon,
+    QTableWidget,
+    QTableWidgetItem,
     QVBoxLayout,
     QWidget,
 )
 
+from .config import APP_NAME, ConfigStore, get_default_config, merge_configs, migrate_legacy_config_dir
+from .devices import DeviceMonitor, is_device_change_message
+from .downloads import DownloadCancelled, Downloader, load_manifest
+from .engine import (
+    VOSK_MODEL_NAME,
+    VOSK_MODEL_URL,
+    WAKE_WORD_FILE,
+    AudioEngine,
+    StartupTimer,
+    download_wake_word_models,
+    load_wake_word_model,
+    parse_device_id,
+)
+from .install import InstallCancelled, ModelInstaller
+from .metrics import MetricsRegistry
+from .registry import ModelRegistry
+
+# numpy, sounddevice, vosk and openwakeword are imported by the engine when
+# they are needed, so importing this module only pays for Qt
+if TYPE_CHECKING:
+    from openwakeword.model import Model as WakeWordModel
+    from vosk import Model as VoskModel
+
 if system() == "Windows":
     import win32api
-    import win32gui
     import win32con
+    import win32gui
+
+
+class ModelLoaderThread(QThread):
+    """Thread for loading the wake word and speech models without blocking the UI
+
+    Progress messages are translated here, where lupdate can find them.
+    """
+
+    progress_updated = Signal(int, str)
+    wake_word_model_loaded = Signal(object)
+    vosk_model_loaded = Signal(object)
+    loading_finished = Signal(object)
+
+    def __init__(
+        self,
+        models_dir: Path,
+        load_wake_word: bool = True,
+        load_vosk: bool = True,
+        registry: Optional[ModelRegistry] = None,
+        vosk_model_name: Optional[str] = None,
+        onnx_config: Optional[dict] = None,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.models_dir = models_dir
+        self.load_wake_word = load_wake_word
+        self.load_vosk = load_vosk
+        self.registry = registry
+        self.vosk_model_name = vosk_model_name
+        self.onnx_config = onnx_config
+
+    def run(self):
+        """Load models in background thread"""
+        timer = StartupTimer()
+
+        if self.load_wake_word:
+            model_file = self.models_dir / WAKE_WORD_FILE
+            if not model_file.exists():
+                self.progress_updated.emit(0, self.tr("Downloading wake word models..."))
+                with timer.phase("oww_download"):
+                    download_wake_word_models(self.models_dir)
 
-WAKE_WORD_FILE = "alexa_v0.1.onnx"
-VOSK_MODEL_URL = "https://alphacephei.com/vosk/models/vosk-model-en-us-0.22.zip"
-VOSK_MODEL_NAME = "vosk-model-en-us-0.22"
+            self.progress_updated.emit(20, self.tr("Loading wake word model..."))
+            with timer.phase("oww"):
+                oww_model = load_wake_word_model(model_file, self.onnx_config)
+            self.wake_word_model_loaded.emit(oww_model)
+
+        if self.load_vosk and self.registry is not None and self.vosk_model_name:
+            # Instant when the registry still has the model loaded
+            self.progress_updated.emit(50, self.tr("Loading speech model..."))
+            with timer.phase("vosk"):
+                vosk_model = self.registry.get(self.vosk_model_name)
+            self.vosk_model_loaded.emit(vosk_model)
+
+        self.progress_updated.emit(100, self.tr("Models ready"))
+        self.loading_finished.emit(timer.phases)
 
 
 class DownloadThread(QThread):
-    """Thread for downloading files without blocking the UI"""
+    """Thread for downloading files without blocking the UI
+
+    Resumes from a ``.part`` file, can fetch several byte ranges in parallel and
+    verifies the pinned SHA-256, see ``Downloader``. ``cancel()`` stops the download at
+    the next chunk and keeps the partial file for the next attempt.
+    """
 
     progress_updated = Signal(int)
     download_finished = Signal(str)
     download_error = Signal(str)
-
-    def __init__(self, url: str, target_path: Path, parent=None):
+    download_cancelled = Signal()
+
+    def __init__(
+        self,
+        url: str,
+        target_path: Path,
+        expected_sha256: Optional[str] = None,
+        segments: int = 1,
+        allow_unverified: bool = False,
+        parent=None,
+    ):
         super().__init__(parent)
         self.url = url
         self.target_path = target_path
         self.target_path.parent.mkdir(parents=True, exist_ok=True)
+        self.downloader = Downloader(
+            url,
+            target_path,
+            expected_sha256,
+            segments,
+            progress=self.report_progress,
+            allow_unverified=allow_unverified,
+        )
+        self.last_percentage = -1
+
+    def report_progress(self, done: int, total: int) -> None:
+        """Emit progress only when the percentage changes"""
+        if total > 0:
+            percentage = min(int(done * 100 / total), 100)
+            if percentage != self.last_percentage:
+                self.last_percentage = percentage
+                self.progress_updated.emit(percentage)
+
+    def cancel(self) -> None:
+        """Stop the download, keeping what was fetched so far"""
+        self.downloader.cancel()
 
     def run(self):
         """Download file in background thread"""
         try:
-
-            def progress_hook(block_num, block_size, total_size):
-                if total_size > 0:
-                    downloaded = block_num * block_size
-                    percentage = min(int(downloaded * 100 / total_size), 100)
-                    self.progress_updated.emit(percentage)
-
-            urllib.request.urlretrieve(self.url, self.target_path, progress_hook)
+            self.downloader.run()
             self.download_finished.emit(str(self.target_path))
 
+        except DownloadCancelled:
+            self.download_cancelled.emit()
+
         except Exception as e:
             self.download_error.emit(str(e))
 
 
+class InstallThread(QThread):
+    """Thread for unpacking or copying a model into place without blocking the UI"""
+
+    progress_updated = Signal(int)
+    install_finished = Signal(str)
+    install_error = Signal(str)
+    install_cancelled = Signal()
+
+    def __init__(self, source: Path, models_dir: Path, parent=None):
+        super().__init__(parent)
+        self.installer = ModelInstaller(source, models_dir, progress=self.report_progress)
+        self.last_percentage = -1
+
+    def report_progress(self, done: int, total: int) -> None:
+        """Emit progress only when the percentage changes"""
+        if total > 0:
+            percentage = min(int(done * 100 / total), 100)
+            if percentage != self.last_percentage:
+                self.last_percentage = percentage
+                self.progress_updated.emit(percentage)
+
+    def cancel(self) -> None:
+        """Stop the install, leaving any existing model untouched"""
+        self.installer.cancel()
+
+    def run(self):
+        """Install the model in background thread"""
+        try:
+            model_dir = self.installer.run()
+            self.install_finished.emit(str(model_dir))
+
+        except InstallCancelled:
+            self.install_cancelled.emit()
+
+        except Exception as e:
+            self.install_error.emit(str(e))
+
+
 class ModelDownloadDialog(QProgressDialog):
     """Dialog for downloading and extracting models"""
 
@@ -88,59 +238,108 @@ class ModelDownloadDialog(QProgressDialog):
         self.setAutoClose(False)
         self.setAutoReset(False)
 
-        # Thread for downloading
+        # Threads for downloading and installing
         self.download_thread = None
+        self.install_thread = None
         self.models_dir = None
         self.target_file = None
 
-    def start_download(self, models_dir: Path):
+        # Stop the download thread instead of just hiding the dialog
+        self.canceled.disconnect()
+        self.canceled.connect(self.cancel_download)
+
+    def start_download(self, models_dir: Path, segments: int = 1, allow_unverified: bool = False):
         """Start the download process"""
         self.models_dir = models_dir
-        self.target_file = models_dir / "vosk-model-en-us-0.22.zip"
+        self.target_file = models_dir / f"{VOSK_MODEL_NAME}.zip"
+        expected_sha256 = load_manifest(models_dir).get(self.target_file.name)
+        if not expected_sha256 and allow_unverified:
+            print(f"No pinned SHA-256 for {self.target_file.name}, downloading it unverified")
 
         # Create download thread
-        self.download_thread = DownloadThread(VOSK_MODEL_URL, self.target_file, self)
+        self.download_thread = DownloadThread(
+            VOSK_MODEL_URL, self.target_file, expected_sha256, segments, allow_unverified, self
+        )
         self.download_thread.progress_updated.connect(self.setValue)
         self.download_thread.download_finished.connect(self.on_download_finished)
         self.download_thread.download_error.connect(self.on_download_error)
+        self.download_thread.download_cancelled.connect(self.reject)
 
         # Start download
         self.download_thread.start()
         self.show()
 
+    def start_import(self, models_dir: Path, source: Path):
+        """Install a model from a local zip file or directory, without downloading"""
+        self.models_dir = models_dir
+        self.setWindowTitle(self.tr("Import Model"))
+        self.setLabelText(self.tr("Importing model..."))
+        self.start_install(source)
+        self.show()
+
+    def start_install(self, source: Path):
+        """Unpack or copy ``source`` into the models directory in the background"""
+        self.setValue(0)
+        self.install_thread = InstallThread(source, self.models_dir, self)
+        self.install_thread.progress_updated.connect(self.setValue)
+        self.install_thread.install_finished.connect(self.on_install_finished)
+        self.install_thread.install_error.connect(self.on_install_error)
+        self.install_thread.install_cancelled.connect(self.reject)
+        self.install_thread.start()
+
+    def cancel_download(self):
+        """Stop the download or install and wait for the thread to finish its current chunk"""
+        self.setLabelText(self.tr("Cancelling..."))
+        self.stop_threads()
+        self.reject()
+
+    def stop_threads(self):
+        """Cancel any running download or install thread and wait for it"""
+        for thread in (self.download_thread, self.install_thread):
+            if thread and thread.isRunning():
+                thread.cancel()
+                thread.wait()
+
     def on_download_finished(self, file_path: str):
         """Handle successful download completion"""
         self.setLabelText(self.tr("Extracting model..."))
-        self.setValue(100)
-
-        try:
-            # Extract the zip file
-            with zipfile.ZipFile(file_path, "r") as zip_ref:
-                zip_ref.extractall(self.models_dir)
+        self.start_install(Path(file_path))
 
-            # Clean up zip file
-            os.remove(file_path)
+    def on_install_finished(self, model_dir: str):
+        """Handle a model that is installed and ready to load"""
+        # Clean up the downloaded zip file
+        if self.target_file and self.target_file.exists():
+            os.remove(self.target_file)
 
+        if self.target_file:
             self.setLabelText(self.tr("Model downloaded successfully!"))
             QMessageBox.information(
                 self, self.tr("Success"), self.tr("Vosk model downloaded and extracted successfully!")
             )
-            self.accept()
+        else:
+            self.setLabelText(self.tr("Model imported successfully!"))
+            QMessageBox.information(self, self.tr("Success"), self.tr("Vosk model imported successfully!"))
+        self.accept()
 
-        except Exception as e:
-            self.on_download_error(f"Failed to extract: {e}")
+    def on_install_error(self, error_message: str):
+        """Handle a failed extraction or import"""
+        self.hide()
+        QMessageBox.critical(
+            self, self.tr("Install Error"), self.tr("Failed to install model: {0}").format(error_message)
+        )
+        self.reject()
 
     def on_download_error(self, error_message: str):
         """Handle download error"""
         self.hide()
-        QMessageBox.critical(self, self.tr("Download Error"), self.tr(f"Failed to download model: {error_message}"))
+        QMessageBox.critical(
+            self, self.tr("Download Error"), self.tr("Failed to download model: {0}").format(error_message)
+        )
         self.reject()
 
     def closeEvent(self, event):
         """Handle dialog close event"""
-        if self.download_thread and self.download_thread.isRunning():
-            self.download_thread.terminate()
-            self.download_thread.wait()
+        self.stop_threads()
         event.accept()
 
 
@@ -184,8 +383,145 @@ class ApiUrlDialog(QDialog):
         return self.url_input.text().strip()
 
 
+class DiagnosticsDialog(QDialog):
+    """Live view of the audio engine's counters and latency histograms"""
+
+    def __init__(self, metrics: MetricsRegistry, parent=None) -> None:
+        super().__init__(parent)
+        self.metrics = metrics
+        self.setWindowTitle(self.tr("Diagnostics"))
+        self.resize(560, 480)
+
+        layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(0, 2)
+        self.table.setHorizontalHeaderLabels([self.tr("Metric"), self.tr("Value")])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Close)
+        button_box.rejected.connect(self.close)
+        button_box.button(QDialogButtonBox.Close).setText(self.tr("Close"))
+        layout.addWidget(button_box)
+
+        # Refresh once a second while the dialog is open
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event) -> None:
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event) -> None:
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self) -> None:
+        """Reload every metric into the table"""
+        values = self.metrics.snapshot()["metrics"]
+        self.table.setRowCount(len(values))
+        for row, (name, value) in enumerate(values.items()):
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            self.table.setItem(row, 1, QTableWidgetItem(self.format_value(name, value)))
+
+    def format_value(self, name: str, value) -> str:
+        """Human readable rendering of one metric value"""
+        if isinstance(value, dict):
+            return self.tr("n={0}  mean {1:.2f} ms  p50 {2:.2f} ms  p99 {3:.2f} ms").format(
+                value["count"], value["mean"] * 1000, value["p50"] * 1000, value["p99"] * 1000
+            )
+        if "percent" in name:
+            return f"{value:.1f} %"
+        if isinstance(value, float):
+            return f"{value:.3f}"
+        return str(value)
+
+
+class EngineEventBus(QObject):
+    """Hands engine events from worker threads to the UI thread
+
+    ``post()`` may be called from any thread. Events wait in a pending batch
+    that is flushed once per event loop pass, and a new ``wake_word`` or
+    ``partial`` event replaces one of the same kind still waiting, so a burst
+    of detections costs the UI a single update. Every other event is
+    delivered in order.
+    """
+
+    event_received = Signal(str, object)
+    flush_requested = Signal()
+
+    # Events where only the latest one matters
+    COALESCED_EVENTS = ("wake_word", "partial")
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.coalesced = 0
+        self._pending: dict = {}
+        self._sequence = count()
+        self._flush_scheduled = False
+        self._lock = threading.Lock()
+        # Queued, so flush() always runs on the thread that owns the bus
+        self.flush_requested.connect(self.flush, Qt.QueuedConnection)
+
+    def post(self, event: str, payload: dict) -> None:
+        """Queue an event for the UI thread"""
+        with self._lock:
+            key = event if event in self.COALESCED_EVENTS else next(self._sequence)
+            if self._pending.pop(key, None) is not None:
+                self.coalesced += 1
+            # Re-inserted at the end, so the newest event keeps its place in the order
+            self._pending[key] = (event, payload)
+            schedule = not self._flush_scheduled
+            self._flush_scheduled = True
+        if schedule:
+            self.flush_requested.emit()
+
+    def flush(self) -> None:
+        """Deliver the pending batch; runs on the UI thread"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flush_scheduled = False
+        for event, payload in pending.values():
+            self.event_received.emit(event, payload)
+
+
+class MicrophoneComboBox(QComboBox):
+    """Microphone selector that says when its list is about to be opened"""
+
+    popup_requested = Signal()
+
+    def showPopup(self) -> None:
+        self.popup_requested.emit()
+        super().showPopup()
+
+
+class DeviceChangeFilter(QAbstractNativeEventFilter):
+    """Calls ``on_change`` when Windows broadcasts that devices were added or removed
+
+    Only installed on Windows, so other platforms do not pay for a Python call
+    on every native event.
+    """
+
+    def __init__(self, on_change) -> None:
+        super().__init__()
+        self.on_change = on_change
+
+    def nativeEventFilter(self, event_type, message):
+        if is_device_change_message(event_type.data(), int(message)):
+            self.on_change()
+        return False, 0
+
+
 class MainWindow(QMainWindow):
-    def __init__(self, app) -> None:
+    # Emitted by the device monitor thread, delivered on the UI thread
+    microphones_changed = Signal(object)
+
+    def __init__(self, app, import_seconds: Optional[float] = None) -> None:
         super().__init__()
         self.app = app
         self.setWindowTitle(self.tr("Aleva - Audio Language Assistant"))
@@ -204,41 +540,69 @@ class MainWindow(QMainWindow):
 
         # Configuration
         self.config_dir = Path(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation))
+        # Before the application name was set, Qt named the directory after the script
+        migrate_legacy_config_dir(self.config_dir)
         self.config_file = self.config_dir / "config.json"
         self.config = {}
+        # Changes are written in the background, a burst of them once
+        self.config_store = ConfigStore(self.config_file)
 
-        # Initialize configuration
-        self.init_config()
-
-        # Audio processing variables
+        # Audio processing runs in the Qt-free engine, its events reach the UI through the bus
         self.is_listening = False
-        self.audio_thread: Optional[threading.Thread] = None
-        self.oww_model: Optional[WakeWordModel] = None
-        self.vosk_model: Optional[VoskModel] = None
-        self.vosk_recognizer: Optional[KaldiRecognizer] = None
-        self.sample_rate = 16000
-        self.chunk_size = 1024
-
-        # Initialize wake word model
-        self.init_wake_word_model()
-
-        # Setup UI
-        self.setup_ui()
-
-        # Check model status
-        has_vosk_model = self.check_and_update_model_status()
-        if has_vosk_model:
-            self.vosk_model = VoskModel(str(self.config_dir / "models" / VOSK_MODEL_NAME))
-            self.vosk_recognizer = KaldiRecognizer(self.vosk_model, self.sample_rate)
+        self.event_bus = EngineEventBus(self)
+        self.event_bus.event_received.connect(self.on_engine_event)
+        self.engine = AudioEngine(on_event=self.event_bus.post)
+        self.engine.metrics.counter(
+            "aleva_ui_events_coalesced_total",
+            "Engine events replaced by a newer one before the UI handled them",
+            func=lambda: self.event_bus.coalesced,
+        )
+        self.diagnostics_dialog: Optional[DiagnosticsDialog] = None
+
+        # Installed Vosk models, recently used ones stay loaded for quick switching
+        self.model_registry = ModelRegistry(self.config_dir / "models", loader=self.engine.load_speech_model)
+        self.active_vosk_model: Optional[str] = None
+
+        # Microphone labels from the last device enumeration
+        self.microphones: list[str] = []
+
+        # Models are loaded in the background once the window is up
+        self.model_loader: Optional[ModelLoaderThread] = None
+        self.models_loading = False
+        self.startup_timer: Optional[StartupTimer] = StartupTimer()
+        if import_seconds is not None:
+            self.startup_timer.phases["imports"] = import_seconds
+
+        # Setup UI and system tray first so they appear immediately
+        with self.startup_timer.phase("ui"):
+            self.setup_ui()
+            self.setup_system_tray()
+
+        # Initialize configuration (applies settings to the UI)
+        with self.startup_timer.phase("config"):
+            self.init_config()
+
+        # Microphones are enumerated in the background and the list follows devices being plugged in
+        with self.startup_timer.phase("microphones"):
+            self.microphones_changed.connect(self.on_microphones_changed)
+            self.device_monitor = DeviceMonitor(
+                on_change=self.microphones_changed.emit,
+                busy=lambda: self.engine.is_capturing,
+                interval=self.config.get("audio", {}).get("device_poll_interval", 2.0),
+            )
+            self.device_monitor.start()
+            self.device_change_filter: Optional[DeviceChangeFilter] = None
+            if system() == "Windows":
+                self.device_change_filter = DeviceChangeFilter(self.device_monitor.refresh)
+                self.app.installNativeEventFilter(self.device_change_filter)
 
-        # Setup system tray
-        self.setup_system_tray()
+        # Load the configured language
+        self.load_language(self.current_language)
 
-        # Refresh microphones on startup
-        self.refresh_microphones()
+        print(f"Startup timing (window ready): {self.startup_timer.report()}")
 
-        # Load default language (English)
-        self.load_language("en")
+        # Load wake word and speech models without blocking the UI
+        self.start_model_loading()
 
     def setup_ui(self) -> None:
         """Setup the main UI components"""
@@ -263,27 +627,46 @@ class MainWindow(QMainWindow):
         # Microphone selector
         microphone_layout = QHBoxLayout()
         self.microphone_label = QLabel(self.tr("Microphone:"))
-        self.microphone_combo = QComboBox()
+        self.microphone_combo = MicrophoneComboBox()
         self.microphone_combo.currentTextChanged.connect(self.on_microphone_changed)
+        # Where nothing reports devices coming and going, opening the list re-reads them
+        self.microphone_combo.popup_requested.connect(self.on_microphone_list_opened)
+        # Other microphones listened to at the same time
+        self.more_microphones_button = QPushButton(self.tr("Also"))
+        self.more_microphones_menu = QMenu(self)
+        self.more_microphones_menu.triggered.connect(self.on_more_microphones_changed)
+        self.more_microphones_menu.aboutToShow.connect(self.on_microphone_list_opened)
+        self.more_microphones_button.setMenu(self.more_microphones_menu)
         self.refresh_button = QPushButton(self.tr("Refresh"))
         self.refresh_button.clicked.connect(self.refresh_microphones)
 
         microphone_layout.addWidget(self.microphone_label)
         microphone_layout.addWidget(self.microphone_combo)
+        microphone_layout.addWidget(self.more_microphones_button)
         microphone_layout.addWidget(self.refresh_button)
 
         # Model section
         model_layout = QHBoxLayout()
         self.model_label = QLabel(self.tr("Model:"))
-        self.vosk_model_label = QLabel(self.tr("Not loaded"))
-        self.vosk_model_label.setStyleSheet("color: gray; font-style: italic;")
+        self.model_combo = QComboBox()
+        self.model_combo.currentIndexChanged.connect(self.on_model_selected)
         self.load_model_button = QPushButton(self.tr("Load"))
         self.load_model_button.clicked.connect(self.show_model_download_dialog)
 
+        # Offline install from a model zip or an unpacked model folder
+        self.import_model_button = QPushButton(self.tr("Import"))
+        self.import_model_menu = QMenu(self)
+        self.import_zip_action = self.import_model_menu.addAction(self.tr("From zip file..."))
+        self.import_zip_action.triggered.connect(self.import_model_zip)
+        self.import_folder_action = self.import_model_menu.addAction(self.tr("From folder..."))
+        self.import_folder_action.triggered.connect(self.import_model_folder)
+        self.import_model_button.setMenu(self.import_model_menu)
+
         model_layout.addWidget(self.model_label)
-        model_layout.addWidget(self.vosk_model_label)
+        model_layout.addWidget(self.model_combo)
         model_layout.addStretch()
         model_layout.addWidget(self.load_model_button)
+        model_layout.addWidget(self.import_model_button)
 
         # API URL section
         api_layout = QHBoxLayout()
@@ -310,11 +693,31 @@ class MainWindow(QMainWindow):
         listen_layout.addWidget(self.status_label)
         listen_layout.addStretch()
 
+        # What is being said, partial hypotheses while speaking and then the final text
+        self.speech_label = QLabel()
+        self.speech_label.setWordWrap(True)
+        self.speech_is_partial = False
+
+        # Restores the status shortly after a wake word, restarted by every detection
+        self.status_reset_timer = QTimer(self)
+        self.status_reset_timer.setSingleShot(True)
+        self.status_reset_timer.setInterval(2000)
+        self.status_reset_timer.timeout.connect(self.reset_listening_status)
+
+        # Model loading progress, hidden once the models are ready
+        self.loading_progress = QProgressBar()
+        self.loading_progress.setRange(0, 100)
+        self.loading_progress.setTextVisible(False)
+        self.loading_progress.setMaximumHeight(8)
+        self.loading_progress.hide()
+
         layout.addLayout(language_layout)
         layout.addLayout(microphone_layout)
         layout.addLayout(model_layout)
         layout.addLayout(api_layout)
         layout.addLayout(listen_layout)
+        layout.addWidget(self.speech_label)
+        layout.addWidget(self.loading_progress)
         layout.addStretch()
 
     def setup_system_tray(self) -> None:
@@ -339,11 +742,16 @@ class MainWindow(QMainWindow):
         self.show_hide_action = QAction(self.tr("Show"), self)
         self.show_hide_action.triggered.connect(self.toggle_visibility)
 
+        # Diagnostics action
+        self.diagnostics_action = QAction(self.tr("Diagnostics"), self)
+        self.diagnostics_action.triggered.connect(self.show_diagnostics_dialog)
+
         # Quit action
         self.quit_action = QAction(self.tr("Quit"), self)
         self.quit_action.triggered.connect(self.quit_application)
 
         self.tray_menu.addAction(self.show_hide_action)
+        self.tray_menu.addAction(self.diagnostics_action)
         self.tray_menu.addSeparator()
         self.tray_menu.addAction(self.quit_action)
 
@@ -372,6 +780,15 @@ class MainWindow(QMainWindow):
 
             # Save configuration after API URL change
             self.save_config()
+            self.engine.configure_api(self.config.get("api", {}))
+
+    def show_diagnostics_dialog(self) -> None:
+        """Show the live metrics window"""
+        if self.diagnostics_dialog is None:
+            self.diagnostics_dialog = DiagnosticsDialog(self.engine.metrics, self)
+        self.diagnostics_dialog.show()
+        self.diagnostics_dialog.raise_()
+        self.diagnostics_dialog.activateWindow()
 
     def show_model_download_dialog(self) -> None:
         """Show model download dialog"""
@@ -390,63 +807,194 @@ class MainWindow(QMainWindow):
             if reply != QMessageBox.Yes:
                 return
 
+        # Without a known digest the archive cannot be verified, the user decides for this download only
+        models_config = self.config.get("models", {})
+        allow_unverified = models_config.get("allow_unverified_downloads", False)
+        archive = f"{VOSK_MODEL_NAME}.zip"
+        if not allow_unverified and not load_manifest(models_dir).get(archive):
+            reply = QMessageBox.warning(
+                self,
+                self.tr("Unverified Download"),
+                self.tr(
+                    "No checksum is known for {0}, so the download cannot be checked for corruption or "
+                    "tampering. Download it anyway?"
+                ).format(archive),
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No,
+            )
+            if reply != QMessageBox.Yes:
+                return
+            allow_unverified = True
+
         # Start download
         dialog = ModelDownloadDialog(self)
-        dialog.start_download(models_dir)
+        dialog.start_download(models_dir, models_config.get("download_segments", 4), allow_unverified)
 
         # Update model status after successful download
         if dialog.exec() == QProgressDialog.Accepted:
             has_model = self.check_and_update_model_status()
             if has_model:
-                try:
-                    # Initialize Vosk model and recognizer
-                    self.vosk_model = VoskModel(str(models_dir / VOSK_MODEL_NAME))
-                    self.vosk_recognizer = KaldiRecognizer(self.vosk_model, self.sample_rate)
-                    print("Vosk model and recognizer initialized successfully")
-                except Exception as e:
-                    print(f"Error initializing Vosk model: {e}")
-                    self.vosk_model = None
-                    self.vosk_recognizer = None
+                # Initialize Vosk model and recognizer in the background
+                self.start_model_loading(load_wake_word=False)
+
+    def import_model_zip(self) -> None:
+        """Install a Vosk model from a local zip file"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, self.tr("Import Model"), str(Path.home()), self.tr("Zip archives (*.zip)")
+        )
+        if file_path:
+            self.import_model(Path(file_path))
+
+    def import_model_folder(self) -> None:
+        """Install a Vosk model from an unpacked model folder"""
+        folder = QFileDialog.getExistingDirectory(self, self.tr("Import Model"), str(Path.home()))
+        if folder:
+            self.import_model(Path(folder))
+
+    def import_model(self, source: Path) -> None:
+        """Copy a local model into the models directory and load it"""
+        dialog = ModelDownloadDialog(self)
+        dialog.start_import(self.config_dir / "models", source)
 
-    def check_and_update_model_status(self) -> bool:
-        """Check if Vosk model exists and update UI accordingly"""
-        models_dir = self.config_dir / "models"
-        vosk_model_dir = models_dir / VOSK_MODEL_NAME
+        if dialog.exec() == QProgressDialog.Accepted:
+            if self.check_and_update_model_status():
+                self.start_model_loading(load_wake_word=False)
 
-        if vosk_model_dir.exists() and vosk_model_dir.is_dir():
-            self.vosk_model_label.setText(VOSK_MODEL_NAME)
-            self.vosk_model_label.setStyleSheet("color: green; font-weight: bold;")
+    def check_and_update_model_status(self) -> bool:
+        """Rescan installed Vosk models and update the model selector"""
+        vosk_model_path = self.config.get("models", {}).get("vosk_model_path")
+        models = self.model_registry.scan([vosk_model_path])
+        selected = self.model_registry.select(vosk_model_path, self.current_language)
+
+        # Repopulating must not trigger a model switch
+        self.model_combo.blockSignals(True)
+        self.model_combo.clear()
+        for info in models:
+            self.model_combo.addItem(f"{info.name} ({info.size_mb:.0f} MB)", info.name)
+        if selected is not None:
+            self.model_combo.setCurrentIndex(self.model_combo.findData(selected.name))
+            self.model_combo.setEnabled(True)
             self.load_model_button.setText(self.tr("Reload"))
-            return True
+        else:
+            self.model_combo.addItem(self.tr("Not loaded"))
+            self.model_combo.setEnabled(False)
+            self.load_model_button.setText(self.tr("Load"))
+        self.model_combo.blockSignals(False)
+        return selected is not None
+
+    def selected_vosk_model(self) -> Optional[str]:
+        """Name of the model chosen in the selector"""
+        return self.model_combo.currentData()
+
+    def on_model_selected(self, index: int) -> None:
+        """Switch to the chosen model, instantly if it is still loaded"""
+        name = self.model_combo.itemData(index)
+        if not name or name == self.active_vosk_model:
+            return
 
-        self.vosk_model_label.setText(self.tr("Not loaded"))
-        self.vosk_model_label.setStyleSheet("color: gray; font-style: italic;")
-        self.load_model_button.setText(self.tr("Load"))
-        return False
+        # Remember the choice by name inside the models directory, by path outside it
+        info = self.model_registry.find(name)
+        if info is None:
+            # Deleted or replaced on disk since the selector was filled
+            print(f"Model {name} is no longer installed")
+            self.check_and_update_model_status()
+            return
+        inside = info.path.parent == self.model_registry.models_dir
+        self.config["models"]["vosk_model_path"] = name if inside else str(info.path)
+        self.save_config()
 
-    def init_wake_word_model(self) -> None:
-        """Initialize the OpenWakeWord model"""
-        try:
-            # Initialize with default models first
-            model_file = self.config_dir / "models" / WAKE_WORD_FILE
-            print(f"Using wake word model: {model_file}")
-            self.oww_model = WakeWordModel(
-                # TODO: use Aleva model
-                # wakeword_models=["aleva"],
-                wakeword_models=[str(model_file)],
-                # inference_framework="tflite",
-                inference_framework="onnx",
-                vad_threshold=0.2,
-            )
-            print("Wake word model initialized successfully")
+        if self.model_registry.is_resident(name):
+            # While listening the engine swaps at the end of the current utterance and logs the latency
+            self.engine.set_vosk_model(self.model_registry.get(name), name)
+            self.on_vosk_model_activated(name)
+        else:
+            # A load that is already running picks up the new selection when it finishes
+            self.start_model_loading(load_wake_word=False)
+
+    def on_vosk_model_activated(self, name: str) -> None:
+        """Record the model in use and preload the one used before it"""
+        self.active_vosk_model = name
+        recent = [name] + [model for model in self.config["models"].get("recent", []) if model != name]
+        self.config["models"]["recent"] = recent[:4]
+
+        for model in recent[1:]:
+            if self.model_registry.find(model) is not None:
+                self.model_registry.preload(model)
+                break
+
+    def start_model_loading(self, load_wake_word: bool = True, load_vosk: bool = True) -> None:
+        """Load models in a worker thread and enable listening when done"""
+        if self.models_loading:
+            return
 
-            # Note: For a custom "aleva" wake word, you would need to train a custom model
-            # For now, we'll use the general model and implement simple text matching
-            print("Using general wake word detection model")
+        self.models_loading = True
+        # Listening goes on with the current model while another one loads
+        self.listen_button.setEnabled(self.is_listening)
+        self.loading_progress.setValue(0)
+        self.loading_progress.show()
+
+        self.model_loader = ModelLoaderThread(
+            self.config_dir / "models",
+            load_wake_word,
+            load_vosk,
+            registry=self.model_registry,
+            vosk_model_name=self.selected_vosk_model(),
+            onnx_config=self.config.get("onnx", {}),
+            parent=self,
+        )
+        self.model_loader.progress_updated.connect(self.on_model_loading_progress)
+        self.model_loader.wake_word_model_loaded.connect(self.on_wake_word_model_loaded)
+        self.model_loader.vosk_model_loaded.connect(self.on_vosk_model_loaded)
+        self.model_loader.loading_finished.connect(self.on_model_loading_finished)
+        self.model_loader.start()
+
+    def on_model_loading_progress(self, percentage: int, message: str) -> None:
+        """Show model loading progress; ``message`` is already translated"""
+        self.loading_progress.setValue(percentage)
+        if not self.is_listening:
+            self.status_label.setText(message)
+            self.status_label.setStyleSheet("color: gray; font-style: italic;")
+
+    def on_wake_word_model_loaded(self, oww_model: Optional[WakeWordModel]) -> None:
+        """Hand the wake word model loaded in the background to the engine"""
+        self.engine.oww_model = oww_model
+
+    def on_vosk_model_loaded(self, vosk_model: Optional[VoskModel]) -> None:
+        """Hand the Vosk model loaded in the background to the engine"""
+        name = self.model_loader.vosk_model_name
+        if self.active_vosk_model is not None and name != self.selected_vosk_model():
+            # Another model was picked meanwhile; this one stays in the registry
+            return
 
-        except Exception as e:
-            print(f"Failed to initialize wake word model: {e}")
-            self.oww_model = None
+        self.engine.set_vosk_model(vosk_model, name)
+        if vosk_model is not None:
+            self.on_vosk_model_activated(name)
+
+    def on_model_loading_finished(self, timings: dict) -> None:
+        """Enable listening once the models are ready"""
+        self.models_loading = False
+        requested_model = self.model_loader.vosk_model_name
+        self.model_loader = None
+        self.loading_progress.hide()
+        self.listen_button.setEnabled(True)
+        if not self.is_listening:
+            self.status_label.setText(self.tr("Ready"))
+            self.status_label.setStyleSheet("color: gray; font-style: italic;")
+
+        # The first load completes the startup breakdown, later reloads are logged on their own
+        if self.startup_timer is not None:
+            self.startup_timer.phases.update(timings)
+            print(f"Startup timing: {self.startup_timer.report()}")
+            self.startup_timer = None
+        else:
+            timer = StartupTimer()
+            timer.phases.update(timings)
+            print(f"Model loading timing: {timer.report()}")
+
+        # The selection changed while loading
+        selected = self.selected_vosk_model()
+        if selected and selected != requested_model:
+            self.on_model_selected(self.model_combo.currentIndex())
 
     def init_config(self) -> None:
         """Initialize configuration file"""
@@ -471,37 +1019,18 @@ class MainWindow(QMainWindow):
 
     def get_default_config(self) -> dict:
         """Get default configuration"""
-        return {
-            "version": "0.1.0",
-            "ui": {"language": "en", "window_geometry": {"x": 200, "y": 200, "width": 400, "height": 300}},
-            "audio": {
-                "sample_rate": 16000,
-                "chunk_size": 1024,
-                "selected_microphone": None,
-                "wake_word_threshold": 0.5,
-            },
-            "api": {"url": None},
-            "models": {"vosk_model_path": None},
-            "system": {"minimize_to_tray": True, "show_tray_notifications": True},
-        }
+        return get_default_config()
 
     def create_default_config(self) -> None:
         """Create default configuration file"""
         self.config = self.get_default_config()
-        # TODO: use Aleva model
-        models_dir = self.config_dir / "models"
-        openwakeword.utils.download_models(target_directory=str(models_dir))
         self.save_config()
 
     def load_config(self) -> None:
         """Load configuration from file"""
         try:
-            with open(self.config_file, "r", encoding="utf-8") as f:
-                loaded_config = json.load(f)
-
-            # Merge with default config to ensure all keys exist
-            default_config = self.get_default_config()
-            self.config = self.merge_configs(default_config, loaded_config)
+            # Merged with the default config to ensure all keys exist
+            self.config = self.config_store.load()
 
             # Apply loaded configuration
             self.apply_config()
@@ -511,29 +1040,19 @@ class MainWindow(QMainWindow):
             self.config = self.get_default_config()
 
     def save_config(self) -> None:
-        """Save configuration to file"""
+        """Save configuration to file in the background, if it changed"""
         try:
             # Update config with current settings before saving
             self.update_config_from_ui()
 
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
-            print("Configuration saved successfully")
+            self.config_store.save(self.config)
 
         except Exception as e:
             print(f"Error saving config: {e}")
 
     def merge_configs(self, default: dict, loaded: dict) -> dict:
         """Recursively merge loaded config with default config"""
-        result = default.copy()
-
-        for key, value in loaded.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                result[key] = self.merge_configs(result[key], value)
-            else:
-                result[key] = value
-
-        return result
+        return merge_configs(default, loaded)
 
     def apply_config(self) -> None:
         """Apply configuration to UI and settings"""
@@ -555,16 +1074,21 @@ class MainWindow(QMainWindow):
             if all(key in geometry for key in ["x", "y", "width", "height"]):
                 self.setGeometry(geometry["x"], geometry["y"], geometry["width"], geometry["height"])
 
+            # Apply model settings
+            memory_cap_mb = self.config.get("models", {}).get("memory_cap_mb", 6144)
+            self.model_registry.memory_cap_bytes = int(memory_cap_mb * 1024 * 1024)
+
             # Apply audio settings
-            audio_config = self.config.get("audio", {})
-            self.sample_rate = audio_config.get("sample_rate", 16000)
-            self.chunk_size = audio_config.get("chunk_size", 1024)
+            self.engine.configure(self.config.get("audio", {}))
+            self.engine.configure_diagnostics(self.config.get("diagnostics", {}))
+            self.engine.configure_recording(self.config.get("recording", {}), self.config_dir / "utterances")
 
             # Apply API URL
             api_url = self.config.get("api", {}).get("url")
             if api_url:
                 self.api_url.setText(api_url)
                 self.api_url.setStyleSheet("color: black; font-style: normal;")
+            self.engine.configure_api(self.config.get("api", {}))
 
         except Exception as e:
             print(f"Error applying config: {e}")
@@ -596,6 +1120,7 @@ class MainWindow(QMainWindow):
                 selected_mic = self.microphone_combo.currentText()
                 if selected_mic != self.tr("No microphones found"):
                     self.config["audio"]["selected_microphone"] = selected_mic
+                    self.config["audio"]["additional_microphones"] = self.additional_microphones()
 
         except Exception as e:
             print(f"Error updating config from UI: {e}")
@@ -615,13 +1140,13 @@ class MainWindow(QMainWindow):
             self.listen_button.setChecked(False)
             return
 
-        if self.oww_model is None:
+        if self.engine.oww_model is None:
             self.status_label.setText(self.tr("Wake word model not available"))
             self.status_label.setStyleSheet("color: red;")
             self.listen_button.setChecked(False)
             return
 
-        if self.vosk_model is None:
+        if self.engine.vosk_model is None:
             self.status_label.setText(self.tr("Speech model not available"))
             self.status_label.setStyleSheet("color: red;")
             self.listen_button.setChecked(False)
@@ -632,99 +1157,63 @@ class MainWindow(QMainWindow):
         self.status_label.setText(self.tr("Listening..."))
         self.status_label.setStyleSheet("color: green;")
 
-        # Get selected microphone device index
-        mic_text = self.microphone_combo.currentText()
-        device_id = None
-        if "(" in mic_text and ")" in mic_text:
-            try:
-                device_id = int(mic_text.split("(")[-1].split(")")[0])
-            except (ValueError, IndexError):
-                device_id = None
+        # Get selected microphone device indexes, the combo box one first
+        device_ids = [parse_device_id(self.microphone_combo.currentText())]
+        device_ids += [parse_device_id(microphone) for microphone in self.additional_microphones()]
 
         # Start audio processing thread
-        self.audio_thread = threading.Thread(target=self.audio_processing_loop, args=(device_id,), daemon=True)
-        self.audio_thread.start()
+        self.engine.start(device_ids)
 
     def stop_listening(self) -> None:
         """Stop audio capture and processing"""
         self.is_listening = False
-        if self.audio_thread and self.audio_thread.is_alive():
-            self.audio_thread.join(timeout=1.0)
+        self.engine.stop()
+        self.status_reset_timer.stop()
 
         self.listen_button.setText(self.tr("Listen"))
         self.status_label.setText(self.tr("Ready"))
         self.status_label.setStyleSheet("color: gray; font-style: italic;")
+        self.speech_label.clear()
+
+    def on_engine_event(self, event: str, payload: dict) -> None:
+        """Handle events reported by the audio engine, on the UI thread"""
+        if event == "wake_word":
+            self.wake_word_detected()
+        elif event == "partial":
+            self.on_partial_result(payload["text"])
+        elif event == "transcript":
+            self.on_transcript(payload["text"])
+        elif event == "error":
+            self.on_engine_error(payload["message"])
+
+    def on_engine_error(self, message: str) -> None:
+        """Show that listening stopped because of an audio error"""
+        self.is_listening = False
+        self.status_reset_timer.stop()
+        self.listen_button.setChecked(False)
+        self.listen_button.setText(self.tr("Listen"))
+        self.status_label.setText(message)
+        self.status_label.setStyleSheet("color: red;")
 
-    def audio_processing_loop(self, device_id: Optional[int]) -> None:
-        """Main audio processing loop"""
-        try:
-            # Setup audio stream
-            def audio_callback(indata, frames, time, status):
-                if status:
-                    print(f"Audio callback status: {status}")
-
-                # Convert to the format expected by OpenWakeWord and Vosk
-                audio_data = indata[:, 0] if len(indata.shape) > 1 else indata
-                audio_data_int16 = (audio_data * 32767).astype(np.int16)
-
-                # Process with wake word detection
-                if self.oww_model is not None:
-                    try:
-                        # Get prediction scores
-                        prediction = self.oww_model.predict(audio_data_int16)
-
-                        # Check for wake word detection (adjust threshold as needed)
-                        for wake_word, score in prediction.items():
-                            if score > 0.5:  # Threshold for detection
-                                print("device_id", device_id)
-                                print(f"Wake word '{wake_word}' detected with score: {score}")
-                                self.wake_word_detected()
-                                break
-                    except Exception as e:
-                        print(f"Error in wake word detection: {e}")
-
-                # Process with Vosk speech recognition
-                if self.vosk_recognizer is not None:
-                    try:
-                        # Convert audio data to bytes for Vosk
-                        audio_bytes = audio_data_int16.tobytes()
-
-                        # Feed audio to Vosk recognizer
-                        if self.vosk_recognizer.AcceptWaveform(audio_bytes):
-                            # End of utterance detected (silence after speech)
-                            result = self.vosk_recognizer.Result()
-                            result_dict = json.loads(result)
-                            text = result_dict.get("text", "").strip()
-
-                            if text:
-                                print(f"Recognized speech: {text}")
-
-                        # Optionally, you can also get partial results during speech
-                        # partial_result = self.vosk_recognizer.PartialResult()
-                        # partial_dict = json.loads(partial_result)
-                        # partial_text = partial_dict.get('partial', '').strip()
-                        # if partial_text:
-                        #     print(f"Partial: {partial_text}")
-
-                    except Exception as e:
-                        print(f"Error in speech recognition: {e}")
-
-            # Start recording
-            with sd.InputStream(
-                device=device_id,
-                channels=1,
-                samplerate=self.sample_rate,
-                blocksize=self.chunk_size,
-                callback=audio_callback,
-                dtype=np.float32,
-            ):
-                print(f"Started listening on device {device_id}")
-                while self.is_listening:
-                    time.sleep(0.1)
+    def on_partial_result(self, text: str) -> None:
+        """Show the hypothesis of the utterance in progress"""
+        self.show_speech(text, partial=True)
 
-        except Exception as e:
-            print(f"Error in audio processing: {e}")
-            self.is_listening = False
+    def on_transcript(self, text: str) -> None:
+        """Replace the partial hypothesis with the final text"""
+        self.show_speech(text, partial=False)
+
+    def show_speech(self, text: str, partial: bool) -> None:
+        """Update the speech label, restyling and repainting only on changes"""
+        if partial != self.speech_is_partial:
+            self.speech_is_partial = partial
+            self.speech_label.setStyleSheet("color: gray; font-style: italic;" if partial else "")
+        if text != self.speech_label.text():
+            self.speech_label.setText(text)
+
+    def get_pipeline_stats(self) -> dict:
+        """Snapshot of capture and consumer counters"""
+        return self.engine.get_pipeline_stats()
 
     def wake_word_detected(self) -> None:
         """Handle wake word detection"""
@@ -733,8 +1222,8 @@ class MainWindow(QMainWindow):
         self.status_label.setText(self.tr("Wake word detected!"))
         self.status_label.setStyleSheet("color: blue; font-weight: bold;")
 
-        # Reset status after 2 seconds
-        threading.Timer(2.0, self.reset_listening_status).start()
+        # Reset status after 2 seconds, counted from the latest detection
+        self.status_reset_timer.start()
 
     def reset_listening_status(self) -> None:
         """Reset listening status after wake word detection"""
@@ -761,17 +1250,65 @@ class MainWindow(QMainWindow):
     def on_language_changed(self, language_text: str) -> None:
         """Handle language selection change"""
         language_code = self.language_codes.get(language_text, "en")
+        if language_code == self.current_language:
+            # Already applied, e.g. by apply_config
+            return
         self.load_language(language_code)
 
+        # Recognize speech in the new language too
+        self.select_model_for_language(language_code)
+
         # Save configuration after language change
         self.save_config()
 
+    def select_model_for_language(self, language_code: str) -> None:
+        """Switch to the installed Vosk model for a language, if there is one"""
+        info = self.model_registry.find(language=language_code)
+        if info is None:
+            print(f"No Vosk model installed for '{language_code}', keeping {self.selected_vosk_model()}")
+            return
+
+        index = self.model_combo.findData(info.name)
+        if index < 0:
+            return
+        if index != self.model_combo.currentIndex():
+            # Goes through on_model_selected, which saves the choice and swaps the model
+            self.model_combo.setCurrentIndex(index)
+        else:
+            # The rescan after retranslating may already show it without having switched
+            self.on_model_selected(index)
+
     def on_microphone_changed(self, microphone_text: str) -> None:
         """Handle microphone selection change"""
         if microphone_text and microphone_text != self.tr("No microphones found"):
+            # The selected microphone is not offered as an additional one
+            self.update_more_microphones()
             # Save configuration after microphone change
             self.save_config()
 
+    def on_more_microphones_changed(self) -> None:
+        """Handle an additional microphone being checked or unchecked"""
+        self.save_config()
+
+    def additional_microphones(self) -> list[str]:
+        """Checked microphones besides the one selected in the combo box"""
+        return [action.text() for action in self.more_microphones_menu.actions() if action.isChecked()]
+
+    def update_more_microphones(self) -> None:
+        """Offer every listed microphone except the selected one as an additional one"""
+        # The config is saved on every change, so it holds what was checked
+        checked = set(self.config.get("audio", {}).get("additional_microphones", []))
+        selected_mic = self.microphone_combo.currentText()
+        self.more_microphones_menu.clear()
+        for index in range(self.microphone_combo.count()):
+            microphone = self.microphone_combo.itemText(index)
+            if microphone == selected_mic or microphone == self.tr("No microphones found"):
+                continue
+            action = self.more_microphones_menu.addAction(microphone)
+            action.setCheckable(True)
+            action.setChecked(microphone in checked)
+        self.more_microphones_button.setEnabled(not self.more_microphones_menu.isEmpty())
+
     def load_language(self, language_code: str) -> None:
         """Load a language using QTranslator"""
         self.current_language = language_code
@@ -811,8 +1348,12 @@ class MainWindow(QMainWindow):
         self.setWindowTitle(self.tr("Aleva - Audio Language Assistant"))
         self.language_label.setText(self.tr("Language:"))
         self.microphone_label.setText(self.tr("Microphone:"))
+        self.more_microphones_button.setText(self.tr("Also"))
         self.refresh_button.setText(self.tr("Refresh"))
         self.model_label.setText(self.tr("Model:"))
+        self.import_model_button.setText(self.tr("Import"))
+        self.import_zip_action.setText(self.tr("From zip file..."))
+        self.import_folder_action.setText(self.tr("From folder..."))
         self.api_label.setText(self.tr("API URL:"))
         self.set_api_button.setText(self.tr("Set"))
 
@@ -839,88 +1380,52 @@ class MainWindow(QMainWindow):
         else:
             self.show_hide_action.setText(self.tr("Show"))
 
+        self.diagnostics_action.setText(self.tr("Diagnostics"))
         self.quit_action.setText(self.tr("Quit"))
         self.tray_icon.setToolTip(self.tr("Aleva - Click to show/hide"))
 
-        # Refresh microphones to update "No microphones found" text if needed
-        self.refresh_microphones()
+        # Update "No microphones found" text if needed
+        self.show_microphones()
 
     def refresh_microphones(self) -> None:
-        """Refresh the list of available microphones"""
+        """Re-read the available microphones from the system in the background"""
+        self.device_monitor.refresh()
+
+    def on_microphone_list_opened(self) -> None:
+        """Re-read the microphones unless the device monitor notices changes by itself
+
+        Re-reading re-initializes PortAudio, which is not worth doing every time
+        a list is opened where sound cards are watched anyway.
+        """
+        if not self.device_monitor.watches_cards:
+            self.device_monitor.refresh()
+
+    def on_microphones_changed(self, microphones: list[str]) -> None:
+        """Handle the device monitor finding a different set of microphones"""
+        self.microphones = microphones
+        self.show_microphones()
+
+    def show_microphones(self) -> None:
+        """Fill the microphone selector from the last enumeration"""
+        # Not a selection change: nothing is saved, and the configured microphone is selected again
+        self.microphone_combo.blockSignals(True)
         self.microphone_combo.clear()
 
-        try:
-            # Get list of audio devices
-            devices = sd.query_devices()
-            microphones = []
-            device_names = set()
-
-            # Virtual device keywords to filter out
-            virtual_keywords = [
-                "virtual",
-                "loopback",
-                "cable",
-                "mix",
-                "mixer",
-                "voicemeeter",
-                "obs",
-                "stream",
-                "capture",
-                "monitor",
-                "what u hear",
-                "stereo mix",
-                "wave",
-                "software",
-                "digital",
-                "system",
-                "aggregate",
-                "multi-output",
-            ]
-
-            for i, device in enumerate(devices):
-                # Check if device has input channels (microphone)
-                if device["max_input_channels"] > 0:
-                    device_name = device["name"].lower()
-                    if device_name in device_names:
-                        continue
-                    device_names.add(device_name)
-
-                    # Skip virtual devices by checking for virtual keywords
-                    is_virtual = any(keyword in device_name for keyword in virtual_keywords)
-
-                    # Additional checks for virtual devices
-                    # Skip devices with certain host API types that are typically virtual
-                    host_api = device.get("hostapi", -1)
-                    if host_api >= 0:
-                        try:
-                            host_api_info = sd.query_hostapis(host_api)
-                            host_api_name = host_api_info["name"].lower()
-                            # Skip certain host APIs that typically contain virtual devices
-                            if "wasapi" in host_api_name and "loopback" in device_name:
-                                is_virtual = True
-                        except Exception:
-                            pass
-
-                    # Only add non-virtual devices
-                    if not is_virtual:
-                        microphones.append(f"{device['name']} ({i})")
-
-            if microphones:
-                self.microphone_combo.addItems(microphones)
-
-                # Restore previously selected microphone if available
-                selected_mic = self.config.get("audio", {}).get("selected_microphone")
-                if selected_mic:
-                    index = self.microphone_combo.findText(selected_mic)
-                    if index >= 0:
-                        self.microphone_combo.setCurrentIndex(index)
-            else:
-                self.microphone_combo.addItem(self.tr("No microphones found"))
+        if self.microphones:
+            self.microphone_combo.addItems(self.microphones)
 
-        except Exception as e:
-            print(f"Error querying audio devices: {e}")
+            # Restore previously selected microphone if available, e.g. once it is plugged back in
+            selected_mic = self.config.get("audio", {}).get("selected_microphone")
+            if selected_mic:
+                index = self.microphone_combo.findText(selected_mic)
+                if index >= 0:
+                    self.microphone_combo.setCurrentIndex(index)
+        else:
             self.microphone_combo.addItem(self.tr("No microphones found"))
 
+        self.microphone_combo.blockSignals(False)
+        self.update_more_microphones()
+
     def closeEvent(self, event: QCloseEvent) -> None:
         """Override close event to hide instead of close"""
         if self.is_quitting:
@@ -951,13 +1456,28 @@ class MainWindow(QMainWindow):
         self._cleanup_called = True
 
         try:
-            # Save configuration before quitting
+            # Save configuration before quitting, without waiting for the debounce
             self.save_config()
+            self.config_store.flush()
 
             # Stop listening if active
             if self.is_listening:
                 self.stop_listening()
 
+            # Send and write what is still queued, then write a final metrics dump
+            self.engine.stop_delivery()
+            self.engine.stop_recording()
+            self.engine.stop_metrics_dump()
+
+            if self.device_change_filter is not None:
+                self.app.removeNativeEventFilter(self.device_change_filter)
+            self.device_monitor.stop()
+
+            # Model loading cannot be interrupted, wait for it to finish
+            if self.model_loader and self.model_loader.isRunning():
+                self.model_loader.wait()
+            self.model_registry.shutdown()
+
             # Hide and clean up tray icon
             if hasattr(self, "tray_icon") and self.tray_icon:
                 self.tray_icon.hide()
@@ -978,9 +1498,10 @@ class MainWindow(QMainWindow):
         self.close()
 
 
-def main():
-    """Main entry point"""
+def main(import_seconds: Optional[float] = None):
+    """Main entry point, ``import_seconds`` is how long the caller took to import this module"""
     app = QApplication(sys.argv)
+    app.setApplicationName(APP_NAME)
 
     # Check if system tray is available
     if not QSystemTrayIcon.isSystemTrayAvailable():
@@ -991,7 +1512,7 @@ def main():
     app.setQuitOnLastWindowClosed(False)
 
     # Create and show main window
-    window = MainWindow(app)
+    window = MainWindow(app, import_seconds)
     window.show()
 
     try:
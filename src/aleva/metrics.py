@@ -0,0 +1,304 @@
+"""
+Lightweight counters, gauges and latency histograms for the audio pipeline.
+
+Metrics are plain Python objects that the hot path updates without locks, so
+each one must be written by a single thread (one capture callback or one
+consumer) or only while its owner holds a lock; readers just take snapshots.
+Work spread over several threads registers one labelled series per writer,
+e.g. ``{device="1"}``, instead of sharing a metric. Snapshots can be rendered
+as JSON or as Prometheus text and written to a file on an interval for
+scraping.
+"""
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Optional
+
+# Upper bounds in seconds, from microsecond callbacks to slow Vosk batches
+LATENCY_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+)
+
+
+def format_labels(labels: dict) -> str:
+    """Render labels the way Prometheus text does, e.g. ``{thread="speech"}``"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+
+class Counter:
+    """Monotonic count, either incremented or read from ``func``"""
+
+    kind = "counter"
+
+    def __init__(
+        self, name: str, description: str, labels: Optional[dict] = None, func: Optional[Callable[[], float]] = None
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.func = func
+        self._value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        """Add ``amount`` to the count; only from the metric's one writer"""
+        self._value += amount
+
+    @property
+    def value(self) -> float:
+        """Current value"""
+        return self.func() if self.func is not None else self._value
+
+
+class Gauge(Counter):
+    """Value that can go up and down, either set or read from ``func``"""
+
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        """Replace the current value"""
+        self._value = value
+
+
+class Histogram:
+    """Fixed-bucket histogram of observed values"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Optional[dict] = None, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels or {}
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus the overflow (+Inf) slot, as C integers so observing keeps no new objects
+        self.counts = array("q", [0] * (len(self.buckets) + 1))
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one value; only from the metric's one writer"""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, pct: float) -> float:
+        """Estimate a percentile by interpolating inside the matching bucket"""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return 0.0
+
+        rank = pct / 100 * total
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    # Nothing to interpolate towards above the last bound
+                    return lower
+                fraction = (rank - seen) / bucket_count
+                return lower + (self.buckets[index] - lower) * fraction
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        """Count, sum, mean, estimated p50/p99 and cumulative bucket counts"""
+        cumulative = 0
+        buckets = {}
+        for bound, bucket_count in zip((*self.buckets, math.inf), list(self.counts), strict=True):
+            cumulative += bucket_count
+            buckets["+Inf" if bound == math.inf else repr(bound)] = cumulative
+        count = self.count
+        return {
+            "count": count,
+            "sum": self.sum,
+            "mean": self.sum / count if count else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets": buckets,
+        }
+
+
+class ThreadCpuMeter:
+    """CPU usage of the thread that calls ``update``, or of the work charged with ``add``
+
+    The owning thread refreshes ``percent`` about once per ``window`` seconds,
+    so readers on other threads only ever look at plain attributes.
+    """
+
+    def __init__(self, window: float = 1.0) -> None:
+        self.window = window
+        self.cpu_seconds = 0.0
+        self.percent = 0.0
+        self._mark_wall: Optional[float] = None
+        self._mark_cpu = 0.0
+
+    def update(self, now: Optional[float] = None) -> None:
+        """Sample this thread's CPU time, ``now`` is the caller's perf_counter reading"""
+        self.record(time.thread_time(), now)
+
+    def add(self, seconds: float, now: Optional[float] = None) -> None:
+        """Charge CPU time that some worker thread spent on the owner's behalf"""
+        self.record(self.cpu_seconds + seconds, now)
+
+    def record(self, cpu: float, now: Optional[float] = None) -> None:
+        """Take a new total of CPU seconds and refresh ``percent``"""
+        now = time.perf_counter() if now is None else now
+        self.cpu_seconds = cpu
+        if self._mark_wall is None:
+            self._mark_wall, self._mark_cpu = now, cpu
+            return
+
+        elapsed = now - self._mark_wall
+        if elapsed >= self.window:
+            self.percent = 100.0 * (cpu - self._mark_cpu) / elapsed
+            self._mark_wall, self._mark_cpu = now, cpu
+
+
+class MetricsRegistry:
+    """Named collection of metrics with JSON and Prometheus text output"""
+
+    def __init__(self) -> None:
+        self.metrics: dict[tuple, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        key = (metric.name, tuple(sorted(metric.labels.items())))
+        with self._lock:
+            # Re-registering replaces the old metric, e.g. when a pipeline restarts
+            self.metrics[key] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Optional[dict] = None, func=None) -> Counter:
+        """Register a counter"""
+        return self._register(Counter(name, description, labels, func))
+
+    def gauge(self, name: str, description: str, labels: Optional[dict] = None, func=None) -> Gauge:
+        """Register a gauge"""
+        return self._register(Gauge(name, description, labels, func))
+
+    def histogram(
+        self, name: str, description: str, labels: Optional[dict] = None, buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        """Register a histogram"""
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def collect(self) -> list:
+        """Registered metrics in registration order"""
+        with self._lock:
+            return list(self.metrics.values())
+
+    def snapshot(self) -> dict:
+        """Current values keyed by ``name{labels}``"""
+        values = {}
+        for metric in self.collect():
+            key = metric.name + format_labels(metric.labels)
+            try:
+                values[key] = metric.snapshot() if isinstance(metric, Histogram) else metric.value
+            except Exception as e:
+                print(f"Error reading metric {key}: {e}")
+        return {"time": time.time(), "metrics": values}
+
+    def to_json(self) -> str:
+        """Render a snapshot as JSON"""
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        described = set()
+        # All series of one metric name must follow its HELP/TYPE lines
+        metrics = self.collect()
+        order = {}
+        for metric in metrics:
+            order.setdefault(metric.name, len(order))
+        for metric in sorted(metrics, key=lambda metric: order[metric.name]):
+            if metric.name not in described:
+                described.add(metric.name)
+                lines.append(f"# HELP {metric.name} {metric.description}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            if isinstance(metric, Histogram):
+                snapshot = metric.snapshot()
+                for bound, cumulative in snapshot["buckets"].items():
+                    labels = format_labels({**metric.labels, "le": bound})
+                    lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                labels = format_labels(metric.labels)
+                lines.append(f"{metric.name}_sum{labels} {snapshot['sum']}")
+                lines.append(f"{metric.name}_count{labels} {snapshot['count']}")
+            else:
+                try:
+                    value = metric.value
+                except Exception:
+                    continue
+                lines.append(f"{metric.name}{format_labels(metric.labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path) -> None:
+        """Atomically write a dump, as Prometheus text for ``.prom``/``.txt`` files and JSON otherwise"""
+        path = Path(path)
+        text = self.to_prometheus() if path.suffix in (".prom", ".txt") else self.to_json()
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Scrapers must never see a half-written file
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+
+class MetricsDumper(threading.Thread):
+    """Background thread that writes a registry dump every ``interval`` seconds"""
+
+    def __init__(self, registry: MetricsRegistry, path: Path, interval: float = 10.0) -> None:
+        super().__init__(name="aleva-metrics", daemon=True)
+        self.registry = registry
+        self.path = Path(path)
+        self.interval = max(interval, 0.1)
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        """Dump until stopped"""
+        while not self._stop_event.wait(self.interval):
+            self.dump()
+
+    def dump(self) -> None:
+        """Write one dump, logging instead of raising on failure"""
+        try:
+            self.registry.write(self.path)
+        except Exception as e:
+            print(f"Error writing metrics to {self.path}: {e}")
+
+    def stop(self, timeout: Optional[float] = 1.0) -> None:
+        """Stop the thread and write one last dump"""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout=timeout)
+        self.dump()
@@ -0,0 +1,227 @@
+"""
+Registry of installed Vosk models.
+
+Knows every model directory under ``models/`` (plus ``models.vosk_model_path``
+when it points elsewhere) by name, language, size and path, and keeps recently
+used models loaded. Loaded models live in an LRU whose estimated memory is kept
+under a cap, so switching back to a resident model is a pointer swap instead of
+a multi-second reload. Models can be preloaded on a background thread.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from .engine import VOSK_MODEL_NAME
+from .install import is_vosk_model
+
+# Vosk model names use a few codes that differ from the UI language codes
+VOSK_LANGUAGE_CODES = {"cn": "zh"}
+
+
+@dataclass(frozen=True)
+class ModelInfo:
+    """An installed Vosk model"""
+
+    name: str
+    language: str
+    path: Path
+    size_bytes: int
+
+    @property
+    def size_mb(self) -> float:
+        """Size on disk in MiB"""
+        return self.size_bytes / (1024 * 1024)
+
+
+def model_language(name: str) -> str:
+    """Language code from a Vosk model name, e.g. ``vosk-model-small-cn-0.22`` -> ``zh``"""
+    parts = [part for part in name.lower().split("-") if part not in ("vosk", "model", "small")]
+    if not parts:
+        return ""
+    return VOSK_LANGUAGE_CODES.get(parts[0], parts[0])
+
+
+def directory_size(path: Path) -> int:
+    """Total size of the files below ``path``"""
+    return sum(entry.stat().st_size for entry in path.rglob("*") if entry.is_file())
+
+
+class ModelRegistry:
+    """Installed Vosk models and an LRU of the ones currently loaded
+
+    The memory of a loaded model is estimated from its size on disk, which is
+    dominated by the graph and acoustic model that Vosk reads into memory. The
+    most recently used model always stays resident, even above the cap.
+    """
+
+    def __init__(
+        self,
+        models_dir: Path,
+        memory_cap_mb: float = 6144,
+        loader: Optional[Callable[[Path], object]] = None,
+    ) -> None:
+        self.models_dir = Path(models_dir)
+        self.memory_cap_bytes = int(memory_cap_mb * 1024 * 1024)
+        self.loader = loader
+        self.extra_paths: list[Path] = []
+        self.models: dict[str, ModelInfo] = {}
+
+        self._resident: OrderedDict[str, object] = OrderedDict()
+        self._loading: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def resolve_path(self, model_path) -> Path:
+        """Model path from config: absolute, or relative to the models directory"""
+        path = Path(model_path).expanduser()
+        return path if path.is_absolute() else self.models_dir / path
+
+    def scan(self, extra_paths: Optional[list] = None) -> list[ModelInfo]:
+        """Find installed models, including any configured outside the models directory"""
+        if extra_paths is not None:
+            self.extra_paths = [self.resolve_path(path) for path in extra_paths if path]
+
+        candidates = sorted(self.models_dir.iterdir()) if self.models_dir.is_dir() else []
+        candidates += self.extra_paths
+        models = {}
+        for path in candidates:
+            if path.name.startswith(".") or path.name in models or not is_vosk_model(path):
+                continue
+            try:
+                models[path.name] = ModelInfo(path.name, model_language(path.name), path, directory_size(path))
+            except OSError as e:
+                print(f"Error reading model {path}: {e}")
+
+        with self._lock:
+            self.models = models
+            # Forget models that were uninstalled
+            for name in list(self._resident):
+                if name not in models:
+                    del self._resident[name]
+        return list(models.values())
+
+    def find(self, name: Optional[str] = None, language: Optional[str] = None) -> Optional[ModelInfo]:
+        """Installed model by name or, failing that, the largest one for a language"""
+        if name and name in self.models:
+            return self.models[name]
+        if language:
+            matches = [info for info in self.models.values() if info.language == language]
+            if matches:
+                # The small models are the fallback, prefer the full one
+                return max(matches, key=lambda info: info.size_bytes)
+        return None
+
+    def select(self, model_path=None, language: Optional[str] = None) -> Optional[ModelInfo]:
+        """Model to use: the configured one, else one for ``language``, else the default model or any installed one"""
+        if model_path:
+            info = self.find(self.resolve_path(model_path).name)
+            if info is not None:
+                return info
+            print(f"Configured Vosk model not found: {model_path}")
+        return self.find(language=language) or self.find(VOSK_MODEL_NAME) or next(iter(self.models.values()), None)
+
+    def is_resident(self, name: str) -> bool:
+        """Whether the model is loaded and ready for a pointer swap"""
+        with self._lock:
+            return name in self._resident
+
+    def resident_names(self) -> list[str]:
+        """Loaded models, least recently used first"""
+        with self._lock:
+            return list(self._resident)
+
+    def resident_bytes(self) -> int:
+        """Estimated memory of all loaded models"""
+        with self._lock:
+            return sum(self.models[name].size_bytes for name in self._resident if name in self.models)
+
+    def get(self, name: str):
+        """Loaded model for ``name``, loading it on the calling thread if needed
+
+        Returns None if the model is unknown or fails to load. A preload that is
+        already running is waited for instead of loading twice.
+        """
+        with self._lock:
+            if name in self._resident:
+                self._resident.move_to_end(name)
+                return self._resident[name]
+            future = self._loading.get(name)
+            if future is None:
+                # This thread loads it, others asking meanwhile wait for the result
+                future = self._loading[name] = Future()
+                loading = True
+            else:
+                loading = False
+
+        if not loading:
+            return future.result()
+
+        try:
+            model = self._load(name)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        future.set_result(model)
+        return model
+
+    def preload(self, name: str) -> Optional[Future]:
+        """Start loading a model on the background thread, if it is not loaded yet"""
+        with self._lock:
+            if name not in self.models or name in self._resident:
+                return None
+            if name in self._loading:
+                return self._loading[name]
+            # Never preload something that would immediately push out what is in use
+            if self._estimated_bytes_with(name) > self.memory_cap_bytes:
+                print(f"Not preloading {name}: memory cap of {self.memory_cap_bytes // (1024 * 1024)} MB")
+                return None
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="aleva-preload")
+            future = self._executor.submit(self._load, name, True)
+            self._loading[name] = future
+        return future
+
+    def _estimated_bytes_with(self, name: str) -> int:
+        """Resident size if ``name`` were loaded too; call with the lock held"""
+        names = set(self._resident) | {name}
+        return sum(self.models[model].size_bytes for model in names if model in self.models)
+
+    def _load(self, name: str, preloading: bool = False):
+        """Load a model and add it to the LRU"""
+        info = self.models.get(name)
+        model = None
+        try:
+            if info is not None and self.loader is not None:
+                print(f"{'Preloading' if preloading else 'Loading'} Vosk model {name} ({info.size_mb:.0f} MB)")
+                model = self.loader(info.path)
+        finally:
+            with self._lock:
+                self._loading.pop(name, None)
+                if model is not None:
+                    self._resident[name] = model
+                    if preloading:
+                        # A preload is a guess, keep what is in use more recent
+                        self._resident.move_to_end(name, last=False)
+                    else:
+                        self._resident.move_to_end(name)
+                    self._evict()
+        return model
+
+    def _evict(self) -> None:
+        """Drop least recently used models until under the cap; call with the lock held"""
+        while len(self._resident) > 1:
+            total = sum(self.models[name].size_bytes for name in self._resident if name in self.models)
+            if total <= self.memory_cap_bytes:
+                break
+            name, _ = self._resident.popitem(last=False)
+            print(f"Unloading Vosk model {name} to stay under the memory cap")
+
+    def shutdown(self) -> None:
+        """Stop the preload thread after any running load"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
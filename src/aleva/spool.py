@@ -0,0 +1,165 @@
+"""
+Bounded on-disk spool of recognized utterances.
+
+When recording is enabled, the speech thread hands the audio of every
+utterance Vosk finalized with text to ``UtteranceSpool.submit``, which only
+queues it. A background thread encodes it as 16-bit mono PCM WAV, writes it
+together with a JSON sidecar holding the transcript, and deletes the oldest
+recordings once the spool grows past its size limit. Qt-free.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import wave
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from .metrics import MetricsRegistry
+
+# Upper bounds in seconds for writing one recording
+WRITE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Utterances waiting to be written at most; more are dropped rather than held in memory
+MAX_PENDING = 16
+
+
+class UtteranceSpool(threading.Thread):
+    """Writes utterance recordings to ``directory`` and keeps it under ``max_bytes``
+
+    Each recording is ``<timestamp>.wav`` plus ``<timestamp>.json`` with the
+    text, UTC time, duration, Vosk model and whether the audio was cut at
+    ``max_utterance_seconds``. Eviction removes whole recordings, oldest first.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: int,
+        sample_rate: int = 16000,
+        max_utterance_seconds: float = 30.0,
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        super().__init__(name="aleva-spool", daemon=True)
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.max_utterance_seconds = max_utterance_seconds
+        self.queue: queue.Queue = queue.Queue(maxsize=MAX_PENDING)
+        # submit() runs on the speech consumer of every microphone, dropped has to be counted under it
+        self._drop_lock = threading.Lock()
+
+        # Recordings on disk, oldest first: stem -> bytes used by its files
+        self.recordings: dict[str, int] = {}
+        self.total_bytes = 0
+
+        metrics = metrics or MetricsRegistry()
+        self.write_seconds = metrics.histogram(
+            "aleva_spool_write_seconds", "Time to encode and write one utterance", buckets=WRITE_BUCKETS
+        )
+        self.saved = metrics.counter("aleva_spool_utterances_total", "Utterances written to the spool")
+        self.dropped = metrics.counter("aleva_spool_dropped_total", "Utterances dropped because writing fell behind")
+        self.evicted = metrics.counter("aleva_spool_evicted_total", "Recordings deleted to stay under the size limit")
+        self.failed = metrics.counter("aleva_spool_errors_total", "Utterances that could not be written")
+        metrics.gauge("aleva_spool_bytes", "Size of the utterance spool on disk", func=lambda: self.total_bytes)
+
+    @property
+    def max_samples(self) -> int:
+        """Samples kept per utterance"""
+        return int(self.sample_rate * self.max_utterance_seconds)
+
+    def submit(self, samples, text: str, truncated: bool = False, model: Optional[str] = None) -> None:
+        """Queue int16 samples of a finished utterance; never blocks"""
+        try:
+            self.queue.put_nowait((samples, text, truncated, model, time.time()))
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped.inc()
+
+    def run(self) -> None:
+        """Write queued utterances until stopped"""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.scan()
+        except OSError as e:
+            print(f"Error opening utterance spool {self.directory}: {e}")
+
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            started = time.perf_counter()
+            try:
+                self.write(*item)
+                self.evict()
+            except Exception as e:
+                # One bad utterance must not stop the spool, later ones would all be dropped
+                self.failed.inc()
+                print(f"Error writing utterance recording: {e}")
+            self.write_seconds.observe(time.perf_counter() - started)
+
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        """Stop after writing what is queued"""
+        if self.is_alive():
+            # Blocking put: the sentinel must not be dropped when the queue is full
+            self.queue.put(None)
+            self.join(timeout=timeout)
+
+    def scan(self) -> None:
+        """Index recordings left by earlier runs"""
+        self.recordings = {}
+        for path in sorted(self.directory.iterdir()):
+            if path.suffix in (".wav", ".json") and path.is_file():
+                self.recordings[path.stem] = self.recordings.get(path.stem, 0) + path.stat().st_size
+        self.total_bytes = sum(self.recordings.values())
+
+    def write(self, samples, text: str, truncated: bool, model: Optional[str], timestamp: float) -> None:
+        """Encode one utterance and its metadata, each written atomically"""
+        recorded = datetime.fromtimestamp(timestamp, timezone.utc)
+        # The timestamp names sort oldest first, which is the eviction order
+        stem = recorded.strftime("%Y%m%d-%H%M%S-%f")
+        wav_path = self.directory / f"{stem}.wav"
+        json_path = self.directory / f"{stem}.json"
+
+        wav_temp = wav_path.with_name(f".{wav_path.name}.tmp")
+        json_temp = json_path.with_name(f".{json_path.name}.tmp")
+        try:
+            with wave.open(str(wav_temp), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(self.sample_rate)
+                wav.writeframes(memoryview(samples).cast("B"))
+            os.replace(wav_temp, wav_path)
+
+            metadata = {
+                "text": text,
+                "time": recorded.isoformat(),
+                "duration": len(samples) / self.sample_rate,
+                "sample_rate": self.sample_rate,
+                "truncated": truncated,
+                "model": model,
+            }
+            json_temp.write_text(json.dumps(metadata, ensure_ascii=False), encoding="utf-8")
+            os.replace(json_temp, json_path)
+        except Exception:
+            # Neither half-written files nor audio without its metadata are left behind
+            for path in (wav_temp, json_temp, wav_path, json_path):
+                path.unlink(missing_ok=True)
+            raise
+
+        size = wav_path.stat().st_size + json_path.stat().st_size
+        self.recordings[stem] = size
+        self.total_bytes += size
+        self.saved.inc()
+
+    def evict(self) -> None:
+        """Delete the oldest recordings until the spool fits ``max_bytes``"""
+        while self.total_bytes > self.max_bytes and self.recordings:
+            stem = next(iter(self.recordings))
+            self.total_bytes -= self.recordings.pop(stem)
+            for suffix in (".wav", ".json"):
+                (self.directory / f"{stem}{suffix}").unlink(missing_ok=True)
+            self.evicted.inc()
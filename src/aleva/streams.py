@@ -0,0 +1,204 @@
+"""
+Per-microphone listening state.
+
+Listening on several microphones runs one capture stream per device. The
+loaded models are shared: every stream scores with the same OpenWakeWord ONNX
+sessions and decodes with the same Vosk model, but has its own feature
+buffers, detector and recognizer. ``StreamDeduplicator`` keeps microphones that
+hear the same utterance from reporting it twice. Qt-free, and numpy is not
+needed to import it.
+"""
+
+import copy
+import threading
+import time
+from collections import deque
+from difflib import SequenceMatcher
+from typing import Optional
+
+
+def device_label(device_id: Optional[int]) -> str:
+    """Name of a device in stats and logs"""
+    return "default" if device_id is None else str(device_id)
+
+
+def share_wake_word_model(oww_model):
+    """OpenWakeWord model with its own audio state, sharing ``oww_model``'s ONNX sessions
+
+    ONNX Runtime sessions can run on several threads at once, so only the
+    buffers that ``predict()`` updates are duplicated: the audio and feature
+    buffers, the prediction history and the state of the Silero VAD.
+    """
+    model = copy.copy(oww_model)
+    preprocessor = model.preprocessor = copy.copy(oww_model.preprocessor)
+    preprocessor.raw_data_buffer = deque(maxlen=oww_model.preprocessor.raw_data_buffer.maxlen)
+    if getattr(oww_model, "vad", None) is not None:
+        model.vad = copy.copy(oww_model.vad)
+        model.vad.prediction_buffer = deque(maxlen=oww_model.vad.prediction_buffer.maxlen)
+        model.vad.reset_states()
+    # Replaces the prediction history and every feature buffer
+    model.reset()
+    return model
+
+
+class StreamMetrics:
+    """Latency histograms and wake word count of one microphone
+
+    Metrics are updated without locks, so every series must have a single
+    writer. These are labelled with the device and written only by its
+    capture callback or by one of its two consumers, which the scheduler never
+    steps on two workers at once.
+    """
+
+    def __init__(self, registry, label: str, swap_buckets) -> None:
+        labels = {"device": label}
+        # Capture callback
+        self.callback_seconds = registry.histogram("aleva_callback_seconds", "Capture callback duration", labels)
+        # Wake word consumer
+        self.predict_seconds = registry.histogram(
+            "aleva_wake_word_predict_seconds", "Wake word model predict() time", labels
+        )
+        self.detections = registry.counter(
+            "aleva_wake_word_detections_total",
+            "Wake word detections after smoothing, patience, refractory period and de-duplication",
+            labels,
+        )
+        # Speech consumer
+        self.accept_seconds = registry.histogram(
+            "aleva_vosk_accept_waveform_seconds", "Vosk AcceptWaveform() time", labels
+        )
+        self.swap_seconds = registry.histogram(
+            "aleva_model_swap_seconds",
+            "Time from a model switch until the new recognizer runs",
+            labels,
+            buckets=swap_buckets,
+        )
+
+
+class DeviceStream:
+    """Pipeline state of one microphone
+
+    The engine builds the ring buffer, consumers and gates when listening
+    starts. The first stream uses the engine's own wake word model and
+    recognizer, the others get their own view of the same weights.
+    """
+
+    def __init__(self, index: int, device_id: Optional[int]) -> None:
+        self.index = index
+        self.device_id = device_id
+        self.label = device_label(device_id)
+
+        self.ring = None
+        self.capture_stats = None
+        self.callback = None
+        self.consumers: list = []
+        self.metrics: Optional[StreamMetrics] = None
+        self.recognition_gate = None
+        self.activity_gate = None
+        self.detector = None
+
+        # Vosk recognizer of this stream, and one waiting for an utterance boundary
+        self.recognizer = None
+        self.pending_recognizer: Optional[tuple] = None
+
+        self._shared_model = None
+        self._wake_word_model = None
+
+    def wake_word_model(self, shared):
+        """This stream's view of the engine's current wake word model"""
+        if shared is not self._shared_model:
+            self._shared_model = shared
+            self._wake_word_model = shared if shared is None or self.index == 0 else share_wake_word_model(shared)
+        return self._wake_word_model
+
+    def stats(self) -> dict:
+        """Snapshot of capture and consumer counters"""
+        if self.capture_stats is None:
+            return {}
+
+        stats = {
+            "device_id": self.device_id,
+            "blocks": self.capture_stats.blocks,
+            "samples": self.capture_stats.samples,
+            "input_overflows": self.capture_stats.input_overflows,
+            "input_underflows": self.capture_stats.input_underflows,
+            "status_errors": self.capture_stats.status_errors,
+            "consumers": {},
+        }
+        if self.recognition_gate is not None:
+            stats["gate"] = {
+                "open": self.recognition_gate.is_open,
+                "activations": self.recognition_gate.activations,
+                "timeouts": self.recognition_gate.timeouts,
+            }
+        for consumer in self.consumers:
+            reader = consumer.reader
+            stats["consumers"][reader.name] = {
+                "queue_depth": reader.depth,
+                "overruns": reader.overruns,
+                "dropped_samples": reader.dropped_samples,
+                "frames_processed": consumer.frames_processed,
+                "errors": consumer.errors,
+            }
+        return stats
+
+
+class StreamDeduplicator:
+    """Reports an utterance heard by several microphones once
+
+    Times are when the audio was captured, so a stream whose consumers lag
+    behind still lines up with the others. Within ``window`` seconds:
+
+    - a wake word already detected on another microphone is dropped;
+    - a transcript at least ``similarity`` alike to one from another
+      microphone is dropped;
+    - partial results come from the first microphone that started hearing
+      speech, until its utterance ends.
+
+    One microphone never suppresses itself. Safe to call from any thread.
+    """
+
+    def __init__(self, window: float = 2.0, similarity: float = 0.8) -> None:
+        self.window = window
+        self.similarity = similarity
+        self.suppressed = 0
+        self._wake_words: dict[str, tuple[float, Optional[int]]] = {}
+        self._transcripts: deque = deque()
+        self._partial_owner: Optional[tuple[Optional[int], float]] = None
+        self._lock = threading.Lock()
+
+    def wake_word(self, device_id: Optional[int], wake_word: str, captured: float) -> bool:
+        """Whether a detection should be reported"""
+        with self._lock:
+            last = self._wake_words.get(wake_word)
+            if last is not None and last[1] != device_id and abs(captured - last[0]) < self.window:
+                self.suppressed += 1
+                return False
+            self._wake_words[wake_word] = (captured, device_id)
+            return True
+
+    def transcript(self, device_id: Optional[int], text: str, captured: float) -> bool:
+        """Whether a final transcript should be reported"""
+        normalized = " ".join(text.lower().split())
+        with self._lock:
+            while self._transcripts and captured - self._transcripts[0][0] > self.window:
+                self._transcripts.popleft()
+            for when, device, other in self._transcripts:
+                if device == device_id or abs(captured - when) >= self.window:
+                    continue
+                if SequenceMatcher(None, normalized, other).ratio() >= self.similarity:
+                    self.suppressed += 1
+                    return False
+            self._transcripts.append((captured, device_id, normalized))
+            return True
+
+    def partial(self, device_id: Optional[int], text: str) -> bool:
+        """Whether a partial result should be reported; ``""`` ends the device's utterance"""
+        now = time.monotonic()
+        with self._lock:
+            owner = self._partial_owner
+            if owner is not None and owner[0] != device_id and now - owner[1] < self.window:
+                return False
+            # Refreshed with every partial, so a stream that stops reporting loses the turn
+            self._partial_owner = (device_id, now) if text else None
+            return True
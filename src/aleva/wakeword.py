@@ -0,0 +1,107 @@
+"""
+Wake word decision stage.
+
+OpenWakeWord scores every 80 ms frame, and a spoken wake word usually stays
+above the threshold for several frames in a row. ``WakeWordDetector`` turns
+that score stream into one detection per utterance: scores are smoothed over a
+few frames, have to stay above the model's threshold for ``patience`` frames,
+and after a detection everything is ignored for a refractory period. Time is
+counted in frames, so live capture and file replay behave the same.
+"""
+
+from collections import deque
+from typing import Optional
+
+from .config import WAKE_WORD_FRAME_SIZE
+
+
+class WakeWordDetector:
+    """One detection per utterance from per-frame wake word scores
+
+    ``thresholds`` overrides ``threshold`` per model, keyed like the scores
+    OpenWakeWord returns (the model file name without extension).
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.5,
+        thresholds: Optional[dict[str, float]] = None,
+        smoothing: int = 2,
+        patience: int = 2,
+        refractory_seconds: float = 2.0,
+        frame_seconds: float = WAKE_WORD_FRAME_SIZE / 16000,
+    ) -> None:
+        self.threshold = threshold
+        self.thresholds = thresholds or {}
+        self.smoothing = max(1, smoothing)
+        self.patience = max(1, patience)
+        self.refractory_frames = round(refractory_seconds / frame_seconds)
+        self.frame_seconds = frame_seconds
+
+        self.frames = 0
+        self.detections = 0
+        self._history: dict[str, deque] = {}
+        self._streaks: dict[str, int] = {}
+        self._quiet_until = 0
+
+    @classmethod
+    def from_config(cls, audio_config: dict, frame_seconds: float = WAKE_WORD_FRAME_SIZE / 16000) -> "WakeWordDetector":
+        """Detector set up from the ``audio`` section of the configuration"""
+        return cls(
+            threshold=audio_config.get("wake_word_threshold", 0.5),
+            thresholds=audio_config.get("wake_word_thresholds", {}),
+            smoothing=audio_config.get("wake_word_smoothing", 2),
+            patience=audio_config.get("wake_word_patience", 2),
+            refractory_seconds=audio_config.get("wake_word_refractory", 2.0),
+            frame_seconds=frame_seconds,
+        )
+
+    def threshold_for(self, wake_word: str) -> float:
+        """Threshold that applies to one model"""
+        return self.thresholds.get(wake_word, self.threshold)
+
+    def process(self, scores: dict) -> Optional[tuple[str, float]]:
+        """Feed one frame's scores; returns ``(wake_word, smoothed score)`` on a detection"""
+        self.frames += 1
+        if self.frames <= self._quiet_until:
+            return None
+
+        for wake_word, score in scores.items():
+            history = self._history.get(wake_word)
+            if history is None:
+                history = self._history[wake_word] = deque(maxlen=self.smoothing)
+            history.append(float(score))
+            smoothed = sum(history) / len(history)
+
+            if smoothed < self.threshold_for(wake_word):
+                self._streaks[wake_word] = 0
+                continue
+
+            streak = self._streaks.get(wake_word, 0) + 1
+            self._streaks[wake_word] = streak
+            if streak >= self.patience:
+                self.detections += 1
+                self._quiet_until = self.frames + self.refractory_frames
+                # The scores of this utterance must not count towards the next detection
+                self._history.clear()
+                self._streaks.clear()
+                return wake_word, smoothed
+        return None
+
+    def skip(self) -> None:
+        """Count a frame that was not scored; silence breaks any streak"""
+        self.frames += 1
+        self._history.clear()
+        self._streaks.clear()
+
+    @property
+    def seconds(self) -> float:
+        """Audio time covered by the frames processed so far"""
+        return self.frames * self.frame_seconds
+
+    def reset(self) -> None:
+        """Forget all state, e.g. before the next file"""
+        self.frames = 0
+        self._history.clear()
+        self._streaks.clear()
+        self._quiet_until = 0
@@ -0,0 +1,183 @@
+"""Ring buffer readers and the gates in front of the models"""
+
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from aleva.audio import AudioRingBuffer, RecognitionGate, VoiceActivityGate  # noqa: E402
+
+SAMPLE_RATE = 16000
+FRAME_SIZE = 4000
+WAKE_WORD_FRAME = 1280
+
+
+def test_recognition_gate_rewinds_by_the_pre_roll():
+    ring = AudioRingBuffer(SAMPLE_RATE * 2, dtype=np.int16)
+    reader = ring.add_reader("speech")
+    gate = RecognitionGate(pre_roll_samples=8000, max_active_samples=SAMPLE_RATE * 10)
+
+    ring.write(np.arange(SAMPLE_RATE, dtype=np.int16))
+    # Closed: the reader is kept at the write position
+    assert not gate.poll(reader)
+    assert reader.depth == 0
+
+    ring.write(np.arange(SAMPLE_RATE, SAMPLE_RATE + 1000, dtype=np.int16))
+    gate.request_open()
+    assert gate.poll(reader)
+    assert gate.is_open and gate.activations == 1
+    # The pre-roll up to the newest sample
+    assert reader.depth == 8000
+    out = np.zeros(1000, dtype=np.int16)
+    assert reader.read_into(out)
+    assert out[0] == SAMPLE_RATE + 1000 - 8000
+
+    # Opening an open gate neither rewinds nor counts again
+    gate.request_open()
+    assert gate.poll(reader)
+    assert gate.activations == 1
+
+
+def test_recognition_gate_closes_after_max_active_samples():
+    gate = RecognitionGate(pre_roll_samples=8000, max_active_samples=12000)
+    gate.is_open = True
+    assert not gate.advance(FRAME_SIZE)
+    assert not gate.advance(FRAME_SIZE)
+    assert gate.advance(FRAME_SIZE)
+    assert gate.timeouts == 1
+
+    gate.close()
+    assert not gate.is_open
+    assert gate.active_samples == 0
+
+
+def test_recognition_gate_pre_roll():
+    gate = RecognitionGate(pre_roll_samples=8000, max_active_samples=SAMPLE_RATE * 10)
+    assert not gate.past_pre_roll(FRAME_SIZE)
+    gate.advance(FRAME_SIZE)
+    assert not gate.past_pre_roll(FRAME_SIZE)
+    gate.advance(FRAME_SIZE)
+    assert gate.past_pre_roll(FRAME_SIZE)
+
+
+def frame_at(amplitude: int) -> np.ndarray:
+    """Wake word frame of constant level, 20 * log10(amplitude / 32768) dB"""
+    return np.full(WAKE_WORD_FRAME, amplitude, dtype=np.int16)
+
+
+def no_replay(frame):
+    raise AssertionError("nothing should be replayed")
+
+
+def test_voice_activity_gate_noise_floor_falls_fast_and_rises_slowly():
+    gate = VoiceActivityGate(WAKE_WORD_FRAME, history_frames=0, floor_rise_db=0.1)
+    quiet = gate.level_db(frame_at(33))
+    gate.admit(frame_at(33), no_replay)
+    assert gate.noise_floor == pytest.approx(quiet)
+
+    # Louder background only pulls the floor up by floor_rise_db per frame
+    for _ in range(10):
+        gate.admit(frame_at(100), no_replay)
+    assert gate.noise_floor == pytest.approx(quiet + 1.0)
+
+    # A quieter frame moves it 30 % of the way down at once
+    floor = gate.noise_floor
+    gate.admit(frame_at(10), no_replay)
+    assert gate.noise_floor == pytest.approx(floor + 0.3 * (gate.level_db(frame_at(10)) - floor))
+
+
+def test_voice_activity_gate_opens_above_the_margin_and_closes_after_the_hangover():
+    gate = VoiceActivityGate(WAKE_WORD_FRAME, history_frames=0, margin_db=8.0, hangover_frames=3)
+    # Open at first, then closed once the hangover of quiet frames ran out
+    assert [gate.admit(frame_at(100), no_replay) for _ in range(4)] == [True, True, True, False]
+    assert not gate.is_open
+
+    # 6 dB above the floor is within the margin, 12 dB is not
+    assert not gate.admit(frame_at(200), no_replay)
+    assert gate.admit(frame_at(400), no_replay)
+    assert gate.is_open and gate.activations == 1
+    assert [gate.admit(frame_at(100), no_replay) for _ in range(4)] == [True, True, True, False]
+    assert gate.scored == 7 and gate.skipped == 3
+
+
+def test_voice_activity_gate_replays_the_skipped_history_when_it_reopens():
+    gate = VoiceActivityGate(WAKE_WORD_FRAME, history_frames=2, hangover_frames=0)
+    replayed = []
+
+    def replay(frame):
+        replayed.append(int(frame[0]))
+
+    # No hangover, so the first quiet frame closes the gate
+    for amplitude in (100, 101, 102, 103):
+        assert not gate.admit(frame_at(amplitude), replay)
+
+    # Only the newest history_frames skipped frames, oldest first, before the loud one is scored
+    assert gate.admit(frame_at(1000), replay)
+    assert replayed == [102, 103]
+    assert gate.replayed == 2
+
+    # Replayed frames are not kept for the next opening
+    replayed.clear()
+    assert not gate.admit(frame_at(100), replay)
+    assert gate.admit(frame_at(1000), replay)
+    assert replayed == [100]
+
+
+class EndpointRecognizer:
+    """Stands in for a KaldiRecognizer that reports an endpoint on chosen frames"""
+
+    def __init__(self, endpoints: set, text: str = "") -> None:
+        self.endpoints = endpoints
+        self.text = text
+        self.frames = 0
+
+    def AcceptWaveform(self, data) -> bool:
+        self.frames += 1
+        return self.frames in self.endpoints
+
+    def Result(self) -> str:
+        return json.dumps({"text": self.text})
+
+    def PartialResult(self) -> str:
+        return json.dumps({"partial": ""})
+
+    def FinalResult(self) -> str:
+        return self.Result()
+
+
+def gated_speech_processor(recognizer):
+    pytest.importorskip("vosk")
+    from aleva.engine import SWAP_BUCKETS, AudioEngine
+    from aleva.streams import DeviceStream, StreamMetrics
+
+    engine = AudioEngine()
+    engine.partial_results = False
+    stream = DeviceStream(0, None)
+    stream.metrics = StreamMetrics(engine.metrics, stream.label, SWAP_BUCKETS)
+    stream.ring = AudioRingBuffer(SAMPLE_RATE * 2, dtype=np.int16)
+    reader = stream.ring.add_reader("speech")
+    stream.recognition_gate = RecognitionGate(pre_roll_samples=8000, max_active_samples=SAMPLE_RATE * 10)
+    stream.recognizer = recognizer
+    frame = np.zeros(FRAME_SIZE, dtype=np.int16)
+    return engine.make_speech_processor(frame, stream, reader), stream.recognition_gate, frame
+
+
+def test_endpoint_without_text_closes_the_gate_after_the_pre_roll():
+    process, gate, frame = gated_speech_processor(EndpointRecognizer(endpoints={1, 3}))
+    gate.is_open = True
+
+    # Silence before the wake word, still within the pre-roll
+    process(frame)
+    assert gate.is_open
+    process(frame)
+    process(frame)
+    assert not gate.is_open
+    assert gate.timeouts == 0
+
+
+def test_endpoint_with_text_closes_the_gate():
+    process, gate, frame = gated_speech_processor(EndpointRecognizer(endpoints={1}, text="turn on the lights"))
+    gate.is_open = True
+    process(frame)
+    assert not gate.is_open
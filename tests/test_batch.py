@@ -0,0 +1,42 @@
+"""Reading recorded WAV files for batch transcription"""
+
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from aleva.batch import SAMPLE_RATE, LinearResampler, read_wav_blocks  # noqa: E402
+
+
+def write_wav(path, samples, rate: int, channels: int = 1) -> None:
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.astype(np.int16).tobytes())
+
+
+@pytest.mark.parametrize("rate", [8000, 44100, 48000])
+def test_resampling_in_blocks_matches_the_whole_file(rate):
+    source = np.sin(np.arange(rate) * 2 * np.pi * 440 / rate) * 10000
+    whole = LinearResampler(rate).process(source)
+
+    resampler = LinearResampler(rate)
+    blocks = [resampler.process(block) for block in np.array_split(source, 37)]
+    assert np.allclose(np.concatenate(blocks), whole)
+    # One second of audio, give or take the last sample
+    assert abs(len(whole) - SAMPLE_RATE) <= 1
+
+
+def test_stereo_is_downmixed_and_resampled(tmp_path):
+    rate = 48000
+    left = np.full(rate, 1000)
+    right = np.full(rate, 3000)
+    path = tmp_path / "stereo.wav"
+    write_wav(path, np.column_stack((left, right)).ravel(), rate, channels=2)
+
+    samples = np.concatenate(list(read_wav_blocks(path, 4000)))
+    assert samples.dtype == np.int16
+    assert abs(len(samples) - SAMPLE_RATE) <= 1
+    assert np.all(samples == 2000)
@@ -0,0 +1,87 @@
+"""The int16 capture path must not keep any allocation per block"""
+
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("vosk")
+
+import aleva  # noqa: E402
+from aleva.audio import AudioRingBuffer, CaptureStats, VoiceActivityGate, make_capture_callback  # noqa: E402
+from aleva.config import WAKE_WORD_FRAME_SIZE  # noqa: E402
+from aleva.engine import vosk_waveform  # noqa: E402
+from aleva.metrics import Histogram  # noqa: E402
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1024
+SPEECH_FRAME_SIZE = 4000
+
+
+def capture_blocks(count: int) -> list:
+    """Byte buffers like the ones a mono int16 RawInputStream hands its callback"""
+    rng = np.random.default_rng(0)
+    samples = (rng.normal(0, 0.05, count * BLOCK_SIZE) * 32767).astype(np.int16)
+    return [memoryview(block.tobytes()) for block in samples.reshape(count, BLOCK_SIZE)]
+
+
+def test_int16_capture_path_keeps_no_allocations():
+    ring = AudioRingBuffer(SAMPLE_RATE * 2, dtype=np.int16)
+    stats = CaptureStats(callback_seconds=Histogram("callback_seconds", "Capture callback duration"))
+    callback = make_capture_callback(ring, stats, raw=True)
+    wake_reader = ring.add_reader("wake-word")
+    speech_reader = ring.add_reader("speech")
+    wake_frame = np.zeros(WAKE_WORD_FRAME_SIZE, dtype=np.int16)
+    speech_frame = np.zeros(SPEECH_FRAME_SIZE, dtype=np.int16)
+    gate = VoiceActivityGate(WAKE_WORD_FRAME_SIZE, history_frames=4)
+    # Built once per consumer, like the engine's speech processor does
+    waveform = vosk_waveform(speech_frame)
+    blocks = capture_blocks(200)
+    handed_to_vosk = 0
+
+    def step(block) -> None:
+        nonlocal handed_to_vosk
+        callback(block, BLOCK_SIZE, None, None)
+        while wake_reader.read_into(wake_frame):
+            gate.admit(wake_frame, lambda frame: None)
+        while speech_reader.read_into(speech_frame):
+            handed_to_vosk += len(waveform)
+
+    # Past the warm-up every counter is above the small ints CPython caches
+    for index in range(400):
+        step(blocks[index % len(blocks)])
+
+    aleva_files = tracemalloc.Filter(True, str(Path(aleva.__file__).parent / "*"))
+    tracemalloc.start()
+    try:
+        for block in blocks[:100]:
+            step(block)
+        before = tracemalloc.take_snapshot().filter_traces([aleva_files])
+        for block in blocks[100:]:
+            step(block)
+        after = tracemalloc.take_snapshot().filter_traces([aleva_files])
+    finally:
+        tracemalloc.stop()
+
+    new_allocations = [diff for diff in after.compare_to(before, "lineno") if diff.count_diff > 0]
+    assert sum(diff.count_diff for diff in new_allocations) == 0, [str(diff) for diff in new_allocations]
+    assert stats.blocks == 600
+    # Every speech frame reached Vosk through the same view, none was copied to bytes
+    assert handed_to_vosk == speech_reader.read_count * speech_frame.itemsize
+
+
+def test_raw_callback_copies_blocks_unchanged():
+    ring = AudioRingBuffer(3000, dtype=np.int16)
+    callback = make_capture_callback(ring, CaptureStats(), raw=True)
+    reader = ring.add_reader("speech")
+    blocks = capture_blocks(5)
+    for block in blocks:
+        callback(block, BLOCK_SIZE, None, None)
+
+    # Only the newest samples fit, the reader lost the rest
+    out = np.zeros(3000, dtype=np.int16)
+    assert reader.read_into(out)
+    expected = np.frombuffer(b"".join(block.tobytes() for block in blocks), dtype=np.int16)[-3000:]
+    assert np.array_equal(out, expected)
+    assert reader.overruns == 1
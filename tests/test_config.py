@@ -0,0 +1,81 @@
+"""Background saving of config.json"""
+
+import json
+import time
+
+from aleva.config import ConfigStore, migrate_legacy_config_dir
+
+
+def test_failed_write_is_retried(tmp_path, monkeypatch):
+    store = ConfigStore(tmp_path / "config.json", debounce=0.05)
+    config = store.load()
+    failures = []
+    write = store.write
+
+    def fail_once(text: str) -> None:
+        if not failures:
+            failures.append(text)
+            raise OSError("disk full")
+        write(text)
+
+    monkeypatch.setattr(store, "write", fail_once)
+    config["ui"]["language"] = "ja"
+    store.save(config)
+
+    deadline = time.monotonic() + 5.0
+    while store.writes == 0:
+        assert time.monotonic() < deadline, "the failed save was not retried"
+        time.sleep(0.01)
+    assert len(failures) == 1
+    assert json.loads(store.path.read_text(encoding="utf-8"))["ui"]["language"] == "ja"
+
+
+def test_save_after_failed_write_is_not_skipped(tmp_path, monkeypatch):
+    store = ConfigStore(tmp_path / "config.json", debounce=60.0)
+    config = store.load()
+
+    def read_only(text: str) -> None:
+        raise OSError("read-only")
+
+    monkeypatch.setattr(store, "write", read_only)
+    config["ui"]["language"] = "ja"
+    store.save(config)
+    store.flush()
+    assert store.writes == 0
+
+    monkeypatch.undo()
+    # Same contents as the failed write, still written
+    store.save(config)
+    store.flush()
+    assert store.writes == 1
+    assert json.loads(store.path.read_text(encoding="utf-8"))["ui"]["language"] == "ja"
+
+
+def test_legacy_data_dir_is_moved(tmp_path):
+    legacy_dir = tmp_path / "run.py"
+    (legacy_dir / "models" / "vosk-model-small-en-us-0.15").mkdir(parents=True)
+    (legacy_dir / "models" / "alexa_v0.1.onnx").write_bytes(b"onnx")
+    (legacy_dir / "config.json").write_text('{"ui": {"language": "ja"}}', encoding="utf-8")
+    config_dir = tmp_path / "aleva"
+    # Installed by the new version already, kept
+    (config_dir / "models" / "alexa_v0.1.onnx").parent.mkdir(parents=True)
+    (config_dir / "models" / "alexa_v0.1.onnx").write_bytes(b"newer")
+
+    assert migrate_legacy_config_dir(config_dir) == config_dir
+    assert ConfigStore(config_dir / "config.json").load()["ui"]["language"] == "ja"
+    assert (config_dir / "models" / "vosk-model-small-en-us-0.15").is_dir()
+    assert (config_dir / "models" / "alexa_v0.1.onnx").read_bytes() == b"newer"
+    assert not (legacy_dir / "config.json").exists()
+
+
+def test_legacy_data_dir_is_ignored_once_there_is_a_config(tmp_path):
+    legacy_dir = tmp_path / "__main__.py"
+    legacy_dir.mkdir()
+    (legacy_dir / "config.json").write_text("{}", encoding="utf-8")
+    config_dir = tmp_path / "aleva"
+    config_dir.mkdir()
+    (config_dir / "config.json").write_text('{"ui": {"language": "zh"}}', encoding="utf-8")
+
+    migrate_legacy_config_dir(config_dir)
+    assert (legacy_dir / "config.json").exists()
+    assert ConfigStore(config_dir / "config.json").load()["ui"]["language"] == "zh"
@@ -0,0 +1,124 @@
+"""Event delivery against the local stand-in API in scripts/serve_api.py"""
+
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from aleva.delivery import EventDelivery
+from aleva.metrics import MetricsRegistry
+
+from .stand_ins import load_script
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def serve_api():
+    """Start serve_api.py's handler with the given settings, returning the events URL"""
+    servers = []
+
+    def start(delay: float = 0.0, idle_timeout=None) -> str:
+        class Handler(load_script("serve_api").EventHandler):
+            def log_message(self, format, *args):
+                pass
+
+        Handler.delay = delay
+        # Closes a kept-alive connection that stays idle this long, without telling the client
+        Handler.timeout = idle_timeout
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        # Lets a test change the settings between requests
+        start.handler = Handler
+        return f"http://127.0.0.1:{server.server_port}/events"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def received_texts(capsys) -> list[str]:
+    """Texts of the events the stand-in printed, in the order it received them"""
+    # Skipping the client's own log lines, which share stdout
+    return [json.loads(line)["text"] for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+
+
+def test_events_submitted_during_a_request_go_out_together(serve_api, capsys):
+    metrics = MetricsRegistry()
+    delivery = EventDelivery(serve_api(delay=0.3), metrics, max_batch=4)
+    delivery.start()
+
+    delivery.submit("transcript", {"text": "first"})
+    # Taken off the queue, so the request is in flight for the next 0.3 s
+    wait_until(lambda: not delivery.queue)
+    for index in range(10):
+        delivery.submit("transcript", {"text": f"next {index}"})
+    delivery.stop(timeout=5.0)
+
+    assert delivery.sent.value == 11
+    # 1 while the server was busy, then 10 queued ones in batches of at most 4
+    assert delivery.request_seconds.count == 4
+    assert delivery.connections.value == 1
+    assert received_texts(capsys) == ["first"] + [f"next {index}" for index in range(10)]
+
+
+def test_full_queue_drops_the_oldest_events(serve_api, capsys):
+    delivery = EventDelivery(serve_api(), MetricsRegistry(), max_queue=4)
+    # Not started yet, so nothing leaves the queue
+    for index in range(10):
+        delivery.submit("transcript", {"text": f"event {index}"})
+    assert delivery.dropped.value == 6
+    assert len(delivery.queue) == 4
+
+    delivery.start()
+    delivery.stop(timeout=5.0)
+    assert delivery.sent.value == 4
+    assert received_texts(capsys) == [f"event {index}" for index in range(6, 10)]
+
+
+def test_reconnects_when_the_server_closed_the_kept_alive_connection(serve_api, capsys):
+    delivery = EventDelivery(serve_api(idle_timeout=0.2), MetricsRegistry(), max_retries=0)
+    delivery.start()
+
+    delivery.submit("transcript", {"text": "before"})
+    wait_until(lambda: delivery.sent.value == 1)
+    # Long enough for the server to drop the idle connection
+    time.sleep(0.5)
+    delivery.submit("transcript", {"text": "after"})
+    delivery.stop(timeout=5.0)
+
+    # Sent on a fresh connection without spending the only attempt it had
+    assert delivery.sent.value == 2
+    assert delivery.failed.value == 0
+    assert delivery.retries.value == 0
+    assert delivery.connections.value == 2
+    assert received_texts(capsys) == ["before", "after"]
+
+
+def test_a_timeout_on_a_kept_alive_connection_counts_as_an_attempt(serve_api, capsys):
+    delivery = EventDelivery(serve_api(), MetricsRegistry(), timeout=0.2, max_retries=0)
+    delivery.start()
+
+    delivery.submit("transcript", {"text": "fast"})
+    wait_until(lambda: delivery.sent.value == 1)
+    # The server reads the next request but only answers after the client gave up on it
+    serve_api.handler.delay = 0.5
+    delivery.submit("transcript", {"text": "slow"})
+    delivery.stop(timeout=5.0)
+    time.sleep(0.6)
+
+    assert delivery.sent.value == 1
+    assert delivery.failed.value == 1
+    assert delivery.retries.value == 0
+    assert delivery.connections.value == 1
+    # Not sent again for free on a new connection, which would have duplicated it
+    assert received_texts(capsys) == ["fast", "slow"]
@@ -0,0 +1,144 @@
+"""Model downloads against the local stand-in server in scripts/serve_models.py"""
+
+import hashlib
+import os
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from aleva import downloads
+from aleva.downloads import DownloadCancelled, Downloader, DownloadError, MissingDigest
+
+from .stand_ins import load_script
+
+ARCHIVE = "vosk-model-test.zip"
+ARCHIVE_SIZE = 1024 * 1024
+
+
+class ModelServer:
+    """serve_models.py on a free port in a background thread"""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.server = None
+
+    def start(self, rate: int = 0, drop_after: int = 0) -> str:
+        """Serve with the given throttling, returning the archive URL"""
+
+        class QuietHandler(load_script("serve_models").RangeRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+        QuietHandler.rate = rate
+        QuietHandler.drop_after = drop_after
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(self.directory)))
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_port}/{ARCHIVE}"
+
+    def stop(self) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+@pytest.fixture
+def archive(tmp_path: Path) -> tuple[bytes, str]:
+    """Random archive contents and their SHA-256"""
+    served = tmp_path / "served"
+    served.mkdir()
+    data = os.urandom(ARCHIVE_SIZE)
+    (served / ARCHIVE).write_bytes(data)
+    return data, hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def server(tmp_path: Path):
+    model_server = ModelServer(tmp_path / "served")
+    yield model_server
+    model_server.stop()
+
+
+@pytest.fixture(autouse=True)
+def small_segments(monkeypatch):
+    """Let the test archive be split into several parallel segments"""
+    monkeypatch.setattr(downloads, "MIN_SEGMENT_SIZE", 64 * 1024)
+
+
+@pytest.mark.parametrize("segments", [1, 4])
+def test_resume_after_dropped_connection(tmp_path, archive, server, segments):
+    data, digest = archive
+    url = server.start(drop_after=96 * 1024)
+    target = tmp_path / "models" / ARCHIVE
+
+    attempts = 0
+    while not target.exists():
+        attempts += 1
+        assert attempts <= 64, "download made no progress"
+        downloader = Downloader(url, target, digest, segments)
+        try:
+            downloader.run()
+        except DownloadError:
+            # Kept for the next attempt
+            assert downloader.part_path.exists()
+            assert downloader.state_path.exists()
+
+    assert attempts > 1
+    assert target.read_bytes() == data
+    assert not downloader.part_path.exists()
+    assert not downloader.state_path.exists()
+
+
+def test_cancel_keeps_part_file_for_resume(tmp_path, archive, server):
+    data, digest = archive
+    url = server.start(rate=2 * 1024 * 1024)
+    target = tmp_path / "models" / ARCHIVE
+
+    def cancel_early(done: int, total: int) -> None:
+        if done >= 128 * 1024:
+            downloader.cancel()
+
+    downloader = Downloader(url, target, digest, segments=4, progress=cancel_early)
+    with pytest.raises(DownloadCancelled):
+        downloader.run()
+    assert not target.exists()
+    assert downloader.part_path.exists()
+    assert downloader.state_path.exists()
+    cancelled_at = downloader.done
+    assert cancelled_at < ARCHIVE_SIZE
+
+    reported = []
+    resumed = Downloader(url, target, digest, segments=4, progress=lambda done, total: reported.append(done))
+    resumed.run()
+    assert target.read_bytes() == data
+    # The next attempt starts from what was kept, not from zero
+    assert reported[0] == cancelled_at
+
+
+@pytest.mark.parametrize("segments", [1, 4])
+def test_hash_mismatch_deletes_part_file(tmp_path, archive, server, segments):
+    url = server.start()
+    target = tmp_path / "models" / ARCHIVE
+
+    downloader = Downloader(url, target, "0" * 64, segments)
+    with pytest.raises(DownloadError, match="SHA-256 mismatch"):
+        downloader.run()
+    assert not target.exists()
+    assert not downloader.part_path.exists()
+    assert not downloader.state_path.exists()
+
+
+def test_missing_digest_requires_opt_out(tmp_path, archive, server):
+    data, _ = archive
+    url = server.start()
+    target = tmp_path / "models" / ARCHIVE
+
+    with pytest.raises(MissingDigest):
+        Downloader(url, target).run()
+    assert not target.with_name(ARCHIVE + ".part").exists()
+
+    Downloader(url, target, allow_unverified=True).run()
+    assert target.read_bytes() == data
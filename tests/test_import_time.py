@@ -0,0 +1,49 @@
+"""Importing the tray application must stay fast and leave the audio stack unloaded"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# Same budget as `scripts/benchmark.py imports`
+IMPORT_BUDGET_MS = 400.0
+
+# Loaded by the engine once models are loaded or listening starts, never on import
+DEFERRED_IMPORTS = ("numpy", "sounddevice", "vosk", "openwakeword", "onnxruntime")
+
+SCRIPT = "import sys, json, aleva.main_window; print(json.dumps(sorted(sys.modules)))"
+
+
+def import_main_window() -> tuple[float, list[str]]:
+    """Import aleva.main_window in a fresh interpreter: cumulative milliseconds and the loaded modules"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SCRIPT], capture_output=True, text=True, env=env, check=True
+    )
+
+    # Lines look like "import time:  self [us] | cumulative | imported package"
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        fields = [field.strip() for field in line.removeprefix("import time:").split("|")]
+        if len(fields) == 3 and fields[2] == "aleva.main_window":
+            cumulative_us = int(fields[1])
+    assert cumulative_us is not None, result.stderr
+    return cumulative_us / 1000, json.loads(result.stdout)
+
+
+@pytest.mark.skipif(importlib.util.find_spec("PySide6") is None, reason="PySide6 is not installed")
+def test_main_window_import_time():
+    # The first run compiles the bytecode and fills the file cache
+    import_main_window()
+    import_ms, modules = import_main_window()
+
+    loaded = [name for name in DEFERRED_IMPORTS if name in modules]
+    assert not loaded, f"aleva.main_window imports {', '.join(loaded)}"
+    assert import_ms <= IMPORT_BUDGET_MS, f"aleva.main_window took {import_ms:.0f} ms to import"
@@ -0,0 +1,66 @@
+"""Reporting an utterance heard by several microphones once"""
+
+from aleva.metrics import MetricsRegistry
+from aleva.streams import StreamDeduplicator, StreamMetrics
+
+
+def test_same_transcript_from_another_device_is_dropped():
+    deduplicator = StreamDeduplicator(window=2.0)
+    assert deduplicator.transcript(0, "Turn on the lights", 10.0)
+    # Case and spacing do not matter
+    assert not deduplicator.transcript(1, "turn on  the lights", 10.5)
+    assert deduplicator.suppressed == 1
+
+
+def test_different_transcript_from_another_device_is_kept():
+    deduplicator = StreamDeduplicator(window=2.0)
+    assert deduplicator.transcript(0, "turn on the lights", 10.0)
+    assert deduplicator.transcript(1, "what is the weather tomorrow", 10.5)
+    assert deduplicator.suppressed == 0
+
+
+def test_transcript_outside_the_window_is_kept():
+    deduplicator = StreamDeduplicator(window=2.0)
+    assert deduplicator.transcript(0, "turn on the lights", 10.0)
+    assert deduplicator.transcript(1, "turn on the lights", 12.5)
+    # The first one has expired, so the second one is what a third device is compared with
+    assert not deduplicator.transcript(2, "turn on the lights", 13.0)
+
+
+def test_device_never_suppresses_itself():
+    deduplicator = StreamDeduplicator(window=2.0)
+    assert deduplicator.transcript(0, "yes", 10.0)
+    assert deduplicator.transcript(0, "yes", 10.5)
+    assert deduplicator.wake_word(0, "alexa", 10.0)
+    assert deduplicator.wake_word(0, "alexa", 10.5)
+
+
+def test_wake_word_from_another_device_is_dropped_within_the_window():
+    deduplicator = StreamDeduplicator(window=2.0)
+    assert deduplicator.wake_word(0, "alexa", 10.0)
+    assert not deduplicator.wake_word(1, "alexa", 11.0)
+    assert deduplicator.wake_word(1, "hey_jarvis", 11.0)
+    assert deduplicator.wake_word(1, "alexa", 12.5)
+
+
+def test_partials_come_from_one_device_until_its_utterance_ends():
+    deduplicator = StreamDeduplicator(window=2.0)
+    assert deduplicator.partial(0, "turn")
+    assert not deduplicator.partial(1, "turn on")
+    assert deduplicator.partial(0, "turn on")
+    assert deduplicator.partial(0, "")
+    assert deduplicator.partial(1, "turn on")
+
+
+def test_stream_metrics_are_labelled_by_device():
+    registry = MetricsRegistry()
+    first = StreamMetrics(registry, "default", (1.0,))
+    second = StreamMetrics(registry, "3", (1.0,))
+    first.callback_seconds.observe(0.001)
+    first.detections.inc()
+
+    values = registry.snapshot()["metrics"]
+    assert values['aleva_callback_seconds{device="default"}']["count"] == 1
+    assert values['aleva_callback_seconds{device="3"}']["count"] == 0
+    assert values['aleva_wake_word_detections_total{device="default"}'] == 1
+    assert second.detections.value == 0
@@ -0,0 +1,58 @@
+"""Wake word decisions from per-frame scores, driven one frame at a time"""
+
+from aleva.wakeword import WakeWordDetector
+
+
+def feed(detector: WakeWordDetector, scores: list[float], wake_word: str = "alexa") -> list:
+    """Process one frame per score, returning the frame numbers that produced a detection"""
+    fired = []
+    for score in scores:
+        if detector.process({wake_word: score}) is not None:
+            fired.append(detector.frames)
+    return fired
+
+
+def test_single_spike_does_not_fire():
+    detector = WakeWordDetector(threshold=0.5, smoothing=1, patience=3)
+    assert feed(detector, [0.0, 0.9, 0.0, 0.0, 0.95, 0.1]) == []
+    assert detector.detections == 0
+
+
+def test_single_spike_is_smoothed_below_the_threshold():
+    # Patience of one, so only the smoothing keeps this spike from firing
+    detector = WakeWordDetector(threshold=0.5, smoothing=3, patience=1)
+    assert feed(detector, [0.0, 0.0, 0.9, 0.0, 0.0]) == []
+
+
+def test_patience_consecutive_frames_fire_once():
+    detector = WakeWordDetector(threshold=0.5, smoothing=1, patience=3)
+    # A dip resets the streak, then three frames in a row above the threshold
+    assert feed(detector, [0.8, 0.8, 0.2, 0.7, 0.8, 0.9]) == [6]
+    assert detector.detections == 1
+
+
+def test_detection_returns_the_model_and_smoothed_score():
+    detector = WakeWordDetector(threshold=0.5, thresholds={"hey_jarvis": 0.9}, smoothing=2, patience=2)
+    # Above the default threshold but not the model's own
+    assert detector.process({"hey_jarvis": 0.8}) is None
+    assert detector.process({"hey_jarvis": 0.8}) is None
+    assert detector.process({"hey_jarvis": 1.0}) is None
+    assert detector.process({"hey_jarvis": 1.0}) == ("hey_jarvis", 1.0)
+
+
+def test_second_detection_inside_refractory_is_suppressed():
+    detector = WakeWordDetector(threshold=0.5, smoothing=1, patience=2, refractory_seconds=0.4, frame_seconds=0.1)
+    # Fires on frame 2, then frames 3 to 6 are ignored however high they score
+    assert feed(detector, [0.9] * 6) == [2]
+    # The first frames after the refractory period start a new streak
+    assert feed(detector, [0.9, 0.9]) == [8]
+    assert detector.detections == 2
+
+
+def test_skipped_frames_break_a_streak_and_count_as_time():
+    detector = WakeWordDetector(threshold=0.5, smoothing=1, patience=2, frame_seconds=0.08)
+    assert feed(detector, [0.9]) == []
+    detector.skip()
+    assert feed(detector, [0.9]) == []
+    assert feed(detector, [0.9]) == [4]
+    assert detector.seconds == 4 * 0.08